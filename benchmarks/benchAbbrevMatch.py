@@ -0,0 +1,97 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure matching of abbreviated keywords
+
+For each number of keywords, reports the time to find the unique match for each keyword, abbreviated
+to its shortest unique prefix: using a new RO.Alg.MatchList for each lookup (as FloatingArgumentSet.parse
+used to), reusing one MatchList, and using twistedActor.parse.TrieMatchList.
+Also reports the time for one thread to parse a command with pyparsing, and for four threads
+to each parse the same number of commands concurrently (parsing no longer modifies the command definitions).
+"""
+import threading
+import time
+
+import RO.Alg.MatchList as MatchList
+
+from twistedActor.parse import TrieMatchList, Command, Float, KeywordValue, String
+
+NumKeywordsList = (5, 20, 80)
+NumParses = 200
+NumThreads = 4
+
+def makeKeywords(numKeywords):
+    """Return a list of keywords, and a list of each keyword abbreviated to its shortest unique prefix
+    """
+    keywordList = ["keyword%03d" % (i,) for i in range(numKeywords)]
+    abbrevList = []
+    for keyword in keywordList:
+        for i in range(1, len(keyword) + 1):
+            if [kw.startswith(keyword[0:i]) for kw in keywordList].count(True) == 1:
+                abbrevList.append(keyword[0:i])
+                break
+    return keywordList, abbrevList
+
+def timeFunc(func, *args):
+    """Return the time (usec) to call func(*args), taking the best of several tries
+    """
+    bestTime = None
+    numReps = 20
+    for i in range(3):
+        startTime = time.time()
+        for j in range(numReps):
+            func(*args)
+        duration = (time.time() - startTime) * 1e6 / numReps
+        bestTime = duration if bestTime is None else min(bestTime, duration)
+    return bestTime
+
+def matchNew(keywordList, abbrevList):
+    for abbrev in abbrevList:
+        MatchList(valueList=keywordList).getUniqueMatch(abbrev)
+
+def matchReuse(matchList, abbrevList):
+    for abbrev in abbrevList:
+        matchList.getUniqueMatch(abbrev)
+
+def timeParse(numThreads):
+    """Return the time (sec) for numThreads threads to each parse NumParses commands with pyparsing
+    """
+    command = Command(
+        commandName = "expose",
+        floatingArguments = [
+            KeywordValue(keyword="time", value=Float()),
+            KeywordValue(keyword="basename", value=String(), isMandatory=False),
+            KeywordValue(keyword="comment", value=String(), isMandatory=False),
+        ],
+    )
+    argStringList = ["time=1.5 basename=a", "ti=2 bas=b com='x y'", "t=3 c=c"]
+    def parseMany():
+        for i in range(NumParses):
+            command.parse(argStringList[i % len(argStringList)], useFastParse=False)
+    threadList = [threading.Thread(target=parseMany) for i in range(numThreads)]
+    startTime = time.time()
+    for thread in threadList:
+        thread.start()
+    for thread in threadList:
+        thread.join()
+    return time.time() - startTime
+
+def main():
+    print("%11s %16s %16s %16s" % ("numKeywords", "new list (us)", "reuse list (us)", "trie (us)"))
+    for numKeywords in NumKeywordsList:
+        keywordList, abbrevList = makeKeywords(numKeywords)
+        matchList = MatchList(valueList=keywordList)
+        trieMatchList = TrieMatchList(valueList=keywordList)
+        print("%11d %16.1f %16.1f %16.1f" % (
+            numKeywords,
+            timeFunc(matchNew, keywordList, abbrevList),
+            timeFunc(matchReuse, matchList, abbrevList),
+            timeFunc(matchReuse, trieMatchList, abbrevList),
+        ))
+    print()
+    oneThreadTime = timeParse(1)
+    manyThreadTime = timeParse(NumThreads)
+    print("pyparsing, %d parses in 1 thread: %0.2f sec; in each of %d threads: %0.2f sec" % \
+        (NumParses, oneThreadTime, NumThreads, manyThreadTime))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the cost of command state changes with callbacks
+
+For each number of callbacks, creates NumCmds commands, adds the callbacks,
+and runs each command through Ready -> Running -> Done (so each callback is called twice per command).
+Also measures a device command tracked by a user command (the common case for DevCmd).
+"""
+import time
+
+from twistedActor import BaseCmd, DevCmd, UserCmd
+
+NumCmds = 200000
+NumCallbacksList = (0, 1, 3)
+
+def timeCallbacks(numCallbacks):
+    funcList = [lambda cmd: None for i in range(numCallbacks)]
+    cmdList = [BaseCmd("foo") for i in xrange(NumCmds)]
+    startTime = time.time()
+    for cmd in cmdList:
+        for func in funcList:
+            cmd.addCallback(func)
+        cmd.setState(cmd.Running)
+        cmd.setState(cmd.Done)
+    return (time.time() - startTime) * 1.0e6 / NumCmds
+
+def timeTracked():
+    cmdPairList = [(UserCmd(cmdStr="%d move" % (i,)), DevCmd("move")) for i in xrange(NumCmds)]
+    startTime = time.time()
+    for userCmd, devCmd in cmdPairList:
+        userCmd.trackCmd(devCmd)
+        devCmd.setState(devCmd.Running)
+        devCmd.setState(devCmd.Done)
+    return (time.time() - startTime) * 1.0e6 / NumCmds
+
+def main():
+    print("%12s %22s" % ("numCallbacks", "microseconds/command"))
+    for numCallbacks in NumCallbacksList:
+        print("%12d %22.2f" % (numCallbacks, timeCallbacks(numCallbacks)))
+    print("%12s %22.2f" % ("tracked", timeTracked()))
+
+if __name__ == "__main__":
+    main()
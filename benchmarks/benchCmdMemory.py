@@ -0,0 +1,73 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure memory used per in-flight command (bytes/command)
+
+Each scenario runs in a fresh process, creates NumCmds commands and reports the increase in
+resident set size divided by the number of commands. Scenarios:
+- UserCmd: bare user commands, as created for each command from a user
+- queued: user commands with a time limit, waiting in a CommandQueue
+- tracked: running user commands, each tracking a DevCmd with a time limit
+"""
+import multiprocessing
+import resource
+
+from twistedActor import CommandQueue, DevCmd, UserCmd
+from twistedActor.commandQueue import QueuedCommand
+
+NumCmds = 50000
+
+def nullFunc(cmd):
+    pass
+
+def makeUserCmds():
+    return [UserCmd(userID=1, cmdStr="%d move 1, 2, 3" % (i,)) for i in xrange(NumCmds)]
+
+def makeQueuedCmds():
+    cmdQueue = CommandQueue(priorityDict=dict())
+    for i in xrange(NumCmds):
+        cmd = UserCmd(userID=1, cmdStr="%d move 1, 2, 3" % (i,), timeLim=10)
+        cmd.cmdVerb = "move"
+        # bypass addCmd, which would cancel the previous command with the same verb
+        cmdQueue.cmdQueue.append(QueuedCommand(cmd, 0, nullFunc))
+    return cmdQueue
+
+def makeTrackedCmds():
+    cmdList = []
+    for i in xrange(NumCmds):
+        userCmd = UserCmd(userID=1, cmdStr="%d move 1, 2, 3" % (i,), timeLim=10)
+        devCmd = DevCmd("move 1, 2, 3", userCmd=userCmd, timeLim=10)
+        devCmd.setState(devCmd.Running)
+        cmdList.append(userCmd)
+    return cmdList
+
+def getRSS():
+    """Return current resident set size (bytes), if /proc is available, else the maximum RSS
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except IOError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def runScenario(makeFunc, resultQueue):
+    startRSS = getRSS()
+    result = makeFunc()
+    resultQueue.put((getRSS() - startRSS) / NumCmds)
+    del result
+
+def main():
+    print("%-10s %14s" % ("scenario", "bytes/command"))
+    for name, makeFunc in (
+        ("UserCmd", makeUserCmds),
+        ("queued", makeQueuedCmds),
+        ("tracked", makeTrackedCmds),
+    ):
+        resultQueue = multiprocessing.Queue()
+        proc = multiprocessing.Process(target=runScenario, args=(makeFunc, resultQueue))
+        proc.start()
+        bytesPerCmd = resultQueue.get()
+        proc.join()
+        print("%-10s %14.0f" % (name, bytesPerCmd))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the speed of command state changes and state tests
+
+Runs NumCmds commands through Ready -> Running -> Done (two setState calls each; NumCmds * 2 calls in all)
+and times the state test properties isDone, isActive and didFail.
+"""
+import time
+
+from twistedActor import UserCmd
+
+NumCmds = 1000000
+NumTests = 1000000
+
+def main():
+    cmdList = [UserCmd(cmdStr="1 foo") for i in xrange(NumCmds)]
+    startTime = time.time()
+    for cmd in cmdList:
+        cmd.setState(cmd.Running)
+        cmd.setState(cmd.Done)
+    duration = time.time() - startTime
+    print("%d setState calls in %0.2f sec: %0.3f microseconds/call" % (NumCmds * 2, duration,
+        duration * 1.0e6 / (NumCmds * 2)))
+
+    cmd = UserCmd(cmdStr="1 foo")
+    cmd.setState(cmd.Running)
+    for name in ("isDone", "isActive", "didFail"):
+        getter = getattr(UserCmd, name).fget
+        startTime = time.time()
+        for i in xrange(NumTests):
+            getter(cmd)
+        print("%-8s %0.3f microseconds/call" % (name, (time.time() - startTime) * 1.0e6 / NumTests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the cost of collecting command statistics
+
+Creates NumCmds user commands, each tracking one device command, and runs them all through
+Ready -> Running -> Done, with statistics off and on. Also times LatencyHistogram.record.
+"""
+import time
+
+from twistedActor import DevCmd, LatencyHistogram, UserCmd, startCmdStats, stopCmdStats
+
+NumCmds = 100000
+NumRecords = 1000000
+
+class FakeDev(object):
+    name = "fakeDev"
+
+def runCmds():
+    dev = FakeDev()
+    startTime = time.time()
+    for i in xrange(NumCmds):
+        userCmd = UserCmd(userID=1, cmdStr="%d move" % (i,))
+        userCmd.cmdVerb = "move"
+        devCmd = DevCmd(cmdStr="move", userCmd=userCmd, dev=dev)
+        devCmd.setState(devCmd.Running)
+        devCmd.setState(devCmd.Done)
+    return (time.time() - startTime) * 1.0e6 / NumCmds
+
+def main():
+    stopCmdStats()
+    print("statistics off: %0.1f microseconds/user command" % (runCmds(),))
+    startCmdStats()
+    print("statistics on:  %0.1f microseconds/user command" % (runCmds(),))
+    stopCmdStats()
+
+    hist = LatencyHistogram()
+    startTime = time.time()
+    for i in xrange(NumRecords):
+        hist.record(i * 1.0e-7)
+    print("LatencyHistogram.record: %0.3f microseconds/call" % ((time.time() - startTime) * 1.0e6 / NumRecords,))
+
+if __name__ == "__main__":
+    main()
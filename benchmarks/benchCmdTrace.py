@@ -0,0 +1,39 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the cost of command tracing
+
+Creates NumCmds user commands, each linked to one device command, and runs them all through
+Ready -> Running -> Done, with tracing off, tracing to memory and tracing to a file.
+"""
+import os
+import tempfile
+import time
+
+from twistedActor import DevCmd, UserCmd, startCmdTracing, stopCmdTracing
+
+NumCmds = 100000
+
+def runCmds():
+    startTime = time.time()
+    for i in xrange(NumCmds):
+        userCmd = UserCmd(userID=1, cmdStr="%d move" % (i,))
+        devCmd = DevCmd(cmdStr="move", userCmd=userCmd)
+        devCmd.setState(devCmd.Running)
+        devCmd.setState(devCmd.Done)
+    return (time.time() - startTime) * 1.0e6 / NumCmds
+
+def main():
+    fd, filePath = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        print("tracing off:       %0.1f microseconds/user command" % (runCmds(),))
+        startCmdTracing()
+        print("tracing to memory: %0.1f microseconds/user command" % (runCmds(),))
+        startCmdTracing(filePath=filePath)
+        print("tracing to file:   %0.1f microseconds/user command" % (runCmds(),))
+        stopCmdTracing()
+    finally:
+        os.remove(filePath)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure command parsing throughput (commands/second) of twistedActor.parse
+
+Parses each command string in tests/testParser.py using the command set defined there (arcticCommandSet):
+- with the fast parser, which handles all of these commands without pyparsing (the default)
+- with pyparsing only (useFastParse=False), with and without pyparsing packrat memoization.
+  Packrat memoization is a global pyparsing setting, so twistedActor.parse does not enable it;
+  for these grammars it makes parsing slower, not faster.
+"""
+import os
+import sys
+import time
+
+import pyparsing as pp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "tests"))
+from testParser import arcticCommandSet, commandList
+
+NumReps = 20
+
+def timeParse(useFastParse, numReps=NumReps):
+    startTime = time.time()
+    for i in xrange(numReps):
+        for cmdStr in commandList:
+            arcticCommandSet.parse(cmdStr, useFastParse=useFastParse)
+    return numReps * len(commandList) / (time.time() - startTime)
+
+def main():
+    print("%22s %18s" % ("parser", "commands/second"))
+    print("%22s %18.0f" % ("fast", timeParse(useFastParse=True, numReps=NumReps * 50)))
+    print("%22s %18.0f" % ("pyparsing", timeParse(useFastParse=False)))
+    pp.ParserElement.enablePackrat()
+    print("%22s %18.0f" % ("pyparsing with packrat", timeParse(useFastParse=False)))
+
+if __name__ == "__main__":
+    main()
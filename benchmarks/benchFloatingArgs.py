@@ -0,0 +1,77 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure parsing of long commands with many keyword=value arguments
+
+For each number of keywords, defines a command with that many keyword arguments (alternately Int lists
+and String lists) and parses a command that specifies all of them, each with several values.
+Reports the time to parse the command with the fast parser and with pyparsing,
+and the time to remove the parsed keyword=value ranges from the command string:
+with the original character-by-character loop and with twistedActor.parse._pruneString.
+"""
+import time
+
+from twistedActor.parse import _pruneString, inf, Command, Int, KeywordValue, String
+
+NumKeywordsList = (5, 20, 80)
+NumValues = 5
+
+def oldPruneString(argString, stringPosList):
+    """The original pruning code in FloatingArgumentSet.parse
+    """
+    prunedString = ""
+    for ind, char in enumerate(argString):
+        if not True in [beg<=ind<end for beg,end in stringPosList]:
+            prunedString += char
+    return prunedString.strip()
+
+def makeCommand(numKeywords):
+    """Return a command with numKeywords keyword arguments, and a string that uses all of them
+    """
+    floatingArguments = []
+    tokenList = []
+    for i in range(numKeywords):
+        keyword = "key%03d" % (i,)
+        if i % 2:
+            value = Int(nElements=(1, inf))
+            valueList = [str(i * 100 + j) for j in range(NumValues)]
+        else:
+            value = String(nElements=(1, inf))
+            valueList = ["value%d/%d" % (i, j) for j in range(NumValues)]
+        floatingArguments.append(KeywordValue(keyword=keyword, value=value, isMandatory=False))
+        tokenList.append("%s=%s" % (keyword, ",".join(valueList)))
+    return Command(commandName="test", floatingArguments=floatingArguments), " ".join(tokenList)
+
+def timeFunc(func, *args):
+    """Return the time (msec) to call func(*args), taking the best of several tries
+    """
+    bestTime = None
+    numReps = 3
+    for i in range(3):
+        startTime = time.time()
+        for j in range(numReps):
+            func(*args)
+        duration = (time.time() - startTime) * 1000 / numReps
+        bestTime = duration if bestTime is None else min(bestTime, duration)
+    return bestTime
+
+def main():
+    print("%11s %11s %11s %14s %14s %14s" % ("numKeywords", "numChars", "fast (ms)", "pyparsing (ms)",
+        "old prune (ms)", "new prune (ms)"))
+    for numKeywords in NumKeywordsList:
+        command, argString = makeCommand(numKeywords)
+        assert command.parse(argString) == command.parse(argString, useFastParse=False)
+        # ranges to prune, as found by pyparsing
+        stringPosList = [arg.scanString(argString, arg.getPyparseItem(key))[1]
+            for key, arg in command.floatingArgumentSet.floatingArgDict.iteritems()]
+        assert oldPruneString(argString, stringPosList) == _pruneString(argString, stringPosList)
+        print("%11d %11d %11.3f %14.1f %14.3f %14.3f" % (
+            numKeywords,
+            len(argString),
+            timeFunc(command.parse, argString),
+            timeFunc(command.parse, argString, False),
+            timeFunc(oldPruneString, argString, stringPosList),
+            timeFunc(_pruneString, argString, stringPosList),
+        ))
+
+if __name__ == "__main__":
+    main()
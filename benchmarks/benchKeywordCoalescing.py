@@ -0,0 +1,75 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the output bandwidth and CPU time saved by BaseActor.setKeywordCoalescing
+
+Simulates a device that reports a few status keywords UpdateRate times per second for Duration seconds,
+with NumUsers users connected. Simulated time is used: held keywords are output (by calling flushKeywords)
+once per coalescing window, so the benchmark runs as fast as possible and is repeatable.
+"""
+import time
+
+from twistedActor import BaseActor
+
+from benchWriteToUsers import FakeSocket
+
+NumUsers = 10
+UpdateRate = 100 # status updates per second
+Duration = 60 # seconds of simulated time
+WindowList = (0, 0.05, 0.1, 0.5, 1.0)
+MsgStrList = (
+    "axePos=12.3456, -45.6789, 123.4567",
+    "axePos=12.3457, -45.6788, 123.4568; axisErr=0.0001, -0.0001, 0.0002",
+    "axisCmdState=Tracking, Tracking, Tracking",
+)
+
+def setNumUsers(actor, numUsers):
+    """Replace all users with numUsers new simulated users; return the list of sockets
+
+    Existing users are disconnected the way the actor sees a socket close,
+    so their user IDs are reused and no per-user state is left behind.
+    """
+    for sock in actor.userDict.values():
+        sock.close()
+        actor.userSocketClosing(sock)
+    sockList = [FakeSocket() for i in range(numUsers)]
+    for sock in sockList:
+        actor.newUser(sock)
+    for sock in sockList:
+        sock.transport.nBytes = 0 # ignore the greetings
+    return sockList
+
+def runSimulation(actor, window):
+    """Simulate Duration seconds of status output; return (bytes written, CPU seconds)
+    """
+    sockList = setNumUsers(actor, NumUsers)
+    actor.setKeywordCoalescing(window)
+    numUpdates = int(UpdateRate * Duration)
+    updatesPerWindow = max(1, int(UpdateRate * window))
+    startTime = time.clock()
+    for i in xrange(numUpdates):
+        actor.writeToUsers("i", MsgStrList[i % len(MsgStrList)])
+        if window and (i + 1) % updatesPerWindow == 0:
+            actor.flushKeywords()
+    actor.flushKeywords()
+    cpuTime = time.clock() - startTime
+    actor.setKeywordCoalescing(0)
+    return sum(sock.transport.nBytes for sock in sockList), cpuTime
+
+def main():
+    actor = BaseActor(userPort=0, name="benchActor")
+    try:
+        print("%d users; %d updates/sec for %d sec" % (NumUsers, UpdateRate, Duration))
+        print("%8s %12s %10s %10s %10s" % ("window", "bytes", "bytes/sec", "CPU sec", "CPU saved"))
+        baseBytes = baseCPU = None
+        for window in WindowList:
+            nBytes, cpuTime = runSimulation(actor, window)
+            if baseBytes is None:
+                baseBytes, baseCPU = nBytes, cpuTime
+            print("%8s %12d %10.0f %10.3f %9.0f%%  (%.0f%% of bandwidth saved)" % (
+                window if window else "off", nBytes, nBytes / Duration, cpuTime,
+                100 * (1 - cpuTime / baseCPU), 100 * (1 - nBytes / baseBytes)))
+    finally:
+        actor.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the time to finish a command linked to many sub-commands, as a function of the number of sub-commands
+
+Each sub-command goes Ready -> Running -> Done. The "rescan" column shows the original approach of checking
+every sub-command each time any sub-command changes state, for comparison.
+"""
+import time
+
+from twistedActor import BaseCmd, LinkCommands
+
+NumSubCmdsList = (10, 100, 1000, 3000)
+
+class RescanLinkCommands(object):
+    """The original LinkCommands completion check, for comparison
+    """
+    def __init__(self, mainCmd, subCmdList):
+        self.mainCmd = mainCmd
+        self.subCmdList = subCmdList
+        for subCmd in subCmdList:
+            subCmd.addCallback(self.subCmdCallback)
+
+    def subCmdCallback(self, dumCmd=None):
+        if not all(subCmd.isDone for subCmd in self.subCmdList):
+            return
+        failedCmdSummary = "; ".join("%s: %s" % (subCmd.cmdStr, subCmd.getMsg())
+            for subCmd in self.subCmdList if subCmd.didFail)
+        self.mainCmd.setState(self.mainCmd.Failed if failedCmdSummary else self.mainCmd.Done, textMsg=failedCmdSummary)
+
+def timeLink(linkClass, numSubCmds):
+    mainCmd = BaseCmd("main")
+    subCmdList = [BaseCmd("sub%d" % (i,)) for i in range(numSubCmds)]
+    startTime = time.time()
+    linkClass(mainCmd, subCmdList)
+    for subCmd in subCmdList:
+        subCmd.setState(subCmd.Running)
+    for subCmd in subCmdList:
+        subCmd.setState(subCmd.Done)
+    duration = time.time() - startTime
+    assert mainCmd.state == mainCmd.Done
+    return duration
+
+def main():
+    print("%11s %14s %14s" % ("numSubCmds", "incremental ms", "rescan ms"))
+    for numSubCmds in NumSubCmdsList:
+        newTime = timeLink(LinkCommands, numSubCmds)
+        oldTime = timeLink(RescanLinkCommands, numSubCmds)
+        print("%11d %14.1f %14.1f" % (numSubCmds, newTime * 1000, oldTime * 1000))
+
+if __name__ == "__main__":
+    main()
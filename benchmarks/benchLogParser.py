@@ -0,0 +1,88 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure log file parsing speed (lines/second) of LogLineParser, compared to the original pyparsing grammar
+
+Writes a temporary log file of NumLines lines, then times:
+- the original pyparsing-based parseLogFile (copied here for comparison)
+- LogLineParser.parseLogFile
+- LogLineParser.iterLogFile with a start time near the end of the file (binary search)
+"""
+import datetime
+import os
+import tempfile
+import time
+
+import pyparsing as pp
+
+from twistedActor import LogLineParser
+
+NumLines = 50000
+
+class OldLogLineParser(object):
+    """The original pyparsing-based log line parser
+    """
+    def __init__(self):
+        year = pp.Word(pp.nums, exact=4).setResultsName("year").setParseAction(lambda t: int(t[0]))
+        month = pp.Word(pp.nums, exact=2).setResultsName("month").setParseAction(lambda t: int(t[0]))
+        day = pp.Word(pp.nums, exact=2).setResultsName("day").setParseAction(lambda t: int(t[0]))
+        hour = pp.Word(pp.nums, exact=2).setResultsName("hour").setParseAction(lambda t: int(t[0]))
+        minute = pp.Word(pp.nums, exact=2).setResultsName("minute").setParseAction(lambda t: int(t[0]))
+        second = pp.Word(pp.nums, exact=2).setResultsName("second").setParseAction(lambda t: int(t[0]))
+        ms = pp.Word(pp.nums, exact=3).setResultsName("ms").setParseAction(lambda t: int(t[0]))
+        dash = pp.Literal("-").suppress()
+        colon = pp.Literal(":").suppress()
+        period = pp.Literal(".").suppress()
+        severity = pp.oneOf("DEBUG INFO WARNING ERROR CRITICAL").suppress()
+        msg = pp.restOfLine.copy().setResultsName("msg").setParseAction(lambda t: t[0].strip())
+        self.grammar = year + dash + month + dash + day + hour + colon + minute + colon + second + period + ms + severity + colon + msg
+
+    def parseLine(self, line):
+        ppOut = self.grammar.parseString(line, parseAll=True)
+        datetimeStamp = datetime.datetime(ppOut.year, ppOut.month, ppOut.day,
+            ppOut.hour, ppOut.minute, ppOut.second, ppOut.ms * 1000)
+        return datetimeStamp, ppOut.msg
+
+    def parseLogFile(self, logfile):
+        outList = []
+        with open(logfile, "r") as f:
+            for loggedLine in f:
+                outList.append(self.parseLine(loggedLine.strip()))
+        return outList
+
+def writeLogFile(filePath):
+    """Write a log file of NumLines lines, 10 lines per millisecond; return the time of the first line
+    """
+    startTime = datetime.datetime(2015, 1, 1)
+    with open(filePath, "w") as f:
+        for i in xrange(NumLines):
+            msgTime = startTime + datetime.timedelta(microseconds=100 * i)
+            timeStr = "%s.%03d" % (msgTime.strftime("%Y-%m-%d %H:%M:%S"), msgTime.microsecond // 1000)
+            f.write("%s INFO:  UserCmd('%d move 1, 2, 3', state=running)\n" % (timeStr, i))
+    return startTime
+
+def timeIt(func):
+    startTime = time.time()
+    numMsgs = len(func())
+    return numMsgs, time.time() - startTime
+
+def main():
+    fd, filePath = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    try:
+        startTime = writeLogFile(filePath)
+        print("%d line log file (%0.1f MB)" % (NumLines, os.path.getsize(filePath) / 1.0e6))
+        seekTime = startTime + datetime.timedelta(microseconds=100 * (NumLines - 1000))
+        caseList = (
+            ("pyparsing parseLogFile", lambda: OldLogLineParser().parseLogFile(filePath)),
+            ("LogLineParser.parseLogFile", lambda: LogLineParser().parseLogFile(filePath)),
+            ("iterLogFile, last 1000 lines", lambda: list(LogLineParser().iterLogFile(filePath, startTime=seekTime))),
+        )
+        print("%-30s %10s %10s %14s" % ("parser", "messages", "seconds", "lines/sec"))
+        for name, func in caseList:
+            numMsgs, duration = timeIt(func)
+            print("%-30s %10d %10.3f %14.0f" % (name, numMsgs, duration, numMsgs / duration))
+    finally:
+        os.remove(filePath)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the cost of info-level log statements on heavily used code paths, using the default logger
+(which discards info messages)
+
+Compares eager formatting (log.info(fmt % args), the old style) with deferred formatting (log.info(fmt, *args)).
+A typical user command logs each state change (BaseCmd.setState), its reply (BaseActor.writeToUsers)
+and one device command (Device.startCmd); the last line sums these to give the overhead per command.
+"""
+import time
+
+from twistedActor import UserCmd, log
+
+NumIter = 100000
+
+def timeIt(func):
+    """Return the time per call of func, in microseconds
+    """
+    startTime = time.time()
+    for i in xrange(NumIter):
+        func()
+    return (time.time() - startTime) * 1.0e6 / NumIter
+
+def main():
+    cmd = UserCmd(userID=1, cmdStr="5 move 1, 2, 3")
+    fullMsgStr = "5 1 : text=\"move done\""
+    cmdStr = "move 1, 2, 3"
+
+    # (name, number of calls per command, eager function, deferred function)
+    caseList = (
+        ("setState", 3,
+            lambda: log.info(str(cmd)),
+            lambda: log.info("%s", cmd)),
+        ("writeToUsers", 1,
+            lambda: log.info("%s.writeToUsers(%r)" % (cmd, fullMsgStr)),
+            lambda: log.info("%s.writeToUsers(%r)", cmd, fullMsgStr)),
+        ("startCmd", 1,
+            lambda: log.info("%s.startCmd(cmdStr=%r, callFunc=%s, userCmd=%s, timeLim=%s)" % \
+                (cmd, cmdStr, None, cmd, 2)),
+            lambda: log.info("%s.startCmd(cmdStr=%r, callFunc=%s, userCmd=%s, timeLim=%s)",
+                cmd, cmdStr, None, cmd, 2)),
+    )
+
+    print("logger: %s; microseconds per log statement" % (log,))
+    print("%-14s %10s %10s" % ("code path", "eager", "deferred"))
+    eagerTotal = deferredTotal = 0
+    for name, numCalls, eagerFunc, deferredFunc in caseList:
+        eagerTime = timeIt(eagerFunc)
+        deferredTime = timeIt(deferredFunc)
+        eagerTotal += eagerTime * numCalls
+        deferredTotal += deferredTime * numCalls
+        print("%-14s %10.2f %10.2f" % (name, eagerTime, deferredTime))
+    print("%-14s %10.2f %10.2f" % ("per command", eagerTotal, deferredTotal))
+
+if __name__ == "__main__":
+    main()
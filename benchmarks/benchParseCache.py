@@ -0,0 +1,91 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure command parsing throughput (commands/second) with and without the CommandSet parse cache
+
+Replays traffic typical of an actor driven by a hub: mostly repeated status polls, pings,
+moves to a few preset positions and exposures with a few standard times, plus some commands
+that are rarely repeated (moves to arbitrary positions and exposures with comments).
+Each parser (the fast parser and pyparsing only) is timed with the cache disabled
+and with caches of several sizes; the cache hit rate is reported for each.
+"""
+import random
+import time
+
+from twistedActor.parse import Command, CommandSet, Float, Int, KeywordValue, String, UniqueMatch
+
+NumCmds = 20000
+CacheSizeList = (0, 8, 100)
+
+def makeCommandSet(cacheSize):
+    return CommandSet(
+        actorName = "BENCH",
+        cacheSize = cacheSize,
+        commandList = [
+            Command(
+                commandName = "status",
+                positionalArguments = [UniqueMatch(["all", "axes", "filter"], nElements=(0, 1))],
+            ),
+            Command(commandName = "ping"),
+            Command(
+                commandName = "move",
+                floatingArguments = [
+                    KeywordValue(keyword="az", value=Float()),
+                    KeywordValue(keyword="alt", value=Float()),
+                    KeywordValue(keyword="rot", value=Float(), isMandatory=False),
+                ],
+            ),
+            Command(
+                commandName = "expose",
+                floatingArguments = [
+                    KeywordValue(keyword="time", value=Float()),
+                    KeywordValue(keyword="bin", value=Int(nElements=(1, 2)), isMandatory=False),
+                    KeywordValue(keyword="comment", value=String(), isMandatory=False),
+                ],
+            ),
+        ],
+    )
+
+def makeTraffic(rand):
+    """Return a list of NumCmds command strings
+    """
+    presetList = ["move az=%s alt=%s" % azAlt for azAlt in ((0, 90), (121.5, 45), (-30, 60), (180, 30))]
+    cmdStrList = []
+    for i in xrange(NumCmds):
+        randVal = rand.random()
+        if randVal < 0.4:
+            cmdStr = rand.choice(("status", "status", "status all", "status axes", "stat filter"))
+        elif randVal < 0.55:
+            cmdStr = "ping"
+        elif randVal < 0.75:
+            cmdStr = rand.choice(presetList)
+        elif randVal < 0.9:
+            cmdStr = "expose time=%s bin=%s" % (rand.choice((1, 5, 30, 60)), rand.choice(("1", "2", "2,2")))
+        elif randVal < 0.95:
+            cmdStr = "move az=%0.3f alt=%0.3f rot=0" % (rand.uniform(-180, 180), rand.uniform(15, 90))
+        else:
+            cmdStr = "expose time=%0.1f comment='exposure %d'" % (rand.uniform(1, 100), i)
+        cmdStrList.append(cmdStr)
+    return cmdStrList
+
+def timeParse(cmdStrList, cacheSize, useFastParse):
+    """Return commands/second and cache hit rate (%)
+    """
+    commandSet = makeCommandSet(cacheSize)
+    startTime = time.time()
+    for cmdStr in cmdStrList:
+        commandSet.parse(cmdStr, useFastParse=useFastParse)
+    cmdsPerSec = len(cmdStrList) / (time.time() - startTime)
+    numLookups = commandSet.numCacheHits + commandSet.numCacheMisses
+    hitRate = 100 * commandSet.numCacheHits / numLookups if numLookups else 0
+    return cmdsPerSec, hitRate
+
+def main():
+    cmdStrList = makeTraffic(random.Random(1))
+    print("%10s %10s %16s %14s" % ("parser", "cacheSize", "commands/second", "hit rate (%)"))
+    for useFastParse, parserName, numCmds in ((True, "fast", NumCmds), (False, "pyparsing", NumCmds // 10)):
+        for cacheSize in CacheSizeList:
+            cmdsPerSec, hitRate = timeParse(cmdStrList[0:numCmds], cacheSize, useFastParse)
+            print("%10s %10d %16.0f %14.1f" % (parserName, cacheSize, cmdsPerSec, hitRate))
+
+if __name__ == "__main__":
+    main()
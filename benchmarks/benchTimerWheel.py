@@ -0,0 +1,65 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Compare a shared TimerWheel with one RO.Comm.TwistedTimer.Timer per command for command time limits
+
+The typical pattern is measured: start a timer when a command starts running and cancel it when the command
+finishes, long before the time limit. Also reported is the number of delayed calls in the reactor's heap
+while NumPending commands are running.
+"""
+import time
+
+from twisted.internet import reactor
+from RO.Comm.TwistedTimer import Timer
+
+from twistedActor import TimerWheel, UserCmd
+
+NumIter = 100000
+NumPending = 10000
+TimeLim = 10.0
+
+def nullFunc():
+    pass
+
+def timeIt(func):
+    """Return time per call of func in microseconds
+    """
+    startTime = time.time()
+    for i in xrange(NumIter):
+        func()
+    return (time.time() - startTime) * 1.0e6 / NumIter
+
+def perCmdTimer():
+    timer = Timer()
+    timer.start(TimeLim, nullFunc)
+    timer.cancel()
+
+def main():
+    wheel = TimerWheel()
+    def wheelTimer():
+        wheel.add(TimeLim, nullFunc).cancel()
+    def cmdLifecycle():
+        cmd = UserCmd(cmdStr="1 foo", timeLim=TimeLim)
+        cmd.setState(cmd.Running)
+        cmd.setState(cmd.Done)
+
+    print("microseconds per start and cancel")
+    print("%-24s %10.2f" % ("per-command Timer", timeIt(perCmdTimer)))
+    print("%-24s %10.2f" % ("TimerWheel", timeIt(wheelTimer)))
+    print("%-24s %10.2f" % ("UserCmd with timeLim", timeIt(cmdLifecycle)))
+
+    numCalls = len(reactor.getDelayedCalls())
+    timerList = [Timer(TimeLim, nullFunc) for i in xrange(NumPending)]
+    print("\nreactor delayed calls with %d pending time limits" % (NumPending,))
+    print("%-24s %10d" % ("per-command Timer", len(reactor.getDelayedCalls()) - numCalls))
+    for timer in timerList:
+        timer.cancel()
+    # cancelled delayed calls are not removed from the heap immediately, so measure wheel timers separately
+    reactor.runUntilCurrent()
+    numCalls = len(reactor.getDelayedCalls())
+    wheelTimerList = [wheel.add(TimeLim, nullFunc) for i in xrange(NumPending)]
+    print("%-24s %10d" % ("TimerWheel", len(reactor.getDelayedCalls()) - numCalls))
+    for wheelTimer in wheelTimerList:
+        wheelTimer.cancel()
+
+if __name__ == "__main__":
+    main()
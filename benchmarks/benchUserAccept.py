@@ -0,0 +1,59 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the time for BaseActor to accept a user, as a function of the number of users already connected
+
+Each measurement disconnects and reconnects the same simulated user many times; the user ID it receives
+is the lowest free ID, so a linear search for a free ID would get slower as more users are connected.
+"""
+import time
+
+from twistedActor import BaseActor
+
+from benchWriteToUsers import FakeSocket
+
+NumReps = 200
+NumUsersList = (0, 100, 1000, 5000)
+
+class QuietActor(BaseActor):
+    """A BaseActor that does not report user information, so newUser takes the same time for any number of users
+    """
+    def showNewUserInfo(self, fakeCmd):
+        pass
+
+    def showUserList(self, cmd=None):
+        pass
+
+def connect(actor):
+    sock = FakeSocket()
+    actor.newUser(sock)
+    return sock
+
+def disconnect(actor, sock):
+    sock.close()
+    actor.userSocketClosing(sock)
+
+def timeAccept(actor):
+    """Return the best of three mean times (sec) to accept a user, reconnecting the same user NumReps times
+    """
+    timeList = []
+    for i in range(3):
+        startTime = time.time()
+        for j in range(NumReps):
+            disconnect(actor, connect(actor))
+        timeList.append((time.time() - startTime) / NumReps)
+    return min(timeList)
+
+def main():
+    actor = QuietActor(userPort=0, name="benchActor")
+    try:
+        sockList = []
+        print("%8s %22s" % ("numUsers", "usec to accept a user"))
+        for numUsers in NumUsersList:
+            while len(sockList) < numUsers:
+                sockList.append(connect(actor))
+            print("%8d %22.1f" % (numUsers, timeAccept(actor) * 1e6))
+    finally:
+        actor.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure the cost of parsing user command strings
+
+Compares the single-pass header parser used by UserCmd (UserCmd._splitHeader followed by the split
+done by UserCmd.setVerbArgs to get the verb and arguments) to the previous approach: matching UserCmd._HeaderBodyRE,
+calling groupdict and then splitting the command body (as Actor.parseAndDispatchCmd used to).
+The command strings resemble traffic from the hub: a command ID, sometimes a user ID, a verb and arguments.
+"""
+import time
+
+from twistedActor import UserCmd
+
+NumReps = 20
+CmdStrList = [
+    "12 status",
+    "13 move 10.5 20.3 /wait",
+    "14 7 offset arc 0.001, 0.002 /computed",
+    "15 ping",
+    "16 init",
+    "17 3 expose object time=15.0 name=\"dark frame\"",
+    "18 Track 123.4, 45.6 ICRS /Rotangle=0.0",
+    "19 cancel",
+    "status",
+    "20 2  set  foo=1",
+] * 1000
+
+def regExParse(cmdStr):
+    cmdMatch = UserCmd._HeaderBodyRE.match(cmdStr)
+    cmdDict = cmdMatch.groupdict("")
+    cmdIDStr = cmdDict["cmdID"]
+    cmdID = int(cmdIDStr) if cmdIDStr else 0
+    cmdBody = cmdDict.get("cmdBody", "")
+    cmdVerb = ""
+    cmdArgs = ""
+    if cmdBody:
+        res = cmdBody.split(None, 1)
+        if len(res) > 1:
+            cmdVerb, cmdArgs = res
+        else:
+            cmdVerb = res[0]
+        cmdVerb = cmdVerb.lower()
+    return cmdID, cmdBody, cmdVerb, cmdArgs
+
+def fastParse(cmdStr):
+    cmdIDStr, cmdBody = UserCmd._splitHeader(cmdStr)
+    cmdID = int(cmdIDStr) if cmdIDStr else 0
+    cmdVerb = ""
+    cmdArgs = ""
+    if cmdBody:
+        verbArgs = cmdBody.split(None, 1)
+        cmdVerb = verbArgs[0].lower()
+        cmdArgs = verbArgs[1] if len(verbArgs) > 1 else ""
+    return cmdID, cmdBody, cmdVerb, cmdArgs
+
+def timeFunc(func):
+    startTime = time.time()
+    for i in xrange(NumReps):
+        for cmdStr in CmdStrList:
+            func(cmdStr)
+    return (time.time() - startTime) * 1.0e6 / (NumReps * len(CmdStrList))
+
+def timeUserCmd():
+    startTime = time.time()
+    for i in xrange(NumReps):
+        for cmdStr in CmdStrList:
+            UserCmd(userID=1, cmdStr=cmdStr).setVerbArgs()
+    return (time.time() - startTime) * 1.0e6 / (NumReps * len(CmdStrList))
+
+def main():
+    for cmdStr in CmdStrList[0:10]:
+        assert regExParse(cmdStr) == fastParse(cmdStr), cmdStr
+    print("%28s %22s" % ("method", "microseconds/command"))
+    print("%28s %22.3f" % ("regular expression + split", timeFunc(regExParse)))
+    print("%28s %22.3f" % ("single pass", timeFunc(fastParse)))
+    print("%28s %22.3f" % ("UserCmd construction", timeUserCmd()))
+
+if __name__ == "__main__":
+    main()
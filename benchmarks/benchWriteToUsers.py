@@ -0,0 +1,91 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import, print_function
+"""Measure BaseActor.writeToUsers throughput (messages/second) as a function of the number of users
+
+Each simulated user socket counts the bytes handed to its transport; nothing is sent over the network.
+The "per-socket writeLine" column shows the original approach of formatting the line terminator
+separately for each user, for comparison.
+"""
+import time
+
+from twistedActor import BaseActor
+
+NumMsgs = 20000
+NumUsersList = (1, 5, 10, 30, 100)
+MsgStr = "axePos=12.3456, -45.6789, 123.4567; axisCmdState=Tracking, Tracking, Tracking"
+
+class FakeTransport(object):
+    def __init__(self):
+        self.nBytes = 0
+
+    def write(self, data):
+        self.nBytes += len(data)
+
+class FakeSocket(object):
+    """Minimal stand-in for RO.Comm.TwistedSocket.TCPSocket
+    """
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.isReady = True
+        self.host = "localhost"
+
+    def setReadCallback(self, callFunc):
+        pass
+
+    def addStateCallback(self, callFunc):
+        pass
+
+    def removeStateCallback(self, callFunc, doRaise=True):
+        pass
+
+    def close(self):
+        self.isReady = False
+
+    def write(self, data):
+        if not self.isReady:
+            raise RuntimeError("not connected")
+        self.transport.write(str(data))
+
+    def writeLine(self, data):
+        self.write(data + "\r\n")
+
+def oldWriteToUsers(actor, msgCode, msgStr, cmd=None, userID=None, cmdID=None):
+    """The original fan-out loop, for comparison
+    """
+    userID, cmdID = actor.getUserCmdID(msgCode=msgCode, cmd=cmd, userID=userID, cmdID=cmdID)
+    fullMsgStr = actor.formatUserOutput(msgCode, msgStr, userID=userID, cmdID=cmdID)
+    for sock in actor.userDict.itervalues():
+        sock.writeLine(fullMsgStr)
+
+def setNumUsers(actor, numUsers):
+    """Replace all users with numUsers new simulated users
+
+    Existing users are disconnected the way the actor sees a socket close,
+    so their user IDs are reused and no per-user state is left behind.
+    """
+    for sock in actor.userDict.values():
+        sock.close()
+        actor.userSocketClosing(sock)
+    for i in range(numUsers):
+        actor.newUser(FakeSocket())
+
+def timeWrites(writeFunc, actor):
+    startTime = time.time()
+    for i in xrange(NumMsgs):
+        writeFunc("i", MsgStr)
+    return NumMsgs / (time.time() - startTime)
+
+def main():
+    actor = BaseActor(userPort=0, name="benchActor")
+    try:
+        print("%8s %22s %22s" % ("numUsers", "writeToUsers msgs/sec", "per-socket writeLine"))
+        for numUsers in NumUsersList:
+            setNumUsers(actor, numUsers)
+            newRate = timeWrites(actor.writeToUsers, actor)
+            oldRate = timeWrites(lambda msgCode, msgStr: oldWriteToUsers(actor, msgCode, msgStr), actor)
+            print("%8d %22.0f %22.0f" % (numUsers, newRate, oldRate))
+    finally:
+        actor.close()
+
+if __name__ == "__main__":
+    main()
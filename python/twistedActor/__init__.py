@@ -1,10 +1,17 @@
 from .command import *
 from .commandQueue import *
+from .commandRegistry import *
+from .cmdTrace import *
+from .cmdStats import *
 from .device import *
 from .deviceSet import *
+from .userOutput import *
+from .userIDAllocator import *
 from .baseActor import *
 from .actor import *
 from .log import *
+from .logSearch import *
+from .timerWheel import *
 from .baseWrapper import *
 from .deviceWrapper import *
 from .dispatcherWrapper import *
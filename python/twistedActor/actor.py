@@ -9,10 +9,11 @@ import traceback
 from RO.StringUtil import quoteStr, strFromException
 
 from .baseActor import BaseActor
+from .cmdStats import startCmdStats
 from .linkCommands import LinkCommands
 from .command import CommandError, UserCmd
 from .device import DeviceCollection
-from .log import log
+from .log import log, RingBufferLogger
 
 __all__ = ["Actor"]
 
@@ -62,6 +63,8 @@ class Actor(BaseActor):
         @param[in] commandSet a twistedActor.parse.CommandSet instance, defines the command set and provides means for parsing
         """
         self.commandSet = commandSet
+        # collect command statistics; see cmd_stats
+        startCmdStats()
         # local command dictionary containing cmd verb: method
         # all methods whose name starts with cmd_ are added
         # each such method must accept one argument: a UserCmd
@@ -109,6 +112,8 @@ class Actor(BaseActor):
             version = version,
             name = name,
         )
+        for dev in devs:
+            dev.cmdRegistry = self.cmdRegistry
 
         # connect all devices
         if doConnect:
@@ -117,7 +122,7 @@ class Actor(BaseActor):
     def close(self):
         """!Close the connection and cancel any timers
         """
-        log.info("%s.close()" % (self,))
+        log.info("%s.close()", self)
         for dev in self.dev:
             if not dev.isDisconnecting:
                 dev.disconnect()
@@ -190,15 +195,7 @@ class Actor(BaseActor):
         if self.commandSet is not None:
             cmd.parsedCommand = self.commandSet.parse(cmd.cmdBody)
 
-        cmd.cmdVerb = ""
-        cmd.cmdArgs = ""
-        if cmd.cmdBody:
-            res = cmd.cmdBody.split(None, 1)
-            if len(res) > 1:
-                cmd.cmdVerb, cmd.cmdArgs = res
-            else:
-                cmd.cmdVerb = res[0]
-            cmd.cmdVerb = cmd.cmdVerb.lower()
+        cmd.setVerbArgs()
 
         # see if command is a local command
         cmdFunc = self.locCmdDict.get(cmd.cmdVerb)
@@ -350,6 +347,7 @@ class Actor(BaseActor):
     def cmd_exit(self, cmd=None):
         """!disconnect yourself"""
         sock = self.userDict[cmd.userID]
+        self.userOutputDict[cmd.userID].flush()
         sock.close()
 
     def cmd_help(self, cmd=None):
@@ -398,14 +396,60 @@ class Actor(BaseActor):
         """!verify that actor is alive"""
         cmd.setState("done", textMsg="alive")
 
+    def cmd_subscribe(self, cmd):
+        """!keyword1 [keyword2 [...]]: only receive broadcast output containing these keywords
+        (plus all replies to your own commands); with no arguments show your subscriptions
+        """
+        keywordList = cmd.cmdArgs.replace(",", " ").split()
+        if keywordList:
+            self.subscribeUser(cmd.userID, keywordList)
+        self.showSubscriptions(cmd)
+
+    def cmd_unsubscribe(self, cmd):
+        """![keyword1 [keyword2 [...]]]: unsubscribe from the specified keywords (all if none specified);
+        with no subscriptions you receive all output
+        """
+        keywordList = cmd.cmdArgs.replace(",", " ").split()
+        self.unsubscribeUser(cmd.userID, keywordList or None)
+        self.showSubscriptions(cmd)
+
+    def showSubscriptions(self, cmd):
+        """!Show the keywords to which the commanding user is subscribed
+
+        @param[in] cmd  user command (twistedActor.UserCmd)
+        """
+        keywordList = self.getUserSubscriptions(cmd.userID)
+        self.writeToOneUser("i", "Subscriptions=%s" % (", ".join(quoteStr(kw) for kw in keywordList),), cmd=cmd)
+
     def cmd_status(self, cmd):
         """!show status
 
         Actors may wish to override this method to output additional status.
         """
         self.showUserInfo(cmd=cmd)
+        self.showUserOutputInfo(cmd=cmd)
         self.showDevConnStatus(cmd=cmd)
 
+    def cmd_stats(self, cmd):
+        """![reset]: show command statistics: counts, and latency percentiles (msec) by command verb and device;
+        if "reset" is specified then reset the statistics after showing them
+        """
+        arg = cmd.cmdArgs.strip().lower()
+        if arg not in ("", "reset"):
+            raise CommandError("Unrecognized argument %r; must be 'reset' or omitted" % (cmd.cmdArgs,))
+        cmdStats = startCmdStats()
+        self.writeToOneUser("i", "statsInterval=%0.1f; cmdStats=%s" % \
+            (cmdStats.getTime() - cmdStats.startTime, _formatCmdCounts(cmdStats.getTotals())), cmd=cmd)
+        for cmdVerb, cmdCounts in sorted(cmdStats.verbDict.iteritems()):
+            self.writeToOneUser("i", "verbStats=%s, %s" % (quoteStr(cmdVerb), _formatCmdCounts(cmdCounts)), cmd=cmd)
+        for devName, cmdCounts in sorted(cmdStats.devDict.iteritems()):
+            self.writeToOneUser("i", "devStats=%s, %s" % (quoteStr(devName), _formatCmdCounts(cmdCounts)), cmd=cmd)
+        for cmdVerb, queueWait in sorted(cmdStats.queueWaitDict.iteritems()):
+            self.writeToOneUser("i", "queueWaitStats=%s, %d, %s" % \
+                (quoteStr(cmdVerb), queueWait.count, _formatPercentiles(queueWait)), cmd=cmd)
+        if arg == "reset":
+            cmdStats.reset()
+
     def cmd_debugMsgs(self, cmd):
         """!on/off: turn debugging messages on or off"""
         arg = cmd.cmdArgs.lower()
@@ -417,6 +461,24 @@ class Actor(BaseActor):
             raise RuntimeError("Unrecognized argument %r; must be 'on' or 'off'" % (cmd.cmdArgs,))
         self.writeToUsers("i", 'Text="Debugging messages %s"' % (arg,), cmd=cmd)
 
+    def cmd_debugDumpLog(self, cmd):
+        """!output recent log messages to you
+        (requires ring buffer logging; see startRingBufferLogging)
+        """
+        logger = log.logger
+        if not isinstance(logger, RingBufferLogger):
+            raise CommandError("Cannot dump the log: logger %s is not a ring buffer" % (logger,))
+        for line in logger.formatRecords():
+            self.writeToOneUser("i", "logRecord=%s" % (quoteStr(line),), cmd=cmd)
+
+    def cmd_debugCmdTree(self, cmd):
+        """!show all commands in progress, with sub-commands indented below the command they belong to
+        """
+        cmdTree = self.cmdRegistry.getCmdTree()
+        for depth, treeCmd in cmdTree:
+            self.writeToOneUser("i", "cmdTree=%d, %s" % (depth, quoteStr(str(treeCmd))), cmd=cmd)
+        self.writeToOneUser("i", "numCmds=%d" % (len(cmdTree),), cmd=cmd)
+
     def cmd_debugRefCounts(self, cmd):
         """!print the reference count for each object"""
         d = {}
@@ -432,3 +494,17 @@ class Actor(BaseActor):
 
         for c, n in pairs[:100]:
             self.writeToOneUser("i", "refCount=%5d, %s" % (n, c.__name__), cmd=cmd)
+
+
+def _formatPercentiles(latency):
+    """!Format p50, p95, p99 and maximum of a LatencyHistogram (msec)
+    """
+    return ", ".join("%0.3f" % (val * 1000,) for val in
+        (latency.getPercentile(50), latency.getPercentile(95), latency.getPercentile(99), latency.max))
+
+def _formatCmdCounts(cmdCounts):
+    """!Format a cmdStats.CmdCounts as: numStarted, numDone, numFailed, numCancelled, numTimedOut,
+    followed by latency p50, p95, p99 and maximum (msec)
+    """
+    return "%d, %d, %d, %d, %d, %s" % (cmdCounts.numStarted, cmdCounts.numDone, cmdCounts.numFailed,
+        cmdCounts.numCancelled, cmdCounts.numTimedOut, _formatPercentiles(cmdCounts.latency))
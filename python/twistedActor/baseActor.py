@@ -5,10 +5,14 @@ import sys
 import socket
 
 import RO.Comm.TwistedSocket
+from RO.Comm.TwistedTimer import Timer
 from RO.StringUtil import quoteStr, strFromException
 
 from .command import UserCmd
+from .commandRegistry import CommandRegistry
 from .log import log
+from .userIDAllocator import UserIDAllocator
+from .userOutput import KeywordCoalescer, UserOutput, splitKeywords
 
 from . import hub
 
@@ -59,6 +63,9 @@ class BaseActor(object):
 
     Subclass this and define parseAndDispatchCmd to parse and dispatch commands.
     """
+    # message codes for the final message of a command
+    _DoneMsgCodes = frozenset(UserCmd._MsgCodeDict[state] for state in UserCmd.DoneStates)
+
     def __init__(self,
         userPort,
         maxUsers = 0,
@@ -83,8 +90,35 @@ class BaseActor(object):
 
         self.hub = None
 
+        # commands in progress (commands from users and commands sent to devices)
+        self.cmdRegistry = CommandRegistry()
+
         # entries are: userID, socket
         self.userDict = dict()
+        # allocates the lowest free userID for each new user
+        self._userIDAllocator = UserIDAllocator()
+        # entries are: userID, UserOutput
+        self.userOutputDict = dict()
+
+        # output batching; see setOutputBatching
+        self._doBatchOutput = False
+        self._maxBatchDelay = 0.
+        self._maxBatchBytes = 0
+        self._flushTimer = Timer()
+
+        # limit on output queued for slow users; see setUserQueueLimit
+        self._maxQueuedLines = 5000
+        self._queuePolicy = UserOutput.DropInfo
+
+        # coalescing of status keywords; see setKeywordCoalescing
+        self._coalesceWindow = 0.
+        self._keywordCoalescer = KeywordCoalescer()
+        self._coalesceTimer = Timer()
+
+        # keyword subscriptions; see subscribeUser
+        self._userKeywordDict = dict() # dict of userID: set of lowercase keyword names, for users that filter output
+        self._keywordUserDict = dict() # dict of lowercase keyword name: set of userIDs subscribed to it
+        self._unsubscribedUserIDSet = set() # IDs of connected users with no subscriptions (they receive all output)
 
         if userPort != 0 and not isAvailable(userPort):
             raise RuntimeError("Port %s is already in use" % (userPort,))
@@ -97,11 +131,14 @@ class BaseActor(object):
     def _cancelTimers(self):
         """!Cancel all timers
         """
-        pass
+        self._flushTimer.cancel()
+        self._coalesceTimer.cancel()
 
     def close(self):
         """!Close the connection and cancel any timers
         """
+        self.flushKeywords()
+        self.flushOutput()
         self.server.close()
         self._cancelTimers()
 
@@ -110,7 +147,7 @@ class BaseActor(object):
         """
         if not cmd.isDone:
             return
-        log.info("%s %s" % (self, cmd))
+        log.info("%s %s", self, cmd)
         msgCode, msgStr = cmd.getKeyValMsg()
         self.writeToUsers(msgCode, msgStr, cmd=cmd)
 
@@ -154,7 +191,7 @@ class BaseActor(object):
         - direct device access commands (device name)
         """
         cmdStr = sock.readLine()
-        log.info("%s.newCmd(%r)" % (self, cmdStr))
+        log.info("%s.newCmd(%r)", self, cmdStr)
         # print("%s.newCmd; cmdStr=%r" % (self, cmdStr,))
         if not cmdStr:
             return
@@ -167,6 +204,7 @@ class BaseActor(object):
         try:
             cmd = expandCommand(cmd) # gives write to users
             cmd.userCommanded = True # this command was generated from a socket read.
+            self.cmdRegistry.add(cmd)
             self.parseAndDispatchCmd(cmd)
         except Exception as e:
             cmd.setState(cmd.Failed, "Command %r failed: %s" % (cmd.cmdBody, strFromException(e)))
@@ -179,14 +217,23 @@ class BaseActor(object):
             sock.close()
             return
 
-        currIDs = set(self.userDict.keys())
-        userID = 1
-        while userID in currIDs:
-            userID += 1
+        userID = self._userIDAllocator.allocate()
         # add userID as an attribute that is likely to be unique
         setSocketUserID(sock, userID)
 
         self.userDict[userID] = sock
+        userOutput = UserOutput(
+            sock = sock,
+            doBatch = self._doBatchOutput,
+            maxLines = self._maxQueuedLines,
+            policy = self._queuePolicy,
+        )
+        self.userOutputDict[userID] = userOutput
+        self._unsubscribedUserIDSet.add(userID)
+        # ask the transport to tell userOutput when its buffer is full, so output to a slow user is bounded
+        transport = getSocketTransport(sock)
+        if transport is not None:
+            transport.registerProducer(userOutput, True)
         sock.setReadCallback(self.newCmd)
         sock.addStateCallback(self.userSocketClosing)
 
@@ -209,12 +256,103 @@ class BaseActor(object):
         """
         raise NotImplementedError()
 
+    def setOutputBatching(self, doBatch, maxDelay=0, maxBytes=16384):
+        """!Enable or disable batching of output to users
+
+        When batching is enabled, lines for each user are collected and written using a single
+        socket write, which greatly reduces the number of system calls during bursts of output
+        (e.g. help or status). Pending output is written when the first of the following occurs:
+        - maxDelay seconds have elapsed since the first line was queued
+            (0, the default, means on the next iteration of the reactor)
+        - a user has more than maxBytes of pending output (only that user's output is written)
+        - flushOutput is called
+        Message order is always preserved.
+
+        @param[in] doBatch  if True then batch output, else write each line immediately
+            (disabling batching writes any pending output)
+        @param[in] maxDelay  maximum time to hold output (sec)
+        @param[in] maxBytes  maximum number of bytes to hold for one user
+
+        @throw RuntimeError if maxDelay < 0 or maxBytes <= 0
+        """
+        if maxDelay < 0:
+            raise RuntimeError("maxDelay=%r must be >= 0" % (maxDelay,))
+        if maxBytes <= 0:
+            raise RuntimeError("maxBytes=%r must be > 0" % (maxBytes,))
+        self._doBatchOutput = bool(doBatch)
+        self._maxBatchDelay = float(maxDelay)
+        self._maxBatchBytes = int(maxBytes)
+        for userOutput in self.userOutputDict.itervalues():
+            userOutput.setBatch(self._doBatchOutput)
+        if not self._doBatchOutput:
+            self._flushTimer.cancel()
+
+    def setUserQueueLimit(self, maxLines, policy=UserOutput.DropInfo):
+        """!Set the maximum number of lines of output queued for any one user, and what to do when exceeded
+
+        Output is queued for a user when that user is not reading it fast enough
+        (the socket's transport has asked us to stop writing) and while batching output.
+        See UserOutput for details.
+
+        @param[in] maxLines  maximum number of lines to hold before applying the overflow policy
+        @param[in] policy  overflow policy: one of UserOutput.DropInfo, UserOutput.Collapse or UserOutput.Disconnect
+
+        @throw RuntimeError if maxLines < 1 or policy is not recognized
+        """
+        for userOutput in self.userOutputDict.itervalues():
+            userOutput.setQueueLimit(maxLines=maxLines, policy=policy)
+        # set these last because setQueueLimit checks the arguments
+        self._maxQueuedLines = int(maxLines)
+        self._queuePolicy = policy
+
+    def setKeywordCoalescing(self, window, ignoreKeywords=("text", "UserInfo")):
+        """!Enable or disable coalescing of status keywords
+
+        When enabled, informational messages that are not associated with a command
+        (userID and cmdID both 0) are held for up to window seconds, and only the newest value
+        of each keyword is output. This greatly reduces output from actors whose devices
+        report status many times per second.
+
+        All other messages are output immediately. Before a command's final message is output,
+        any held keywords are output, so users see the latest status before the command finishes.
+
+        @param[in] window  maximum time to hold a keyword (sec); 0 to disable coalescing
+            (disabling coalescing outputs any held keywords)
+        @param[in] ignoreKeywords  names of keywords that must not be coalesced (case is ignored);
+            messages containing any of these are output immediately
+
+        @throw RuntimeError if window < 0
+        """
+        if window < 0:
+            raise RuntimeError("window=%r must be >= 0" % (window,))
+        self.flushKeywords()
+        self._coalesceWindow = float(window)
+        self._keywordCoalescer = KeywordCoalescer(ignoreKeywords=ignoreKeywords)
+
+    def flushKeywords(self):
+        """!Output the newest value of all held status keywords (a no-op unless coalescing is enabled)
+        """
+        self._coalesceTimer.cancel()
+        msgStr = self._keywordCoalescer.pop()
+        if msgStr:
+            self._basicWriteToUsers("i", msgStr, userID=0, cmdID=0)
+
+    def flushOutput(self):
+        """!Write all pending output to users (a no-op unless output batching is enabled)
+        """
+        self._flushTimer.cancel()
+        for userID, userOutput in self.userOutputDict.items():
+            try:
+                userOutput.flush()
+            except Exception as e:
+                sys.stderr.write("Warning: could not write output to user %s: %s\n" % (userID, strFromException(e)))
+
     def serverStateCallback(self, sock):
         """!Server socket state callback
         """
         if self.server.isReady:
             print("%s listening on port %s" % (self, self.server.port))
-        log.info("%s.server.state=%s" % (self, self.server.state))
+        log.info("%s.server.state=%s", self, self.server.state)
 
     def showUserInfo(self, cmd):
         """!Show user information including your userID.
@@ -239,6 +377,68 @@ class BaseActor(object):
             msgStr = "UserInfo=%s, %s" % (userId, sock.host)
             self.writeToUsers("i", msgStr, cmd=cmd)
 
+    def subscribeUser(self, userID, keywords):
+        """!Subscribe a user to keywords, so the user only receives broadcast output that contains them
+
+        A user with no subscriptions receives all output (the default). Once a user subscribes to
+        one or more keywords, writeToUsers only sends that user messages that contain at least one
+        of those keywords, plus all messages associated with that user's own commands.
+        Output sent with writeToOneUser is not filtered.
+
+        @param[in] userID  ID of user
+        @param[in] keywords  collection of keyword names (case is ignored)
+        """
+        keywordSet = self._userKeywordDict.setdefault(userID, set())
+        for keyword in keywords:
+            lowKeyword = keyword.lower()
+            keywordSet.add(lowKeyword)
+            self._keywordUserDict.setdefault(lowKeyword, set()).add(userID)
+        if keywordSet:
+            self._unsubscribedUserIDSet.discard(userID)
+        else:
+            del self._userKeywordDict[userID]
+
+    def unsubscribeUser(self, userID, keywords=None):
+        """!Unsubscribe a user from keywords
+
+        @param[in] userID  ID of user
+        @param[in] keywords  collection of keyword names (case is ignored);
+            if None then remove all of the user's subscriptions.
+            If the user is left with no subscriptions then the user receives all output again.
+        """
+        keywordSet = self._userKeywordDict.get(userID)
+        if not keywordSet:
+            return
+        if keywords is None:
+            lowKeywordSet = set(keywordSet)
+        else:
+            lowKeywordSet = set(keyword.lower() for keyword in keywords) & keywordSet
+        for lowKeyword in lowKeywordSet:
+            keywordSet.discard(lowKeyword)
+            userIDSet = self._keywordUserDict[lowKeyword]
+            userIDSet.discard(userID)
+            if not userIDSet:
+                del self._keywordUserDict[lowKeyword]
+        if not keywordSet:
+            del self._userKeywordDict[userID]
+            if userID in self.userOutputDict:
+                self._unsubscribedUserIDSet.add(userID)
+
+    def getUserSubscriptions(self, userID):
+        """!Return a sorted list of the (lowercase) keyword names to which a user is subscribed
+
+        An empty list means the user receives all output.
+        """
+        return sorted(self._userKeywordDict.get(userID, ()))
+
+    def showUserOutputInfo(self, cmd=None):
+        """!Show the number of lines of output discarded for each user that is not keeping up (if any)
+        """
+        for userID, userOutput in sorted(self.userOutputDict.iteritems()):
+            if userOutput.numDropped:
+                msgStr = "UserOutputDropped=%s, %s" % (userID, userOutput.numDropped)
+                self.writeToUsers("w", msgStr, cmd=cmd)
+
     def userSocketClosing(self, sock):
         """!Called when a user socket is closing
 
@@ -253,9 +453,15 @@ class BaseActor(object):
 
         try:
             del self.userDict[getSocketUserID(sock)]
+            self._userIDAllocator.release(getSocketUserID(sock))
         except KeyError:
             sys.stderr.write("Warning: user socket closed but could not find user %s in userDict\n" %
                 (getSocketUserID(sock),))
+        userOutput = self.userOutputDict.pop(getSocketUserID(sock), None)
+        if userOutput is not None:
+            userOutput.clear()
+        self.unsubscribeUser(getSocketUserID(sock))
+        self._unsubscribedUserIDSet.discard(getSocketUserID(sock))
         sock.removeStateCallback(self.userSocketClosing, doRaise=False) # I'm done with this socket; I don't want to know when it is fully closed
         self.showUserList(cmd=UserCmd(userID=0))
 
@@ -283,11 +489,46 @@ class BaseActor(object):
         which can simplify code. (It is a serious bug to send multiple done messages for any command.)
         """
         userID, cmdID = self.getUserCmdID(msgCode=msgCode, cmd=cmd, userID=userID, cmdID=cmdID)
+        if self._coalesceWindow:
+            if msgCode == "i" and userID == 0 and cmdID == 0:
+                if self._keywordCoalescer.add(msgStr):
+                    if not self._coalesceTimer.isActive:
+                        self._coalesceTimer.start(self._coalesceWindow, self.flushKeywords)
+                    return
+            elif msgCode in self._DoneMsgCodes:
+                self.flushKeywords()
+        self._basicWriteToUsers(msgCode, msgStr, userID=userID, cmdID=cmdID)
+
+    def _basicWriteToUsers(self, msgCode, msgStr, userID, cmdID):
+        """!Write a message to all users, without coalescing
+
+        @param[in] msgCode  message code (e.g. "i")
+        @param[in] msgStr  message to write, in keyword=value format, and without a header
+        @param[in] userID  user ID
+        @param[in] cmdID  command ID
+        """
         fullMsgStr = self.formatUserOutput(msgCode, msgStr, userID=userID, cmdID=cmdID)
         # print("writeToUsers(%s)" % (fullMsgStr,))
-        log.info("%s.writeToUsers(%r)" % (self, fullMsgStr))
-        for sock in self.userDict.itervalues():
-            sock.writeLine(fullMsgStr)
+        log.info("%s.writeToUsers(%r)", self, fullMsgStr)
+        if self._userKeywordDict:
+            userOutputList = self._getSubscribedUserOutputs(msgStr, userID=userID)
+        else:
+            # a snapshot, in case writing to a user changes the set of users
+            userOutputList = self.userOutputDict.values()
+        # terminate the line once; the resulting buffer is shared by all users
+        self._writeLine(fullMsgStr + "\r\n", userOutputList)
+
+    def _getSubscribedUserOutputs(self, msgStr, userID):
+        """!Return a list of UserOutput for the users that should receive a message, given their subscriptions
+
+        @param[in] msgStr  message, in keyword=value format, and without a header
+        @param[in] userID  user ID of message; that user always receives the message
+        """
+        subscribedIDSet = set([userID])
+        for keyword, keyValStr in splitKeywords(msgStr):
+            subscribedIDSet.update(self._keywordUserDict.get(keyword.lower(), ()))
+        return [self.userOutputDict[uid] for uid in self._unsubscribedUserIDSet.union(subscribedIDSet)
+            if uid in self.userOutputDict]
 
     def writeToOneUser(self, msgCode, msgStr, cmd=None, userID=None, cmdID=None):
         """!Write a message to one user.
@@ -307,11 +548,23 @@ class BaseActor(object):
         if userID == 0:
             raise RuntimeError("writeToOneUser(msgCode=%r; msgStr=%r; cmd=%r; userID=%r; cmdID=%r) cannot write to user 0" % \
                 (msgCode, msgStr, cmd, userID, cmdID))
-        sock = self.userDict[userID]
+        userOutput = self.userOutputDict[userID]
         fullMsgStr = self.formatUserOutput(msgCode, msgStr, userID=userID, cmdID=cmdID)
         # print("writeToOneUser(%s)" % (fullMsgStr,))
-        log.info("%s.writeToOneUser(%r); userID=%s" % (self, fullMsgStr, userID))
-        sock.writeLine(fullMsgStr)
+        log.info("%s.writeToOneUser(%r); userID=%s", self, fullMsgStr, userID)
+        self._writeLine(fullMsgStr + "\r\n", (userOutput,))
+
+    def _writeLine(self, lineBuf, userOutputList):
+        """!Write one line of output to a collection of users
+
+        @param[in] lineBuf  line of output, including the line terminator
+        @param[in] userOutputList  collection of UserOutput
+        """
+        for userOutput in userOutputList:
+            if userOutput.writeLine(lineBuf) > self._maxBatchBytes:
+                userOutput.flush()
+        if self._doBatchOutput and not self._flushTimer.isActive:
+            self._flushTimer.start(self._maxBatchDelay, self.flushOutput)
 
     @classmethod
     def writeToStdOut(cls, msgCode, msgStr, cmd=None, userID=None, cmdID=None):
@@ -349,6 +602,12 @@ class BaseActor(object):
         self.hub = hub.HubConnection(host, **kwargs)
 
 
+def getSocketTransport(sock):
+    """!Get the twisted transport of a socket, or None if not connected
+    """
+    protocol = getattr(sock, "_protocol", None)
+    return getattr(protocol, "transport", None)
+
 def getSocketUserID(sock):
     """!Get a user ID from a socket
     """
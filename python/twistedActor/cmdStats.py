@@ -0,0 +1,258 @@
+from __future__ import absolute_import, division, print_function
+"""!Command statistics: counters and latency histograms per command verb and per device
+
+Statistics are collected while a CmdStats is installed by startCmdStats (Actor does this when constructed).
+Recording is cheap enough to leave on: a few dict lookups and a histogram increment per command.
+
+Commands are counted if they are user commands with a command verb (as set by Actor and CommandQueue)
+or device commands (commands with a dev attribute, as created by Device.startCmd);
+other commands (e.g. sub-commands used to link commands together) are ignored.
+"""
+import math
+import time
+
+from .command import BaseCmd
+
+__all__ = ["LatencyHistogram", "CmdCounts", "CmdStats", "startCmdStats", "stopCmdStats"]
+
+_frexp = math.frexp
+_time = time.time
+
+class LatencyHistogram(object):
+    """!A histogram of durations with buckets whose width is proportional to their value (as in HDR histograms)
+
+    Durations from 1 microsecond to several days are recorded with a relative error of at most 1/NumSubBuckets,
+    using a fixed amount of memory.
+    """
+    NumSubBuckets = 32 # number of buckets per power of 2
+    _MaxExp = 40 # 2^40 microseconds is about 12 days; longer durations are recorded in the last bucket
+    _NumBuckets = _MaxExp * NumSubBuckets
+    _TwiceNumSubBuckets = 2 * NumSubBuckets
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """!Discard all recorded durations
+        """
+        self.count = 0
+        self.sum = 0.
+        self.max = 0.
+        self._countList = [0] * self._NumBuckets
+
+    def record(self, duration):
+        """!Record a duration
+
+        @param[in] duration  duration (sec); negative values are treated as 0
+        """
+        mantissa, exp = _frexp(duration * 1e6)
+        if exp < 1 or duration < 0:
+            ind = 0
+            if duration < 0:
+                duration = 0.
+        elif exp > self._MaxExp:
+            ind = self._NumBuckets - 1
+        else:
+            ind = (exp - 1) * self.NumSubBuckets + int((mantissa - 0.5) * self._TwiceNumSubBuckets)
+        self._countList[ind] += 1
+        self.count += 1
+        self.sum += duration
+        if duration > self.max:
+            self.max = duration
+
+    def add(self, hist):
+        """!Add the durations recorded by another LatencyHistogram to this one
+        """
+        self._countList = [a + b for a, b in zip(self._countList, hist._countList)]
+        self.count += hist.count
+        self.sum += hist.sum
+        self.max = max(self.max, hist.max)
+
+    @property
+    def mean(self):
+        """!Mean duration (sec), or 0 if no durations have been recorded
+        """
+        return self.sum / self.count if self.count else 0.
+
+    def getPercentile(self, percent):
+        """!Return the duration (sec) below which the specified percentage of recorded durations fall
+
+        The result is the upper edge of the bucket containing that duration (but no more than the maximum),
+        so it may be larger than the true value by up to 1/NumSubBuckets of the value.
+
+        @param[in] percent  percentage, in the range [0, 100]
+        @return the duration (sec), or 0 if no durations have been recorded
+        """
+        if not self.count:
+            return 0.
+        threshold = max(1, int(math.ceil(self.count * percent / 100.)))
+        total = 0
+        for ind, count in enumerate(self._countList):
+            total += count
+            if total >= threshold:
+                break
+        if ind == self._NumBuckets - 1:
+            # the last bucket has no upper edge
+            return self.max
+        exp, subInd = divmod(ind, self.NumSubBuckets)
+        upperEdge = (0.5 + (subInd + 1) / (2 * self.NumSubBuckets)) * 2**(exp + 1) * 1e-6
+        return min(upperEdge, self.max)
+
+    def __repr__(self):
+        return "%s(count=%s, mean=%0.6f, max=%0.6f)" % (type(self).__name__, self.count, self.mean, self.max)
+
+
+class CmdCounts(object):
+    """!Counters and a latency histogram for one category of commands (e.g. one command verb)
+    """
+    __slots__ = ("numStarted", "numDone", "numFailed", "numCancelled", "numTimedOut", "latency")
+
+    def __init__(self):
+        self.numStarted = 0 # number of commands that have left the ready state
+        self.numDone = 0 # number of commands that finished successfully
+        self.numFailed = 0 # number of commands that failed (including those that timed out)
+        self.numCancelled = 0 # number of commands that were cancelled
+        self.numTimedOut = 0 # number of commands that timed out
+        self.latency = LatencyHistogram() # time from creation to finishing (sec)
+
+    def add(self, cmdCounts):
+        """!Add the counts and latencies of another CmdCounts to this one
+        """
+        self.numStarted += cmdCounts.numStarted
+        self.numDone += cmdCounts.numDone
+        self.numFailed += cmdCounts.numFailed
+        self.numCancelled += cmdCounts.numCancelled
+        self.numTimedOut += cmdCounts.numTimedOut
+        self.latency.add(cmdCounts.latency)
+
+    def __repr__(self):
+        return "%s(numStarted=%s, numDone=%s, numFailed=%s, numCancelled=%s, numTimedOut=%s)" % \
+            (type(self).__name__, self.numStarted, self.numDone, self.numFailed, self.numCancelled, self.numTimedOut)
+
+
+class CmdStats(object):
+    """!Collect command statistics
+
+    Usually created by startCmdStats, which installs it so that all commands are counted.
+
+    Attributes:
+    - verbDict: dict of command verb: CmdCounts, for user commands
+    - devDict: dict of device name: CmdCounts, for device commands
+    - queueWaitDict: dict of command verb: LatencyHistogram of time spent waiting on a CommandQueue (sec)
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """!Discard all statistics
+        """
+        self.startTime = time.time()
+        self.verbDict = dict()
+        self.devDict = dict()
+        self.queueWaitDict = dict()
+        self._isDevCmdDict = dict() # dict of command class: True if a device command class
+
+    def getTotals(self):
+        """!Return the combined counts for all user commands (a CmdCounts)
+        """
+        totals = CmdCounts()
+        for cmdCounts in self.verbDict.itervalues():
+            totals.add(cmdCounts)
+        return totals
+
+    @staticmethod
+    def getTime():
+        """!Return the current time (sec); commands record their creation time using this
+        """
+        return _time()
+
+    def stateChanged(self, cmd, oldStateBit):
+        """!A command changed state; called by BaseCmd.setState
+
+        @param[in] cmd  the command
+        @param[in] oldStateBit  integer code for the previous state (see BaseCmd._StateBitDict)
+        """
+        # this is called for every state change, so it uses BaseCmd internals for speed
+        isStarting = oldStateBit == cmd._ReadyBit
+        isDone = cmd._stateBit & cmd._DoneMask
+        if not (isStarting or isDone):
+            return
+        cmdCounts = self._getCmdCounts(cmd)
+        if cmdCounts is None:
+            return
+        if isStarting:
+            cmdCounts.numStarted += 1
+        if not isDone:
+            return
+        state = cmd._state
+        if state == cmd.Done:
+            cmdCounts.numDone += 1
+        elif state == cmd.Cancelled:
+            cmdCounts.numCancelled += 1
+        else:
+            cmdCounts.numFailed += 1
+        if cmd._startTime is not None:
+            cmdCounts.latency.record(_time() - cmd._startTime)
+
+    def cmdTimedOut(self, cmd):
+        """!A command timed out; called by BaseCmd just before it fails the command
+        """
+        cmdCounts = self._getCmdCounts(cmd)
+        if cmdCounts is None:
+            return
+        cmdCounts.numTimedOut += 1
+
+    def cmdDequeued(self, cmd):
+        """!A command has been taken off a CommandQueue to run; called by CommandQueue.runQueue
+        """
+        if cmd._startTime is None:
+            return
+        cmdVerb = getattr(cmd, "cmdVerb", "")
+        queueWait = self.queueWaitDict.get(cmdVerb)
+        if queueWait is None:
+            queueWait = self.queueWaitDict[cmdVerb] = LatencyHistogram()
+        queueWait.record(self.getTime() - cmd._startTime)
+
+    def _getCmdCounts(self, cmd):
+        """!Get the CmdCounts for a command, or None if the command is not counted
+        """
+        # look up the kind of command by class, to avoid the cost of failed attribute lookups
+        cmdClass = type(cmd)
+        isDevCmd = self._isDevCmdDict.get(cmdClass)
+        if isDevCmd is None:
+            isDevCmd = self._isDevCmdDict[cmdClass] = hasattr(cmdClass, "dev")
+        if isDevCmd and cmd.dev is not None:
+            key = getattr(cmd.dev, "name", None) or str(cmd.dev)
+            countsDict = self.devDict
+        else:
+            try:
+                key = cmd.cmdVerb
+            except AttributeError:
+                return None
+            countsDict = self.verbDict
+        cmdCounts = countsDict.get(key)
+        if cmdCounts is None:
+            cmdCounts = countsDict[key] = CmdCounts()
+        return cmdCounts
+
+    def __repr__(self):
+        return "%s(numVerbs=%s, numDevs=%s)" % (type(self).__name__, len(self.verbDict), len(self.devDict))
+
+
+def startCmdStats():
+    """!Start collecting command statistics, if not already doing so
+
+    @return the CmdStats in use
+    """
+    if BaseCmd._Stats is None:
+        BaseCmd._Stats = CmdStats()
+    return BaseCmd._Stats
+
+def stopCmdStats():
+    """!Stop collecting command statistics
+
+    @return the CmdStats that was in use, or None if statistics were not being collected
+    """
+    cmdStats = BaseCmd._Stats
+    BaseCmd._Stats = None
+    return cmdStats
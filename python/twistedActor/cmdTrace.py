@@ -0,0 +1,197 @@
+from __future__ import absolute_import, division, print_function
+"""!Trace the state transitions of commands, for finding out where slow commands spend their time
+
+Tracing is off by default; while it is off the cost is one test when a command is created,
+changes state or is linked to another command.
+Call startCmdTracing to start tracing and stopCmdTracing to stop it.
+
+Each command is traced as a span, which is recorded when the command finishes. A span contains the time of
+each state transition of the command (times never decrease, even if the system clock is set back)
+and the span of its parent command: the command that tracks it
+(see BaseCmd.trackCmd) or to which it is linked (see BaseCmd.linkCommands and LinkCommands).
+Thus a slow user command can be broken down into time waiting in a CommandQueue (ready -> running),
+device round trips (device commands) and linked sub-commands.
+
+Spans are formatted as Chrome trace events ("complete" events, "ph": "X"), one per line;
+a trace file written by CmdTracer can be loaded directly into chrome://tracing or https://ui.perfetto.dev.
+Each span's thread ID (tid) is the trace ID of its eldest parent, so the spans of related commands
+are shown together, nested by time.
+"""
+from collections import deque
+import json
+import os
+import time
+import weakref
+
+from .command import BaseCmd
+
+__all__ = ["CmdTracer", "startCmdTracing", "stopCmdTracing"]
+
+class _Span(object):
+    """!Information about one traced command
+    """
+    __slots__ = ("traceID", "startTime", "stateList", "parentSpan", "relation")
+
+    def __init__(self, traceID, startTime):
+        self.traceID = traceID
+        self.startTime = startTime
+        self.stateList = [] # list of (state, time)
+        self.parentSpan = None
+        self.relation = None
+
+    @property
+    def rootID(self):
+        """!Return the trace ID of the eldest parent span
+        """
+        span = self
+        while span.parentSpan is not None:
+            span = span.parentSpan
+        return span.traceID
+
+
+class CmdTracer(object):
+    """!Record a span for each command, in a ring buffer and (optionally) a trace file
+
+    Usually created by startCmdTracing, which installs it so that all commands are traced.
+    """
+    def __init__(self, numSpans=10000, filePath=None):
+        """!Construct a CmdTracer
+
+        @param[in] numSpans  number of finished spans to retain in memory (older spans are discarded)
+        @param[in] filePath  path of trace file; if None then spans are only kept in memory.
+            If the file exists it is overwritten.
+
+        @throw RuntimeError if numSpans < 1
+        """
+        if numSpans < 1:
+            raise RuntimeError("numSpans=%r must be >= 1" % (numSpans,))
+        self.numSpans = int(numSpans)
+        self.filePath = filePath
+        self.numRecorded = 0 # number of spans recorded
+        self._spanBuffer = deque(maxlen=self.numSpans)
+        self._openSpanDict = weakref.WeakKeyDictionary() # dict of cmd: _Span, for commands that are not done
+        self._nextTraceID = 1
+        self._lastTime = 0.
+        self._pid = os.getpid()
+        self._traceFile = None
+        self._eventSep = "" # separator to write before the next event in the trace file
+        if filePath is not None:
+            self._traceFile = open(filePath, "w")
+            # the closing "]" is optional in Chrome's JSON array format, so the file is valid while being written
+            self._traceFile.write("[")
+
+    def getTime(self):
+        """!Return the current time (sec); never less than the previous value returned
+        """
+        currTime = time.time()
+        if currTime < self._lastTime:
+            return self._lastTime
+        self._lastTime = currTime
+        return currTime
+
+    def cmdCreated(self, cmd):
+        """!Start the span of a new command
+        """
+        self._getSpan(cmd)
+
+    def stateChanged(self, cmd):
+        """!Record the new state of a command; if the command is done then record its span
+        """
+        span = self._getSpan(cmd)
+        span.stateList.append((cmd.state, self.getTime()))
+        if cmd.isDone:
+            self._openSpanDict.pop(cmd, None)
+            self._recordSpan(cmd, span)
+
+    def linkCmd(self, parentCmd, childCmd, relation):
+        """!Record that one command is the parent of another
+
+        @param[in] parentCmd  parent command
+        @param[in] childCmd  child command
+        @param[in] relation  how the commands are related, e.g. "track", "link" or "linkCommands"
+        """
+        childSpan = self._getSpan(childCmd)
+        childSpan.parentSpan = self._getSpan(parentCmd)
+        childSpan.relation = relation
+
+    def getSpans(self):
+        """!Return a list of the retained spans, oldest first, each a Chrome trace event (a dict)
+        """
+        return list(self._spanBuffer)
+
+    def close(self):
+        """!Close the trace file, if any
+        """
+        if self._traceFile is not None:
+            self._traceFile.write("\n]\n")
+            self._traceFile.close()
+            self._traceFile = None
+
+    def _getSpan(self, cmd):
+        """!Get the span for a command, starting one if necessary
+        """
+        span = self._openSpanDict.get(cmd)
+        if span is None:
+            span = _Span(traceID=self._nextTraceID, startTime=self.getTime())
+            self._nextTraceID += 1
+            if not cmd.isDone:
+                self._openSpanDict[cmd] = span
+        return span
+
+    def _recordSpan(self, cmd, span):
+        """!Format a finished span as a Chrome trace event and record it
+        """
+        startTime = span.startTime
+        endTime = span.stateList[-1][1]
+        event = dict(
+            name = cmd.cmdStr,
+            cat = type(cmd).__name__,
+            ph = "X",
+            ts = int(startTime * 1e6),
+            dur = int((endTime - startTime) * 1e6),
+            pid = self._pid,
+            tid = span.rootID,
+            args = dict(
+                traceID = span.traceID,
+                parentID = None if span.parentSpan is None else span.parentSpan.traceID,
+                relation = span.relation,
+                userID = cmd.userID,
+                cmdID = cmd.cmdID,
+                # time of each state transition, in msec since the command was created
+                states = [(state, round((stateTime - startTime) * 1e3, 3)) for state, stateTime in span.stateList],
+                textMsg = cmd.textMsg,
+            ),
+        )
+        self._spanBuffer.append(event)
+        self.numRecorded += 1
+        if self._traceFile is not None:
+            self._traceFile.write(self._eventSep + "\n" + json.dumps(event))
+            self._eventSep = ","
+
+    def __repr__(self):
+        return "%s(numSpans=%s, filePath=%r)" % (type(self).__name__, self.numSpans, self.filePath)
+
+
+def startCmdTracing(numSpans=10000, filePath=None):
+    """!Start tracing commands, replacing the current tracer (if any)
+
+    @param[in] numSpans  number of finished spans to retain in memory
+    @param[in] filePath  path of trace file; if None then spans are only kept in memory
+
+    @return the new tracer (a CmdTracer)
+    """
+    stopCmdTracing()
+    tracer = CmdTracer(numSpans=numSpans, filePath=filePath)
+    BaseCmd._Tracer = tracer
+    return tracer
+
+def stopCmdTracing():
+    """!Stop tracing commands and close the trace file (if any)
+
+    @return the tracer that was in use, or None if tracing was off
+    """
+    tracer = BaseCmd._Tracer
+    BaseCmd._Tracer = None
+    if tracer is not None:
+        tracer.close()
+    return tracer
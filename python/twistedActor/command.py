@@ -2,14 +2,15 @@ from __future__ import absolute_import, division, print_function
 """Command objects for the twisted actor
 """
 import re
+import string
 import sys
+import traceback
 
-import RO.AddCallback
 import RO.Alg
 from RO.StringUtil import quoteStr
-from RO.Comm.TwistedTimer import Timer
 
 from .log import log
+from .timerWheel import TimerWheel
 
 __all__ = ["CommandError", "BaseCmd", "DevCmd", "DevCmdVar", "UserCmd", "expandUserCmd"]
 
@@ -22,9 +23,55 @@ class CommandError(Exception):
     pass
 
 
-class BaseCmd(RO.AddCallback.BaseMixin):
+def _getStateMask(stateBitDict, states):
+    """Return the bit mask for a collection of command states
+    """
+    mask = 0
+    for state in states:
+        mask |= stateBitDict[state]
+    return mask
+
+def _getNextStateMaskDict(stateBitDict, readyBit, activeMask, doneMask):
+    """Return a dict of state bit: mask of the states to which a command in that state may change
+
+    A command that is ready may change to any state, an active command may change to any active or done state,
+    and a command that is done may not change state.
+    """
+    nextStateMaskDict = dict()
+    for stateBit in stateBitDict.itervalues():
+        if stateBit & doneMask:
+            nextStateMaskDict[stateBit] = 0
+        elif stateBit == readyBit:
+            nextStateMaskDict[stateBit] = readyBit | activeMask | doneMask
+        else:
+            nextStateMaskDict[stateBit] = activeMask | doneMask
+    return nextStateMaskDict
+
+
+class BaseCmd(object):
     """Base class for commands of all types (user and device).
+
+    Commands are often created in large numbers, so attributes are declared using __slots__,
+    and the callback list and the list of linked commands are only allocated if needed.
+    Attributes other than those declared may still be set; such attributes are stored
+    in an instance dict that is allocated when the first one is set.
+
+    Supports callback functions using the same API as RO.AddCallback.BaseMixin.
+
+    State is reported as a string (one of the state constants, e.g. Done), but is also kept
+    as an integer with one bit per state, so that state tests such as isDone and the check that
+    a state transition is allowed are simple bit operations.
     """
+    __slots__ = (
+        "_cmdStr", "userID", "cmdID", "_state", "_stateBit", "_textMsg", "_hubMsg", "_timeLim", "_timeoutTimer",
+        "_cmdToTrack", "_linkedCommands", "_linkedPendingSet", "_linkFailFast", "_parentCmd", "_eldestParentCmd",
+        "_writeToUsers", "userCommanded",
+        "_callbacks", "_enableCallbacks", "_startTime",
+        "_registry", # set by CommandRegistry
+        "cmdVerb", # set by CommandQueue and Actor
+        "isLinked", "mainCmd", # set by LinkCommands
+        "__dict__", "__weakref__",
+    )
     # state constants
     Done = "done"
     Cancelled = "cancelled" # including superseded
@@ -49,6 +96,22 @@ class BaseCmd(RO.AddCallback.BaseMixin):
         done = ":",
     )
     _InvMsgCodeDict = dict((val, key) for key, val in _MsgCodeDict.iteritems())
+
+    # integer state codes: one bit per state, so a set of states is a bit mask
+    _StateBitDict = dict((state, 1 << i) for i, state in enumerate(
+        (Ready, Running, Cancelling, Failing, Cancelled, Failed, Done)))
+    _ReadyBit = _StateBitDict[Ready]
+    _ActiveMask = _getStateMask(_StateBitDict, ActiveStates)
+    _FailedMask = _getStateMask(_StateBitDict, FailedStates)
+    _FailingMask = _getStateMask(_StateBitDict, FailingStates)
+    _DoneMask = _getStateMask(_StateBitDict, DoneStates)
+    _NextStateMaskDict = _getNextStateMaskDict(_StateBitDict, _ReadyBit, _ActiveMask, _DoneMask)
+    # time limits of all commands are handled by one timer wheel; see setTimeLimitResolution
+    _TimerWheel = TimerWheel(resolution=0.1)
+    # command tracer (a cmdTrace.CmdTracer), or None if not tracing; see cmdTrace.startCmdTracing
+    _Tracer = None
+    # command statistics (a cmdStats.CmdStats), or None if not collecting statistics; see cmdStats.startCmdStats
+    _Stats = None
     def __init__(self,
         cmdStr,
         userID = 0,
@@ -69,19 +132,31 @@ class BaseCmd(RO.AddCallback.BaseMixin):
         self.userID = int(userID)
         self.cmdID = int(cmdID)
         self._state = self.Ready
+        self._stateBit = self._ReadyBit
         self._textMsg = ""
         self._hubMsg = ""
         self._cmdToTrack = None
-        self._linkedCommands = []
+        self._linkedCommands = None # list of linked commands, if any
+        self._linkedPendingSet = None # set of linked commands that are not yet done, if any linked commands
+        self._linkFailFast = False # cancel linked commands as soon as one fails?
         self._parentCmd = None
+        self._eldestParentCmd = None # cached root of the tree of parent commands; None if no parent
         self._writeToUsers = None # set by baseActor.ExpandCommand
         # set by baseActor.newCmd to flag this as a command created
         # from socket input
         self.userCommanded = False
-        self._timeoutTimer = Timer()
+        self._timeoutTimer = None # a timerWheel.WheelTimer while the time limit is being enforced
+        self._registry = None # the commandRegistry.CommandRegistry containing this command, if any
         self.setTimeLimit(timeLim)
 
-        RO.AddCallback.BaseMixin.__init__(self, callFunc)
+        self._callbacks = None # callback function, tuple of callback functions, or None if none
+        self._enableCallbacks = True
+        if callFunc is not None:
+            self.addCallback(callFunc)
+        if self._Tracer is not None:
+            self._Tracer.cmdCreated(self)
+        # creation time, for command statistics (None if not collecting statistics)
+        self._startTime = None if self._Stats is None else self._Stats.getTime()
 
     @property
     def parentCmd(self):
@@ -89,10 +164,13 @@ class BaseCmd(RO.AddCallback.BaseMixin):
 
     @property
     def eldestParentCmd(self):
-        if self.parentCmd is None:
+        """The eldest parent command (self if this command has no parent)
+
+        This is cached when the parent is set, so it is not necessary to walk the chain of parents.
+        """
+        if self._eldestParentCmd is None:
             return self
-        else:
-            return self.parentCmd.eldestParentCmd
+        return self._eldestParentCmd
 
     @property
     def timeLim(self):
@@ -106,25 +184,25 @@ class BaseCmd(RO.AddCallback.BaseMixin):
     def didFail(self):
         """Command failed or was cancelled
         """
-        return self._state in self.FailedStates
+        return self._stateBit & self._FailedMask != 0
 
     @property
     def isActive(self):
         """Command is running, canceling or failing
         """
-        return self._state in self.ActiveStates
+        return self._stateBit & self._ActiveMask != 0
 
     @property
     def isDone(self):
         """Command is done (whether successfully or not)
         """
-        return self._state in self.DoneStates
+        return self._stateBit & self._DoneMask != 0
 
     @property
     def isFailing(self):
         """Command is being cancelled or is failing
         """
-        return self._state in self.FailingStates
+        return self._stateBit & self._FailingMask != 0
 
     @property
     def msgCode(self):
@@ -177,10 +255,105 @@ class BaseCmd(RO.AddCallback.BaseMixin):
             or callNow is True
         @param[in] callNow  if True, call callFunc immediately
         """
+        if callFunc is None:
+            return
         if self.isDone:
-            RO.AddCallback.safeCall2("%s.addCallback callFunc =" % (self,), callFunc, self)
-        else:
-            RO.AddCallback.BaseMixin.addCallback(self, callFunc, callNow=callNow)
+            self._safeCall("addCallback", callFunc, self)
+            return
+        if not callable(callFunc):
+            raise ValueError("callFunc %r is not callable" % (callFunc,))
+        callbacks = self._callbacks
+        if callbacks is None:
+            self._callbacks = callFunc
+        elif type(callbacks) is tuple:
+            if callFunc not in callbacks:
+                self._callbacks = callbacks + (callFunc,)
+        elif callFunc != callbacks:
+            self._callbacks = (callbacks, callFunc)
+        if callNow:
+            self._safeCall("callback", callFunc, self)
+
+    def removeCallback(self, callFunc, doRaise=True):
+        """Remove a callback function
+
+        @param[in] callFunc  callback function to remove
+        @param[in] doRaise  raise an exception if callFunc is not found?
+        @return True if successful, False if callFunc not found and doRaise False
+
+        @throw ValueError if callFunc is not found and doRaise True
+        """
+        callbacks = self._callbacks
+        if type(callbacks) is tuple:
+            if callFunc in callbacks:
+                ind = callbacks.index(callFunc)
+                callbacks = callbacks[0:ind] + callbacks[ind+1:]
+                self._callbacks = callbacks[0] if len(callbacks) == 1 else callbacks
+                return True
+        elif callbacks is not None and callFunc == callbacks:
+            self._callbacks = None
+            return True
+        if doRaise:
+            raise ValueError("Callback %r not found" % (callFunc,))
+        return False
+
+    def callbacksEnabled(self):
+        """Return True if callbacks are enabled (False while executing callbacks)
+        """
+        return self._enableCallbacks
+
+    def _basicDoCallbacks(self, *args, **kwargs):
+        """Call the callback functions, passing *args and **kwargs
+
+        A no-op if callbacks are already being executed.
+        Callbacks that raise an exception are reported to stderr; the remaining callbacks are still called.
+        """
+        callbacks = self._callbacks
+        if callbacks is None or not self._enableCallbacks:
+            return
+        # _callbacks is never modified in place, so it need not be copied
+        # even if a callback function adds or removes callbacks
+        if type(callbacks) is not tuple:
+            callbacks = (callbacks,)
+        self._enableCallbacks = False
+        try:
+            for func in callbacks:
+                try:
+                    func(*args, **kwargs)
+                except Exception:
+                    self._reportCallbackError("callback", func, args, kwargs)
+        finally:
+            self._enableCallbacks = True
+
+    def _doCallbacks(self):
+        """Call the callback functions, passing self as the argument
+        """
+        self._basicDoCallbacks(self)
+
+    def _removeAllCallbacks(self):
+        """Remove all callback functions
+        """
+        self._callbacks = None
+
+    def _safeCall(self, descr, func, *args, **kwargs):
+        """Call a function, reporting any exception to stderr (like RO.AddCallback.safeCall2)
+
+        @param[in] descr  brief description of the call, for the error message, e.g. "callback"
+        @param[in] func  function to call
+        @param[in] *args, **kwargs  arguments for func
+        """
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            self._reportCallbackError(descr, func, args, kwargs)
+
+    def _reportCallbackError(self, descr, func, args, kwargs):
+        """Report an exception raised by a callback function to stderr, with a traceback
+
+        Call from an exception handler. The description of this command is only formatted here,
+        so calling callbacks does not pay for it.
+        """
+        sys.stderr.write("%s %s %s(*%s, **%s) failed: %s\n" % (self, descr, func, args, kwargs, sys.exc_info()[1]))
+        traceback.print_exc(file=sys.stderr)
 
     def getMsg(self):
         """Get minimal message in simple format, prefering _textMsg
@@ -223,25 +396,39 @@ class BaseCmd(RO.AddCallback.BaseMixin):
 
         Error conditions:
         - Raise RuntimeError if this command is finished.
+        - Raise RuntimeError if newState is unknown or if this command is active and newState is Ready.
         """
         # print("%r.setState(newState=%s, textMsg=%r, hubMsg=%r); self._cmdToTrack=%r" % (self, newState, textMsg, hubMsg, self._cmdToTrack))
-        if self.isDone:
-            raise RuntimeError("Command %s is done; cannot change state" % str(self))
-        if newState not in self.AllStates:
-            raise RuntimeError("Unknown state %s" % newState)
-        if self._state == self.Ready and newState in self.ActiveStates and self._timeLim:
-            self._timeoutTimer.start(self._timeLim, self._timeout)
+        newStateBit = self._StateBitDict.get(newState, 0)
+        if not newStateBit & self._NextStateMaskDict[self._stateBit]:
+            if self._stateBit & self._DoneMask:
+                raise RuntimeError("Command %s is done; cannot change state" % str(self))
+            if not newStateBit:
+                raise RuntimeError("Unknown state %s" % newState)
+            raise RuntimeError("Command %s cannot change state from %s to %s" % (self, self._state, newState))
+        if self._stateBit == self._ReadyBit and newStateBit & self._ActiveMask and self._timeLim:
+            self._startTimeoutTimer()
+        oldStateBit = self._stateBit
         self._state = newState
+        self._stateBit = newStateBit
         if textMsg is not None:
             self._textMsg = str(textMsg)
         if hubMsg is not None:
             self._hubMsg = str(hubMsg)
-        log.info(str(self))
-        self._basicDoCallbacks(self)
-        if self.isDone:
-            self._timeoutTimer.cancel()
-            self._removeAllCallbacks()
-            self.untrackCmd()
+        log.info("%s", self)
+        if self._Tracer is not None:
+            self._Tracer.stateChanged(self)
+        if self._Stats is not None:
+            self._Stats.stateChanged(self, oldStateBit)
+        if self._callbacks is not None:
+            self._basicDoCallbacks(self)
+        if newStateBit & self._DoneMask:
+            self._cancelTimeoutTimer()
+            self._callbacks = None
+            if self._cmdToTrack is not None:
+                self.untrackCmd()
+            if self._registry is not None:
+                self._registry.remove(self)
 
     def setTimeLimit(self, timeLim):
         """Set a new time limit
@@ -259,9 +446,35 @@ class BaseCmd(RO.AddCallback.BaseMixin):
         self._timeLim = float(timeLim) if timeLim else None
         if self._timeLim:
             if self.isActive:
-                self._timeoutTimer.start(self._timeLim, self._timeout)
+                self._startTimeoutTimer()
         else:
+            self._cancelTimeoutTimer()
+
+    @classmethod
+    def setTimeLimitResolution(cls, resolution):
+        """Set the resolution with which command time limits are enforced
+
+        Commands time out no earlier than their time limit and no more than about resolution seconds later.
+        Commands that are already running keep the resolution in effect when their timer was started.
+
+        @param[in] resolution  resolution (sec); the default is 0.1
+
+        @throw RuntimeError if resolution <= 0
+        """
+        BaseCmd._TimerWheel = TimerWheel(resolution=resolution)
+
+    def _startTimeoutTimer(self):
+        """Start (or restart) the time limit timer
+        """
+        self._cancelTimeoutTimer()
+        self._timeoutTimer = BaseCmd._TimerWheel.add(self._timeLim, self._timeout)
+
+    def _cancelTimeoutTimer(self):
+        """Cancel the time limit timer, if running
+        """
+        if self._timeoutTimer is not None:
             self._timeoutTimer.cancel()
+            self._timeoutTimer = None
 
     def trackCmd(self, cmdToTrack):
         """Tie the state of this command to another command
@@ -276,6 +489,8 @@ class BaseCmd(RO.AddCallback.BaseMixin):
         if self._cmdToTrack:
             raise RuntimeError("Already tracking a command")
         self._cmdToTrack = cmdToTrack
+        if self._Tracer is not None:
+            self._Tracer.linkCmd(self, cmdToTrack, "track")
         if cmdToTrack.isDone:
             self._cmdCallback(cmdToTrack)
         else:
@@ -289,45 +504,95 @@ class BaseCmd(RO.AddCallback.BaseMixin):
             self._cmdToTrack = None
 
     def removeChildren(self):
-        for cmd in self._linkedCommands:
-            cmd.removeCallback(self.linkCmdCallback)
-        self._linkedCommands = []
+        for cmd in self._linkedCommands or ():
+            cmd.removeCallback(self.linkCmdCallback, doRaise=False)
+        self._linkedCommands = None
+        self._linkedPendingSet = None
 
     def setParentCmd(self, cmd):
+        """Set the parent command, and update the cached eldest parent of this command and its linked commands
+
+        @param[in] cmd  parent command, or None if none
+        """
         self._parentCmd = cmd
+        self._setEldestParentCmd(None if cmd is None else cmd.eldestParentCmd)
+
+    def _setEldestParentCmd(self, eldestCmd):
+        """Set the cached eldest parent of this command and of its linked commands
+
+        @param[in] eldestCmd  eldest parent command, or None if this command has no parent
+        """
+        self._eldestParentCmd = eldestCmd
+        childEldestCmd = self if eldestCmd is None else eldestCmd
+        for cmd in self._linkedCommands or ():
+            if cmd._parentCmd is self:
+                cmd._setEldestParentCmd(childEldestCmd)
 
-    def linkCommands(self, cmdList):
+    def linkCommands(self, cmdList, failFast=False):
         """Tie the state of this command to a list of commands
 
         If any command in the list fails, so will this command
+
+        @param[in] cmdList  list of commands to link
+        @param[in] failFast  if True then as soon as any linked command fails,
+            cancel all linked commands that are not yet done (so this command fails without further delay);
+            if False then wait for all linked commands to finish
         """
         if self.isDone:
             raise RuntimeError("Finished; cannot link commands")
         if self._cmdToTrack:
             raise RuntimeError("Already tracking a command")
+        if self._linkedCommands is None:
+            self._linkedCommands = []
+            self._linkedPendingSet = set()
         self._linkedCommands.extend(cmdList)
+        if failFast:
+            self._linkFailFast = True
         for cmd in cmdList:
             cmd.setParentCmd(self)
+            if self._Tracer is not None:
+                self._Tracer.linkCmd(self, cmd, "link")
             if not cmd.isDone:
+                self._linkedPendingSet.add(cmd)
                 cmd.addCallback(self.linkCmdCallback)
         # call right away in case all sub-commands are already done
         self.linkCmdCallback()
 
-    def linkCmdCallback(self, dumCmd=None):
-        """!Callback to be added to each device cmd
+    def linkCmdCallback(self, linkedCmd=None):
+        """!Callback to be added to each linked command
+
+        Only the command whose state changed is examined, so the cost of each call does not depend
+        on the number of linked commands, except for the final call, which summarizes any failures.
 
-        @param[in] dumCmd  sub-command issuing the callback (ignored)
+        @param[in] linkedCmd  linked command whose state changed; if None then examine all linked commands
         """
+        if self.isDone:
+            return
+        if linkedCmd is None:
+            changedCmds = self._linkedCommands or ()
+        else:
+            if linkedCmd.isDone and self._linkedPendingSet:
+                self._linkedPendingSet.discard(linkedCmd)
+            changedCmds = (linkedCmd,)
+
         # if any linked commands have become active and this command is not yet active
-        # set it cto the running state!
-        if self.state == self.Ready and True in [linkedCommand.isActive for linkedCommand in self._linkedCommands]:
+        # set it to the running state!
+        if self._stateBit == self._ReadyBit and any(cmd.isActive for cmd in changedCmds):
             self.setState(self.Running)
 
-        if not all(linkedCommand.isDone for linkedCommand in self._linkedCommands):
-            # not all device commands have terminated so keep waiting
+        if self._linkFailFast and self._linkedPendingSet:
+            for cmd in changedCmds:
+                if cmd.didFail:
+                    self._cancelLinkedCommands(textMsg="Cancelled because %s failed" % (cmd.cmdStr,))
+                    break
+
+        if self._linkedPendingSet or self.isDone:
+            # not all linked commands have terminated so keep waiting
+            # (or cancelling linked commands has already finished this command)
             return
 
-        failedCmdSummary = "; ".join("%s: %s" % (linkedCommand.cmdStr, linkedCommand.getMsg()) for linkedCommand in self._linkedCommands if linkedCommand.didFail)
+        failedCmdSummary = "; ".join("%s: %s" % (linkedCommand.cmdStr, linkedCommand.getMsg())
+            for linkedCommand in self._linkedCommands or () if linkedCommand.didFail)
         if failedCmdSummary:
             # at least one device command failed, fail the user command and say why
             # note, do we want to match the type of failure? If a subcommand was cancelled
@@ -341,6 +606,16 @@ class BaseCmd(RO.AddCallback.BaseMixin):
             textMsg = ""
         self.setState(state, textMsg = textMsg)
 
+    def _cancelLinkedCommands(self, textMsg):
+        """Cancel all linked commands that are not yet done
+
+        Also disables fail-fast, so the resulting cancellations do not trigger it again.
+        """
+        self._linkFailFast = False
+        for cmd in list(self._linkedPendingSet):
+            if not cmd.isDone:
+                cmd.setState(cmd.Cancelled, textMsg=textMsg)
+
     @classmethod
     def stateFromMsgCode(cls, msgCode):
         """Return the command state associated with a particular message code
@@ -356,6 +631,8 @@ class BaseCmd(RO.AddCallback.BaseMixin):
         """Call when command has timed out
         """
         if not self.isDone:
+            if self._Stats is not None:
+                self._Stats.cmdTimedOut(self)
             self.setState(self.Failed, textMsg="Timed out")
 
     def _getDescrList(self, doFull=False):
@@ -399,6 +676,7 @@ class DevCmd(BaseCmd):
         this is the command ID for the command sent to the device
     - showReplies: the value specified in the constructor
     """
+    __slots__ = ("locCmdID", "dev", "showReplies")
     _LocCmdIDGen = RO.Alg.IDGen(startVal=1, wrapVal=sys.maxint)
     def __init__(self,
         cmdStr,
@@ -456,6 +734,7 @@ class DevCmd(BaseCmd):
 class DevCmdVar(BaseCmd):
     """Device command wrapper around opscore.actor.CmdVar
     """
+    __slots__ = ("dev", "showReplies", "userCmd", "cmdVar")
     def __init__(self,
         cmdVar,
         callFunc = None,
@@ -532,8 +811,13 @@ class UserCmd(BaseCmd):
 
     Attributes:
     - cmdBody   command after the header
+    - cmdVerb   first word of cmdBody, in lowercase; only set by setVerbArgs
+        (which Actor calls for commands read from users) or by CommandQueue
+    - cmdArgs   the rest of cmdBody (after the verb and following whitespace); only set by setVerbArgs
     """
+    __slots__ = ("cmdBody", "cmdArgs", "parsedCommand")
     _HeaderBodyRE = re.compile(r"((?P<cmdID>\d+)(?:\s+\d+)?\s+)?((?P<cmdBody>[A-Za-z_].*))?$")
+    _BodyStartChars = frozenset(string.ascii_letters + "_")
     def __init__(self,
         userID = 0,
         cmdStr = "",
@@ -557,22 +841,56 @@ class UserCmd(BaseCmd):
         self.parseCmdStr(cmdStr)
 
     def parseCmdStr(self, cmdStr):
-        """Parse command
+        """Parse command, setting cmdID and cmdBody
 
         @param[in] cmdStr  command string (see module doc string for format)
         """
-        cmdMatch = self._HeaderBodyRE.match(cmdStr)
-        if not cmdMatch:
+        headerBody = self._splitHeader(cmdStr)
+        if headerBody is None:
             raise CommandError("Could not parse command %r" % cmdStr)
+        cmdIDStr, self.cmdBody = headerBody
+        self.cmdID = int(cmdIDStr) if cmdIDStr else 0
 
-        cmdDict = cmdMatch.groupdict("")
-        cmdIDStr = cmdDict["cmdID"]
-        #self.cmdID = int(cmdIDStr) if cmdIDStr else 0
-        if cmdIDStr:
-            self.cmdID = int(cmdIDStr)
-        else:
-            self.cmdID = 0
-        self.cmdBody = cmdDict.get("cmdBody", "")
+    def setVerbArgs(self):
+        """Set cmdVerb (in lowercase) and cmdArgs from cmdBody; both are "" if cmdBody is empty
+
+        Only call this for commands read from users: commands generated internally
+        should not have a verb, so CommandQueue gives them its "dummy" verb
+        and command statistics do not count them as user commands.
+        """
+        verbArgs = self.cmdBody.split(None, 1)
+        self.cmdVerb = verbArgs[0].lower() if verbArgs else ""
+        self.cmdArgs = verbArgs[1] if len(verbArgs) > 1 else ""
+
+    @classmethod
+    def _splitHeader(cls, cmdStr):
+        """Split a command string into command ID string and command body
+
+        Equivalent to matching _HeaderBodyRE, but handles the usual forms ("body", "cmdID body",
+        "cmdID userID body", each separated by single spaces) without using the regular expression.
+
+        @param[in] cmdStr  command string
+        @return (cmdIDStr, cmdBody); cmdIDStr is "" if there is no header;
+            or None if cmdStr cannot be parsed
+        """
+        if "\n" not in cmdStr:
+            bodyStartChars = cls._BodyStartChars
+            if cmdStr[0:1] in bodyStartChars:
+                return "", cmdStr
+            cmdIDStr, sep, cmdBody = cmdStr.partition(" ")
+            if cmdIDStr.isdigit():
+                if cmdBody[0:1] in bodyStartChars or (sep and not cmdBody):
+                    return cmdIDStr, cmdBody
+                userIDStr, sep, cmdBody = cmdBody.partition(" ")
+                if sep and userIDStr.isdigit() and (not cmdBody or cmdBody[0] in bodyStartChars):
+                    return cmdIDStr, cmdBody
+            elif not cmdStr:
+                return "", ""
+        # unusual form, e.g. with tabs or repeated spaces, or invalid
+        cmdMatch = cls._HeaderBodyRE.match(cmdStr)
+        if not cmdMatch:
+            return None
+        return cmdMatch.group("cmdID") or "", cmdMatch.group("cmdBody") or ""
 
 def expandUserCmd(userCmd):
     """!If userCmd is None, make a new one; if userCmd is done, raise RuntimeError
@@ -10,6 +10,7 @@ from .command import UserCmd
 __all__ = ["CommandQueue"]
 
 class QueuedCommand(object):
+    __slots__ = ("cmd", "priority", "runFunc")
     # state constants
     Done = "done"
     Cancelled = "cancelled" # including superseded
@@ -395,6 +396,8 @@ class CommandQueue(object):
         elif self.currExeCmd.cmd.isDone:
             # begin the next command on the queue
             self.currExeCmd = self.cmdQueue.pop(-1)
+            if UserCmd._Stats is not None:
+                UserCmd._Stats.cmdDequeued(self.currExeCmd.cmd)
             self.currExeCmd.setRunning()
             self.currExeCmd.cmd.addCallback(self.scheduleRunQueue)
 
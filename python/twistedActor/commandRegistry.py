@@ -0,0 +1,122 @@
+from __future__ import absolute_import, division, print_function
+"""!A registry of commands that are in progress
+"""
+from collections import OrderedDict
+
+from .command import UserCmd
+
+__all__ = ["CommandRegistry"]
+
+class CommandRegistry(object):
+    """!Keep track of commands that are not yet done
+
+    Each Actor has one, which contains the commands read from users and the commands sent to its devices.
+    Commands are removed automatically when they finish (by BaseCmd.setState, so no callback is added).
+    A command can be in at most one registry at a time.
+
+    User commands (UserCmd) may be looked up by (userID, cmdID) and device commands (commands with a locCmdID,
+    such as DevCmd and DevCmdVar) by locCmdID; both lookups are O(1). Other commands may be added,
+    in which case they only appear in the command tree (see getCmdTree).
+    """
+    def __init__(self):
+        self._cmdDict = OrderedDict() # dict of cmd: (userID, cmdID) or None, locCmdID or None
+        self._userCmdDict = dict() # dict of (userID, cmdID): user command
+        self._devCmdDict = dict() # dict of locCmdID: device command
+
+    def __len__(self):
+        """!Return the number of registered commands
+        """
+        return len(self._cmdDict)
+
+    def __iter__(self):
+        """!Iterate over registered commands, in the order they were added
+        """
+        return iter(list(self._cmdDict))
+
+    def __contains__(self, cmd):
+        return cmd in self._cmdDict
+
+    def add(self, cmd):
+        """!Add a command; a no-op if the command is done or already registered
+
+        The command is removed automatically when it finishes.
+        If the command is registered with another registry then it is removed from that registry.
+        If another live command has the same key (e.g. several internally generated user commands
+        with userID = cmdID = 0) then lookup by that key returns the most recently added one.
+
+        @param[in] cmd  the command to add (a BaseCmd)
+        """
+        if cmd.isDone or cmd in self._cmdDict:
+            return
+        if cmd._registry is not None:
+            cmd._registry.remove(cmd)
+        cmd._registry = self
+        userKey = (cmd.userID, cmd.cmdID) if isinstance(cmd, UserCmd) else None
+        locCmdID = getattr(cmd, "locCmdID", None)
+        self._cmdDict[cmd] = (userKey, locCmdID)
+        if userKey is not None:
+            self._userCmdDict[userKey] = cmd
+        if locCmdID is not None:
+            self._devCmdDict[locCmdID] = cmd
+
+    def remove(self, cmd):
+        """!Remove a command; a no-op if the command is not registered
+
+        @param[in] cmd  the command to remove
+        """
+        keys = self._cmdDict.pop(cmd, None)
+        if keys is None:
+            return
+        cmd._registry = None
+        userKey, locCmdID = keys
+        if userKey is not None and self._userCmdDict.get(userKey) is cmd:
+            del self._userCmdDict[userKey]
+        if locCmdID is not None and self._devCmdDict.get(locCmdID) is cmd:
+            del self._devCmdDict[locCmdID]
+
+    def getUserCmd(self, userID, cmdID):
+        """!Return the live user command with the specified userID and cmdID, or None if not found
+        """
+        return self._userCmdDict.get((userID, cmdID))
+
+    def getDevCmd(self, locCmdID):
+        """!Return the live device command with the specified locCmdID, or None if not found
+        """
+        return self._devCmdDict.get(locCmdID)
+
+    def getCmdTree(self):
+        """!Return the registered commands as a tree
+
+        A command's children are its linked commands (see BaseCmd.linkCommands), the sub-commands
+        of LinkCommands for which it is the main command, and the command it is tracking, if any.
+
+        @return a list of (depth, cmd), in depth-first order; depth is 0 for commands that have
+            no registered parent. Children that are not registered (e.g. because they are done) are omitted.
+        """
+        childListDict = dict() # dict of parent cmd: list of registered child commands
+        for cmd in self._cmdDict:
+            parentCmd = cmd.parentCmd
+            if parentCmd is None:
+                parentCmd = getattr(cmd, "mainCmd", None)
+            if parentCmd is not None and parentCmd in self._cmdDict:
+                childListDict.setdefault(parentCmd, []).append(cmd)
+        for cmd in self._cmdDict:
+            trackedCmd = cmd._cmdToTrack
+            if trackedCmd is not None and trackedCmd in self._cmdDict:
+                childList = childListDict.setdefault(cmd, [])
+                if trackedCmd not in childList:
+                    childList.append(trackedCmd)
+        childSet = set(child for childList in childListDict.itervalues() for child in childList)
+
+        cmdTree = []
+        def addCmd(cmd, depth):
+            cmdTree.append((depth, cmd))
+            for childCmd in childListDict.get(cmd, ()):
+                addCmd(childCmd, depth + 1)
+        for cmd in self._cmdDict:
+            if cmd not in childSet:
+                addCmd(cmd, 0)
+        return cmdTree
+
+    def __repr__(self):
+        return "%s(numCmds=%s)" % (type(self).__name__, len(self))
@@ -43,7 +43,8 @@ class Device(BaseMixin):
     - is connection wanted?
     - the user command that triggered this request, or None if none
 
-    When this device is added to an Actor then it gains the actor's writeToUsers method.
+    When this device is added to an Actor then it gains the actor's writeToUsers method
+    and command registry (attribute cmdRegistry); commands started by startCmd are added to the registry.
     """
     DefaultTimeLim = 5 # default time limit, seconds; subclasses may override
 
@@ -92,6 +93,7 @@ class Device(BaseMixin):
         self.connReq = (False, None)
         self.conn = conn
         self.cmdClass = cmdClass
+        self.cmdRegistry = None # set by Actor
         self._state = self.Disconnected
         self._ignoreConnCallback = False # set during connection and disconnection
         self.conn.addStateCallback(self._connCallback)
@@ -109,7 +111,7 @@ class Device(BaseMixin):
 
         @return userCmd: the specified userCmd or if that was None, then a new empty one
         """
-        log.info("%s.connect(userCmd=%s, timeLim=%s)" % (self, userCmd, timeLim))
+        log.info("%s.connect(userCmd=%s, timeLim=%s)", self, userCmd, timeLim)
         return ConnectDevice(dev=self, userCmd=userCmd, timeLim=timeLim).userCmd
 
     def disconnect(self, userCmd=None, timeLim=DefaultTimeLim):
@@ -119,7 +121,7 @@ class Device(BaseMixin):
 
         @return userCmd: the specified userCmd or if that was None, then a new empty one
         """
-        log.info("%s.disconnect(userCmd=%s, timeLim=%s)" % (self, userCmd, timeLim))
+        log.info("%s.disconnect(userCmd=%s, timeLim=%s)", self, userCmd, timeLim)
         return DisconnectDevice(dev=self, userCmd=userCmd, timeLim=timeLim).userCmd
 
     def cleanup(self):
@@ -148,7 +150,7 @@ class Device(BaseMixin):
 
         This is overridden by Actor when the device is added to the actor
         """
-        log.info("Device does not yet have access to writeToUsers: msgCode=%r; msgStr=%r" % (msgCode, msgStr))
+        log.info("Device does not yet have access to writeToUsers: msgCode=%r; msgStr=%r", msgCode, msgStr)
         # print("msgCode=%r; msgStr=%r" % (msgCode, msgStr))
 
     def handleReply(self, replyStr):
@@ -227,7 +229,7 @@ class Device(BaseMixin):
         @warning: subclasses must supplement or override this method to set the devCmd done when finished.
         Subclasses that use a command queue will usually replace this method.
         """
-        log.info("%s.startCmd(cmdStr=%r, callFunc=%s, userCmd=%s, timeLim=%s)" % (self, cmdStr, callFunc, userCmd, timeLim))
+        log.info("%s.startCmd(cmdStr=%r, callFunc=%s, userCmd=%s, timeLim=%s)", self, cmdStr, callFunc, userCmd, timeLim)
         devCmd = self.cmdClass(
             cmdStr = cmdStr,
             userCmd = userCmd,
@@ -236,6 +238,8 @@ class Device(BaseMixin):
             dev = self,
             showReplies = showReplies,
         )
+        if self.cmdRegistry is not None:
+            self.cmdRegistry.add(devCmd)
         if not self.conn.isConnected:
             devCmd.setState(devCmd.Failed, textMsg="%s %s failed: not connected" % (self.name, cmdStr))
         else:
@@ -614,8 +618,11 @@ class ActorDevice(TCPDevice):
             dev = self,
             showReplies = showReplies,
         )
-        log.info("%s writing %r" % (self, cmdVar.cmdStr))
+        log.info("%s writing %r", self, cmdVar.cmdStr)
         self.dispatcher.executeCmd(cmdVar)
+        if self.cmdRegistry is not None:
+            # register after executing, because that assigns the command ID
+            self.cmdRegistry.add(devCmdVar)
         return devCmdVar
 
     def _showReply(self, cmdVar):
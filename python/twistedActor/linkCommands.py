@@ -8,45 +8,72 @@ class LinkCommands(object):
     The main command is done when all sub-commands are done; the main command finishes
     successfully only if all sub-commands finish successfully.
 
-    @note: To use, simply construct this object; you need not keep a reference to the resulting instance.
+    The sub-commands that are not yet done are kept in a set, so handling a sub-command's state change
+    takes the same time no matter how many sub-commands there are (apart from the final state change,
+    which summarizes any failures).
 
-    @note: if early termination behavior is required it can easily be added as follows:
-    - add an alternate callback function that fails early;
-        note that on early failure it must remove the callback on any sub-commands that are not finished
-        (or fail the sub-commands, but that is probably too drastic)
-    - add a failEarly argument to __init__ and have it assign the alternate callback
+    @note: To use, simply construct this object; you need not keep a reference to the resulting instance.
     """
-    def __init__(self, mainCmd, subCmdList):
+    def __init__(self, mainCmd, subCmdList, failFast=False):
         """!Link a main command to a collection of sub-commands
 
         @param[in] mainCmd  the main command, a BaseCmd
         @param[in] subCmdList  a collection of sub-commands, each a BaseCmd
+        @param[in] failFast  if True then as soon as any sub-command fails,
+            cancel all sub-commands that are not yet done (so the main command fails without further delay);
+            if False then wait for all sub-commands to finish
         """
         if hasattr(mainCmd, 'isLinked'):
             raise RuntimeError("Cannont link main command %s, it is already linked elsewhere!"%str(mainCmd))
         self.mainCmd = mainCmd
         self.mainCmd.isLinked = True
         self.subCmdList = subCmdList
+        self._failFast = bool(failFast)
+        self._pendingSet = set() # sub-commands that are not yet done
         for subCmd in self.subCmdList:
             # give each sub command a copy of the 'mainCommand'
             # mostly for writing responses to it
             subCmd.mainCmd = mainCmd
+            if mainCmd._Tracer is not None:
+                mainCmd._Tracer.linkCmd(mainCmd, subCmd, "linkCommands")
             if not subCmd.isDone:
+                self._pendingSet.add(subCmd)
                 subCmd.addCallback(self.subCmdCallback)
 
         # call right away in case all sub-commands are already done
         self.subCmdCallback()
 
-    def subCmdCallback(self, dumCmd=None):
+    def subCmdCallback(self, subCmd=None):
         """!Callback to be added to each device cmd
 
-        @param[in] dumCmd  sub-command issuing the callback (ignored)
+        @param[in] subCmd  sub-command whose state changed; if None then examine all sub-commands
         """
-        if not all(subCmd.isDone for subCmd in self.subCmdList):
+        if self.mainCmd.isDone:
+            return
+        if subCmd is None:
+            changedCmds = self.subCmdList
+        else:
+            if subCmd.isDone:
+                self._pendingSet.discard(subCmd)
+            changedCmds = (subCmd,)
+
+        if self._failFast and self._pendingSet:
+            for cmd in changedCmds:
+                if cmd.didFail:
+                    # cancel the remaining sub-commands; only do this once
+                    self._failFast = False
+                    textMsg = "Cancelled because %s failed" % (cmd.cmdStr,)
+                    for pendingCmd in list(self._pendingSet):
+                        if not pendingCmd.isDone:
+                            pendingCmd.setState(pendingCmd.Cancelled, textMsg=textMsg)
+                    break
+
+        if self._pendingSet or self.mainCmd.isDone:
             # not all device commands have terminated so keep waiting
+            # (or cancelling sub-commands has already finished the main command)
             return
 
-        failedCmdSummary = "; ".join("%s: %s" % (subCmd.cmdStr, subCmd.getMsg()) for subCmd in self.subCmdList if subCmd.didFail)
+        failedCmdSummary = "; ".join("%s: %s" % (cmd.cmdStr, cmd.getMsg()) for cmd in self.subCmdList if cmd.didFail)
         if failedCmdSummary:
             # at least one device command failed, fail the user command and say why
             # note, do we want to match the type of failure? If a subcommand was cancelled
@@ -1,20 +1,23 @@
 from __future__ import absolute_import, division, print_function
 
+import array
+import collections
 import datetime
 import logging
 import logging.handlers
 import syslog
+import threading
 import time
 logging.Formatter.converter = time.gmtime
 import os
+import re
 import sys
-import pyparsing as pp
 from twisted.internet import reactor
 
 ROLLTIME = 24*60*60 # a day in seconds
 
-__all__ = ["log", "LogLineParser", "startFileLogging", "startSystemLogging", "stopLogging",
-    "getLoggerFacilityName"]
+__all__ = ["log", "LogLineParser", "LogWriterThread", "RingBufferLogger", "startFileLogging",
+    "startRingBufferLogging", "startSystemLogging", "stopLogging", "getLoggerFacilityName"]
 
 def getLoggerFacilityName(facility):
     """!Get a facility name for the unix logger executable
@@ -26,25 +29,47 @@ def getLoggerFacilityName(facility):
     """
     return SyslogLogger.FacilityNameDict[facility].lower()
 
-def startFileLogging(basePath, rotate=None):
+def startFileLogging(basePath, rotate=None, useThread=False, maxQueued=10000, overflowPolicy="dropnewest"):
     """!Start logging to a file using python logging module
 
     @param[in] basePath  Full path to file where logging should start.
     @param[in] rotate: if not None, must be datetime.time instance
     specifying what time of day to rollover log.
+    @param[in] useThread  if True then write log records from a background thread,
+        so the reactor never waits for the disk; see FileLogger for details
+    @param[in] maxQueued  maximum number of records waiting to be written (ignored unless useThread)
+    @param[in] overflowPolicy  what to do with a new record when maxQueued records are waiting
+        (ignored unless useThread); one of "dropnewest", "dropoldest" or "block"
     """
     global log
     if log:
         raise RuntimeError("%s logger already active" % (log))
         # log.warn("startFileLogging called, but %s logger already active." % (log))
     else:
+        threadArgs = dict(useThread=useThread, maxQueued=maxQueued, overflowPolicy=overflowPolicy)
         if rotate is not None:
-            logger = RotatingFileLogger(basePath, rotate)
+            logger = RotatingFileLogger(basePath, rotate, **threadArgs)
         else:
-            logger = FileLogger(basePath)
+            logger = FileLogger(basePath, **threadArgs)
         log.replaceLogger(logger)
         return logger.filePath
 
+def startRingBufferLogging(numRecords=10000):
+    """!Start logging to an in-memory ring buffer that retains the most recent records
+
+    Warnings and more severe messages are also written to stderr.
+    Use log.logger.dump to save the buffer to a file, or the Actor debugDumpLog command to see it.
+
+    @param[in] numRecords  number of records to retain
+    @return the RingBufferLogger
+    """
+    global log
+    if log:
+        raise RuntimeError("startRingBufferLogging called, but %s logger already active." % (log))
+    logger = RingBufferLogger(numRecords)
+    log.replaceLogger(logger)
+    return logger
+
 def startSystemLogging(facility):
     """!Start logging to syslog using python's syslog module
 
@@ -74,7 +99,17 @@ class BaseLogger(object):
     - define class constants DEBUG, INFO, WARNING, ERROR, CRITICAL
     - override the "log" and "stopLogging" methods
     - define "__init__" to construct the logger and starts logging
+    Subclasses that discard messages at some levels should also override "isEnabledFor".
     """
+    def isEnabledFor(self, logLevel):
+        """!Return True if a message at the specified log level would be logged
+
+        @param[in] logLevel  log level, one of: self.DEBUG, INFO, WARNING, ERROR, CRITICAL
+
+        The default implementation returns True.
+        """
+        return True
+
     def log(self, logMsg, logLevel):
         """!Log a message at the specified log level
 
@@ -106,8 +141,13 @@ class DefaultLogger(BaseLogger):
     WARNING = "Warning"
     ERROR = "Error"
     CRITICAL = "Critical"
+    _IgnoredLevels = frozenset((DEBUG, INFO))
+
+    def isEnabledFor(self, logLevel):
+        return logLevel not in self._IgnoredLevels
+
     def log(self, logMsg, logLevel):
-        if logLevel in (self.DEBUG, self.INFO):
+        if logLevel in self._IgnoredLevels:
             return
         sys.stderr.write("%s [%s] %s\n"%(self, logLevel, logMsg))
 
@@ -115,6 +155,139 @@ class DefaultLogger(BaseLogger):
         pass # nothing to stop!
 
 
+class _DeferredFlushMixin(object):
+    """!Mixin for a logging stream handler that allows flushing to be deferred until a batch of records is written
+    """
+    deferFlush = False # if True, flush is a no-op
+
+    def flush(self):
+        if not self.deferFlush:
+            super(_DeferredFlushMixin, self).flush()
+
+
+class _FileHandler(_DeferredFlushMixin, logging.FileHandler):
+    pass
+
+
+class _TimedRotatingFileHandler(_DeferredFlushMixin, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+class LogWriterThread(object):
+    """!Write log records from a background thread
+
+    Records are queued using a collections.deque (whose append and popleft are atomic,
+    so the queue needs no lock) and written in batches by a dedicated thread,
+    which flushes the log file once per batch. The writer thread wakes up every flushInterval seconds,
+    or sooner if half of maxQueued records are waiting.
+
+    Overflow policies, for when maxQueued records are waiting:
+    - DropNewest: discard the new record
+    - DropOldest: discard the oldest waiting record
+    - Block: wait until the writer thread makes room (this blocks the caller, typically the reactor)
+    Discarded records are counted in numDropped.
+    """
+    DropNewest = "dropnewest"
+    DropOldest = "dropoldest"
+    Block = "block"
+    _Policies = frozenset((DropNewest, DropOldest, Block))
+
+    def __init__(self, logger, maxQueued=10000, overflowPolicy=DropNewest, flushInterval=0.1):
+        """!Construct a LogWriterThread and start the writer thread
+
+        @param[in] logger  logging.Logger whose handlers write the records
+        @param[in] maxQueued  maximum number of records waiting to be written
+        @param[in] overflowPolicy  one of DropNewest, DropOldest or Block
+        @param[in] flushInterval  maximum time a record waits before the writer thread wakes up (sec)
+
+        @throw RuntimeError if maxQueued < 1 or overflowPolicy is not recognized
+        """
+        if maxQueued < 1:
+            raise RuntimeError("maxQueued=%r must be >= 1" % (maxQueued,))
+        if overflowPolicy not in self._Policies:
+            raise RuntimeError("overflowPolicy=%r must be one of %s" % (overflowPolicy, sorted(self._Policies)))
+        self.logger = logger
+        self.maxQueued = int(maxQueued)
+        self.overflowPolicy = overflowPolicy
+        self.flushInterval = float(flushInterval)
+        self.numDropped = 0 # number of records discarded by the overflow policy
+        self.numWritten = 0 # number of records written
+        self._wakeThreshold = max(1, self.maxQueued // 2)
+        self._queue = collections.deque()
+        self._wakeEvent = threading.Event()
+        self._isStopping = False
+        self._thread = threading.Thread(target=self._run, name="LogWriterThread")
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def numQueued(self):
+        """!Number of records waiting to be written
+        """
+        return len(self._queue)
+
+    def put(self, record):
+        """!Queue a log record (a logging.LogRecord) for writing
+        """
+        if len(self._queue) >= self.maxQueued:
+            if self.overflowPolicy == self.DropNewest:
+                self.numDropped += 1
+                return
+            elif self.overflowPolicy == self.DropOldest:
+                try:
+                    self._queue.popleft()
+                    self.numDropped += 1
+                except IndexError:
+                    pass # the writer thread emptied the queue
+            else:
+                while len(self._queue) >= self.maxQueued and self._thread.is_alive():
+                    self._wakeEvent.set()
+                    time.sleep(0.001)
+        self._queue.append(record)
+        if len(self._queue) >= self._wakeThreshold:
+            self._wakeEvent.set()
+
+    def stop(self):
+        """!Write all queued records and stop the writer thread
+        """
+        self._isStopping = True
+        self._wakeEvent.set()
+        self._thread.join()
+
+    def _run(self):
+        """!Main loop of the writer thread
+        """
+        while True:
+            self._wakeEvent.wait(self.flushInterval)
+            self._wakeEvent.clear()
+            try:
+                self._writeBatch()
+            except Exception as e:
+                sys.stderr.write("%s failed to write log records: %s\n" % (self, e))
+            if self._isStopping and not self._queue:
+                return
+
+    def _writeBatch(self):
+        """!Write all queued records, flushing each log file once
+        """
+        if not self._queue:
+            return
+        handlerList = [handler for handler in self.logger.handlers if isinstance(handler, _DeferredFlushMixin)]
+        for handler in handlerList:
+            handler.deferFlush = True
+        try:
+            while self._queue:
+                self.logger.handle(self._queue.popleft())
+                self.numWritten += 1
+        finally:
+            for handler in handlerList:
+                handler.deferFlush = False
+                handler.flush()
+
+    def __repr__(self):
+        return "%s(numQueued=%s, numDropped=%s)" % (type(self).__name__, self.numQueued, self.numDropped)
+
+
 class FileLogger(BaseLogger):
     """!Logger that logs to a file
 
@@ -126,11 +299,17 @@ class FileLogger(BaseLogger):
     ERROR = logging.ERROR
     CRITICAL = logging.CRITICAL
 
-    def __init__(self, basePath):
+    def __init__(self, basePath, useThread=False, maxQueued=10000, overflowPolicy=LogWriterThread.DropNewest):
         """!Construct a FileLogger for a specific log file.
 
         @param[in] basePath  path to log file; the full file name will have the date and ".log" appended
             hence "example/foo" will write to "example/foo_<yyyy>_<mm>_<dd>:<hh><mm><ss>.log"
+        @param[in] useThread  if False then write each record as it is logged;
+            if True then queue records and write them in batches from a background thread (see LogWriterThread),
+            so that slow disks do not delay the reactor
+        @param[in] maxQueued  maximum number of records waiting to be written (ignored unless useThread)
+        @param[in] overflowPolicy  what to do with a new record when maxQueued records are waiting
+            (ignored unless useThread); one of LogWriterThread.DropNewest, DropOldest or Block
         @return filePath, the basePath with the appended basePath.
         """
         dirPath, baseName = os.path.split(basePath)
@@ -163,9 +342,18 @@ class FileLogger(BaseLogger):
         self.console = console
         self.fh = fh
         self.filePath = filePath
+        self.writerThread = None
+        if useThread:
+            self.writerThread = LogWriterThread(logger, maxQueued=maxQueued, overflowPolicy=overflowPolicy)
+
+    @property
+    def numDropped(self):
+        """!Number of records discarded because too many were waiting to be written (always 0 unless useThread)
+        """
+        return self.writerThread.numDropped if self.writerThread else 0
 
     def getFileHandler(self, filePath):
-        fh = logging.FileHandler(filePath)
+        fh = _FileHandler(filePath)
         fh.setLevel(logging.DEBUG)
         return fh
 
@@ -173,14 +361,27 @@ class FileLogger(BaseLogger):
         return "%s_%s.log" % (basePath, datetime.datetime.now().strftime("%y-%m-%dT%H:%M:%S"))
 
 
+    def isEnabledFor(self, logLevel):
+        return self.logger is not None and self.logger.isEnabledFor(logLevel)
+
     def log(self, logMsg, logLevel):
-        self.logger.log(logLevel, logMsg)
+        if self.writerThread:
+            if self.logger.isEnabledFor(logLevel):
+                # make the record now, so it has the correct time stamp
+                self.writerThread.put(self.logger.makeRecord(self.logger.name, logLevel, "", 0, logMsg, None, None))
+        else:
+            self.logger.log(logLevel, logMsg)
 
     def stopLogging(self):
         """!Stop logging and close the log file
+
+        If using a background thread then all queued records are written first.
         """
+        if self.writerThread:
+            self.writerThread.stop()
         self.logger.removeHandler(self.fh)
         self.logger.removeHandler(self.console)
+        self.fh.close()
         self.logger = None
         self.fh = None
         self.console = None
@@ -197,10 +398,11 @@ class RotatingFileLogger(FileLogger):
     and restarted after, which is probably a small chance
     """
 
-    def __init__(self, basePath, rolloverTime):
+    def __init__(self, basePath, rolloverTime, **kwargs):
         # roloverTime should be a datetime.time object,
-        # indicates what time of day to rollover
-        FileLogger.__init__(self, basePath)
+        # indicates what time of day to rollover;
+        # kwargs are passed to FileLogger (e.g. useThread)
+        FileLogger.__init__(self, basePath, **kwargs)
         timeNow = datetime.datetime.now()
         nextRollover = datetime.datetime(
             timeNow.year, timeNow.month, timeNow.day,
@@ -217,7 +419,7 @@ class RotatingFileLogger(FileLogger):
 
 
     def getFileHandler(self, filePath):
-        fh = logging.handlers.TimedRotatingFileHandler(filePath, when="H", interval=25, utc=True)
+        fh = _TimedRotatingFileHandler(filePath, when="H", interval=25, utc=True)
         fh.setLevel(logging.DEBUG)
         return fh
 
@@ -225,12 +427,112 @@ class RotatingFileLogger(FileLogger):
         return "%s.log" %basePath
 
     def roll(self):
-        self.fh.doRollover()
+        if self.fh is None:
+            return # logging has stopped
+        # hold the handler's lock, since a background writer thread may be writing
+        self.fh.acquire()
+        try:
+            self.fh.doRollover()
+        finally:
+            self.fh.release()
         reactor.callLater(ROLLTIME, self.roll)
 
 
 
 
+class RingBufferLogger(BaseLogger):
+    """!Logger that retains the most recent records in memory
+
+    Intended for production use, where full logging to a file is too expensive but a record of
+    recent activity is wanted when something goes wrong. Storage is allocated once:
+    time stamps and levels are kept in arrays and messages in a list, all of length numRecords,
+    and each new record overwrites the oldest.
+
+    Warnings and more severe messages are also written to stderr (as DefaultLogger does).
+    """
+    DEBUG = logging.DEBUG
+    INFO = logging.INFO
+    WARNING = logging.WARNING
+    ERROR = logging.ERROR
+    CRITICAL = logging.CRITICAL
+
+    def __init__(self, numRecords=10000):
+        """!Construct a RingBufferLogger
+
+        @param[in] numRecords  number of records to retain
+
+        @throw RuntimeError if numRecords < 1
+        """
+        if numRecords < 1:
+            raise RuntimeError("numRecords=%r must be >= 1" % (numRecords,))
+        self.numRecords = int(numRecords)
+        self.numLogged = 0 # total number of records logged
+        self._timeArr = array.array("d", [0.0]) * self.numRecords
+        self._levelArr = array.array("B", [0]) * self.numRecords
+        self._msgList = [None] * self.numRecords
+        self._nextInd = 0
+
+    def __len__(self):
+        """!Return the number of records retained
+        """
+        return min(self.numLogged, self.numRecords)
+
+    def log(self, logMsg, logLevel):
+        ind = self._nextInd
+        self._timeArr[ind] = time.time()
+        self._levelArr[ind] = logLevel
+        self._msgList[ind] = logMsg
+        self._nextInd = ind + 1 if ind + 1 < self.numRecords else 0
+        self.numLogged += 1
+        if logLevel >= self.WARNING:
+            sys.stderr.write("%s [%s] %s\n" % (self, logging.getLevelName(logLevel), logMsg))
+
+    def getRecords(self):
+        """!Return the retained records, oldest first, as a list of (time (unix sec), level name, message)
+        """
+        numRetained = len(self)
+        startInd = (self._nextInd - numRetained) % self.numRecords
+        indList = [(startInd + i) % self.numRecords for i in xrange(numRetained)]
+        return [(self._timeArr[ind], logging.getLevelName(self._levelArr[ind]), self._msgList[ind])
+            for ind in indList]
+
+    def formatRecords(self):
+        """!Return the retained records, oldest first, as a list of lines formatted as FileLogger formats them
+
+        The lines can be parsed by LogLineParser.parseLine.
+        """
+        lineList = []
+        for recTime, levelName, logMsg in self.getRecords():
+            timeStr = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(recTime))
+            lineList.append("%s.%03d %s:  %s" % (timeStr, int((recTime % 1) * 1000), levelName, logMsg))
+        return lineList
+
+    def dump(self, filePath):
+        """!Write the retained records to a file, oldest first
+
+        @param[in] filePath  path of file to write (an existing file is overwritten)
+        @return the number of records written
+        """
+        lineList = self.formatRecords()
+        with open(filePath, "w") as f:
+            for line in lineList:
+                f.write(line + "\n")
+        return len(lineList)
+
+    def clear(self):
+        """!Discard all retained records
+        """
+        self._msgList = [None] * self.numRecords
+        self._nextInd = 0
+        self.numLogged = 0
+
+    def stopLogging(self):
+        pass # nothing to stop; the records remain available
+
+    def __repr__(self):
+        return "%s(numRecords=%s)" % (type(self).__name__, self.numRecords)
+
+
 class SyslogLogger(BaseLogger):
     """!Logger that logs to syslog
 
@@ -280,13 +582,37 @@ class LogManager(object):
     """!Object that holds the current logger.
 
     This is needed so that the logger used by the log object can be changed at will.
+
+    The message-writing methods (debug, info, warn, error and critical) accept optional arguments
+    for deferred formatting: log.info("%s.foo(%r)", self, arg) only formats the message
+    if the current logger will keep it. This matters on heavily used code paths,
+    since the default logger discards debug and info messages.
     """
     def __init__(self):
         self.logger = DefaultLogger()
 
-    def log(self, logMsg, logLevel):
+    def log(self, logMsg, logLevel, *args):
+        """!Write a message at the specified log level
+
+        @param[in] logMsg  message string; if args are specified then the logged message is logMsg % args
+        @param[in] logLevel  log level, one of: self.logger.DEBUG, INFO, WARNING, ERROR, CRITICAL
+        @param[in] args  arguments for formatting logMsg; formatting is skipped if the message is discarded
+        """
+        if not self.logger.isEnabledFor(logLevel):
+            return
+        if args:
+            logMsg = logMsg % args
         self.logger.log(logMsg, logLevel)
 
+    def isEnabledFor(self, logLevel):
+        """!Return True if a message at the specified level would be logged by the current logger
+
+        Use this to avoid computing expensive arguments for a message that will be discarded.
+
+        @param[in] logLevel  log level, one of: self.logger.DEBUG, INFO, WARNING, ERROR, CRITICAL
+        """
+        return self.logger.isEnabledFor(logLevel)
+
     def replaceLogger(self, logger):
         """!Stop the current logger and switch to a new logger
 
@@ -301,36 +627,45 @@ class LogManager(object):
         self.logger.stopLogging()
         self.logger = DefaultLogger()
 
-    def debug(self, logMsg):
+    def debug(self, logMsg, *args):
         """!Write a debug-level message
 
-        @param[in] logMsg  message string
+        @param[in] logMsg  message string; if args are specified then the logged message is logMsg % args
+        @param[in] args  arguments for formatting logMsg; formatting is skipped if the message is discarded
         """
-        self.logger.debug(logMsg)
+        self.log(logMsg, self.logger.DEBUG, *args)
 
-    def info(self, logMsg):
-        """!Write a debug-level message
+    def info(self, logMsg, *args):
+        """!Write an info-level message
 
-        @param[in] logMsg  message string
+        @param[in] logMsg  message string; if args are specified then the logged message is logMsg % args
+        @param[in] args  arguments for formatting logMsg; formatting is skipped if the message is discarded
         """
-        self.logger.log(logMsg, self.logger.INFO)
+        self.log(logMsg, self.logger.INFO, *args)
 
-    def warn(self, logMsg):
-        """!Write a debug-level message
+    def warn(self, logMsg, *args):
+        """!Write a warning-level message
 
-        @param[in] logMsg  message string
+        @param[in] logMsg  message string; if args are specified then the logged message is logMsg % args
+        @param[in] args  arguments for formatting logMsg; formatting is skipped if the message is discarded
         """
-        self.logger.log(logMsg, self.logger.WARNING)
+        self.log(logMsg, self.logger.WARNING, *args)
 
-    def error(self, logMsg):
-        """!Write a debug-level message
+    def error(self, logMsg, *args):
+        """!Write an error-level message
 
-        @param[in] logMsg  message string
+        @param[in] logMsg  message string; if args are specified then the logged message is logMsg % args
+        @param[in] args  arguments for formatting logMsg; formatting is skipped if the message is discarded
         """
-        self.logger.log(logMsg, self.logger.ERROR)
+        self.log(logMsg, self.logger.ERROR, *args)
 
-    def critical(self, logMsg):
-        self.logger.log(logMsg, self.logger.CRITICAL)
+    def critical(self, logMsg, *args):
+        """!Write a critical-level message
+
+        @param[in] logMsg  message string; if args are specified then the logged message is logMsg % args
+        @param[in] args  arguments for formatting logMsg; formatting is skipped if the message is discarded
+        """
+        self.log(logMsg, self.logger.CRITICAL, *args)
 
     def __repr__(self):
         return "%s" % self.logger
@@ -340,43 +675,155 @@ class LogManager(object):
 
 
 class LogLineParser(object):
+    """!Parse log files written by FileLogger (or RingBufferLogger.dump)
+
+    Each log line has the form "<yyyy>-<mm>-<dd> <HH>:<MM>:<SS>.<mmm> <LEVEL>:  <message>",
+    where the time is UTC. Lines that do not start with a time stamp are treated as continuations
+    of the previous message (a message that contains newlines is written as several lines).
+
+    Parsing uses a compiled regular expression and iterLogFile reads lazily, so huge log files
+    can be processed without reading them into memory. Since log lines are in time order,
+    iterLogFile can seek to a start time using a binary search on the time stamp.
+    """
+    # time stamp (sliced at fixed offsets once the line matches), level and message
+    _LineRE = re.compile(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{3}\s+(?:DEBUG|INFO|WARNING|ERROR|CRITICAL)\s*:(.*)\Z", re.DOTALL)
+    _TimeStrLen = 23 # length of "yyyy-mm-dd HH:MM:SS.mmm"
+    _ReadBufferSize = 1 << 20
+
     def __init__(self):
-        year = pp.Word(pp.nums, exact=4).setResultsName("year").setParseAction(lambda t: int(t[0]))
-        month = pp.Word(pp.nums, exact=2).setResultsName("month").setParseAction(lambda t: int(t[0]))
-        day = pp.Word(pp.nums, exact=2).setResultsName("day").setParseAction(lambda t: int(t[0]))
-        hour = pp.Word(pp.nums, exact=2).setResultsName("hour").setParseAction(lambda t: int(t[0]))
-        minute = pp.Word(pp.nums, exact=2).setResultsName("minute").setParseAction(lambda t: int(t[0]))
-        second = pp.Word(pp.nums, exact=2).setResultsName("second").setParseAction(lambda t: int(t[0]))
-        ms = pp.Word(pp.nums, exact=3).setResultsName("ms").setParseAction(lambda t: int(t[0]))
-        dash = pp.Literal("-").suppress()
-        colon = pp.Literal(":").suppress()
-        period = pp.Literal(".").suppress()
-        severity = pp.oneOf("DEBUG INFO WARNING ERROR CRITICAL").suppress()
-        msg = pp.restOfLine.setResultsName("msg").setParseAction(lambda t: t[0].strip())
-        # alltogether
-        self.grammar = year + dash + month + dash + day + hour + colon + minute + colon + second + period + ms + severity + colon + msg
+        self._secStr = None # "yyyy-mm-dd HH:MM:SS" of the most recently parsed time stamp
+        self._secDatetime = None # datetime of _secStr
 
     def parseLine(self, line):
-        ppOut = self.grammar.parseString(line, parseAll=True)
-        datetimeStamp = datetime.datetime(
-            ppOut.year,
-            ppOut.month,
-            ppOut.day,
-            ppOut.hour,
-            ppOut.minute,
-            ppOut.second,
-            ppOut.ms * 1000 # milliseconds to microseconds
-            )
-        return datetimeStamp, ppOut.msg
+        """!Parse one line of a log file
+
+        @param[in] line  line of a log file
+        @return (datetime (UTC), message), with whitespace stripped from the message
+
+        @throw RuntimeError if the line is not a log line (e.g. it is a continuation line)
+        """
+        line = line.strip()
+        match = self._LineRE.match(line)
+        if match is None:
+            raise RuntimeError("Cannot parse log line %r" % (line,))
+        return self._getDatetime(line), match.group(1).strip()
 
     def parseLogFile(self, logfile):
-        # return a list of tuples containing: [(datetime, logMsg)]
-        outList = []
+        """!Parse a log file
+
+        @param[in] logfile  path to log file
+        @return a list of (datetime (UTC), message); see iterLogFile for details
+        """
+        return list(self.iterLogFile(logfile))
+
+    def iterLogFile(self, logfile, startTime=None, endTime=None):
+        """!Return an iterator over the messages in a log file
+
+        @param[in] logfile  path to log file
+        @param[in] startTime  if not None, skip messages earlier than this time (a datetime, UTC);
+            uses a binary search, so is fast even for huge files
+        @param[in] endTime  if not None, stop at the first message at or after this time (a datetime, UTC)
+        @return an iterator that yields (datetime (UTC), message), with whitespace stripped from the message;
+            continuation lines are joined to the message with newlines
+
+        @throw RuntimeError if the file does not start with a log line
+        """
+        endTimeStr = None if endTime is None else self._getTimeStr(endTime)
+        with open(logfile, "r", self._ReadBufferSize) as f:
+            if startTime is not None:
+                f.seek(self._findTimeOffset(f, self._getTimeStr(startTime)))
+            msgTime = None
+            msgList = []
+            for line in f:
+                line = line.rstrip("\r\n")
+                match = self._LineRE.match(line)
+                if match is None:
+                    if msgTime is None:
+                        if not line.strip():
+                            continue
+                        raise RuntimeError("Cannot parse log line %r" % (line,))
+                    msgList.append(line)
+                    continue
+                if msgTime is not None:
+                    yield msgTime, "\n".join(msgList).strip()
+                if endTimeStr is not None and line[0:self._TimeStrLen] >= endTimeStr:
+                    return
+                msgTime = self._getDatetime(line)
+                msgList = [match.group(1)]
+            if msgTime is not None:
+                yield msgTime, "\n".join(msgList).strip()
+
+    def findFirstTime(self, logfile, startTime=None):
+        """!Return the time of the first message in a log file at or after a given time
+
+        @param[in] logfile  path to log file
+        @param[in] startTime  find the first message at or after this time (a datetime, UTC);
+            if None then find the first message in the file. Uses a binary search, so is fast even for huge files
+        @return the time of the message (a datetime, UTC), or None if there is no such message
+        """
         with open(logfile, "r") as f:
-            for ind, loggedLine in enumerate(f):
-                loggedLine = loggedLine.strip()
-                outList.append(self.parseLine(loggedLine))
-        return outList
+            offset = 0 if startTime is None else self._findTimeOffset(f, self._getTimeStr(startTime))
+            timeStr = self._nextLogLine(f, offset)[1]
+        if timeStr is None:
+            return None
+        return self._getDatetime(timeStr)
+
+    def _getDatetime(self, line):
+        """!Return the datetime of a line that starts with a time stamp
+
+        Lines logged during the same second share most of the work.
+        """
+        secStr = line[0:19]
+        if secStr != self._secStr:
+            self._secDatetime = datetime.datetime(
+                int(line[0:4]), int(line[5:7]), int(line[8:10]),
+                int(line[11:13]), int(line[14:16]), int(line[17:19]),
+            )
+            self._secStr = secStr
+        return self._secDatetime.replace(microsecond=int(line[20:23]) * 1000)
+
+    def _getTimeStr(self, dateTime):
+        """!Format a datetime as a log time stamp ("yyyy-mm-dd HH:MM:SS.mmm"), for comparison with log lines
+        """
+        return "%s.%03d" % (dateTime.strftime("%Y-%m-%d %H:%M:%S"), dateTime.microsecond // 1000)
+
+    def _findTimeOffset(self, f, timeStr):
+        """!Return the offset of the first log line whose time stamp is at or after a given time
+
+        @param[in] f  log file, opened for reading
+        @param[in] timeStr  time as a log time stamp ("yyyy-mm-dd HH:MM:SS.mmm")
+        @return offset of that line, or the file size if there is no such line
+        """
+        f.seek(0, os.SEEK_END)
+        fileSize = f.tell()
+        minOffset, maxOffset = 0, fileSize
+        while minOffset < maxOffset:
+            midOffset = (minOffset + maxOffset) // 2
+            lineOffset, lineTimeStr = self._nextLogLine(f, midOffset)
+            if lineTimeStr is None or lineTimeStr >= timeStr:
+                maxOffset = midOffset
+            else:
+                minOffset = midOffset + 1
+        return self._nextLogLine(f, minOffset)[0] if minOffset < fileSize else fileSize
+
+    def _nextLogLine(self, f, offset):
+        """!Find the first log line (skipping continuation lines) that starts at or after the specified offset
+
+        @return (line offset, time stamp string); (file size, None) if there is no such line
+        """
+        if offset > 0:
+            # discard the rest of the line containing offset - 1, in order to start at the next line
+            f.seek(offset - 1)
+            f.readline()
+        else:
+            f.seek(0)
+        while True:
+            lineOffset = f.tell()
+            line = f.readline()
+            if not line:
+                return lineOffset, None
+            if self._LineRE.match(line.rstrip("\r\n")):
+                return lineOffset, line[0:self._TimeStrLen]
 
 # global log
 log = LogManager()
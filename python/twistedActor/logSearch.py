@@ -0,0 +1,236 @@
+from __future__ import absolute_import, division, print_function
+"""!Search actor log files written by FileLogger
+
+Log files are searched in parallel (one file per process), one time window at a time,
+and the matching messages are merged in time order.
+Use as a command-line tool: python -m twistedActor.logSearch --help
+"""
+import argparse
+import datetime
+import glob
+import heapq
+import multiprocessing
+import os
+import re
+import sys
+
+from RO.StringUtil import strFromException
+
+from .log import LogLineParser
+
+__all__ = ["LogFilter", "findLogFiles", "searchLogFiles"]
+
+class LogFilter(object):
+    """!Criteria for selecting log messages
+
+    A message is selected if it matches all specified criteria.
+    The command ID, user ID and device name criteria rely on the way twistedActor logs commands and replies:
+    - cmdID matches user commands (e.g. "UserCmd('5 move...") and replies (e.g. "writeToUsers('5 1 : ...")
+    - userID matches replies (e.g. "writeToUsers('5 1 : ...") and "userID=" fields
+    - devName matches devices and device commands (e.g. "TCPDevice(tcs)" or "DevCmd(TCPDevice(tcs), ...")
+    """
+    def __init__(self, startTime=None, endTime=None, cmdID=None, userID=None, devName=None, regex=None):
+        """!Construct a LogFilter
+
+        @param[in] startTime  ignore messages earlier than this time (a datetime, UTC); None for no limit
+        @param[in] endTime  ignore messages at or after this time (a datetime, UTC); None for no limit
+        @param[in] cmdID  select messages about this command ID (an int); None for all
+        @param[in] userID  select messages about this user ID (an int); None for all
+        @param[in] devName  select messages about this device (case matters); None for all
+        @param[in] regex  select messages that contain a match for this regular expression; None for all
+        """
+        self.startTime = startTime
+        self.endTime = endTime
+        self._reList = []
+        if cmdID is not None:
+            self._reList.append(re.compile(r"""\(['"]%d\s""" % (int(cmdID),)))
+        if userID is not None:
+            userID = int(userID)
+            self._reList.append(re.compile(r"""\(['"]\d+ %d \S|userID=%d\b""" % (userID, userID)))
+        if devName is not None:
+            self._reList.append(re.compile(r"\w\(%s[,)]" % (re.escape(devName),)))
+        if regex is not None:
+            self._reList.append(re.compile(regex))
+
+    def matches(self, msg):
+        """!Return True if a message matches the command ID, user ID, device and regex criteria
+
+        @param[in] msg  log message (without its time stamp)
+        """
+        for regex in self._reList:
+            if not regex.search(msg):
+                return False
+        return True
+
+def findLogFiles(pathList, pattern="*.log*"):
+    """!Return a sorted list of log files
+
+    @param[in] pathList  list of log files and/or directories of log files
+    @param[in] pattern  glob pattern for log files in directories; the default matches the names
+        of log files written by FileLogger and RotatingFileLogger (including rotated files)
+    """
+    filePathSet = set()
+    for path in pathList:
+        if os.path.isdir(path):
+            filePathSet.update(p for p in glob.glob(os.path.join(path, pattern)) if os.path.isfile(p))
+        else:
+            filePathSet.add(path)
+    return sorted(filePathSet)
+
+def _findFirstTime(args):
+    """!Return the time of the first message in a log file at or after a given time
+
+    @param[in] args  (file index, file path, start time (a datetime, UTC) or None for the start of the file);
+        a single argument so this can be used with Pool.map
+    @return (file index, time or None if there is no such message, error message or None if no error)
+    """
+    fileInd, filePath, startTime = args
+    try:
+        msgTime = LogLineParser().findFirstTime(filePath, startTime=startTime)
+        if msgTime is None and startTime is None and os.path.getsize(filePath) > 0:
+            return fileInd, None, "not a log file: no log lines found"
+        return fileInd, msgTime, None
+    except Exception as e:
+        return fileInd, None, strFromException(e)
+
+def _searchOneWindow(args):
+    """!Return the messages in one log file in a time window that match a filter
+
+    @param[in] args  (file index, file path, LogFilter, window start, window end);
+        a single argument so this can be used with Pool.map
+    @return (file index, result list, next time, error message), where:
+        - result list is a list of (datetime, file index, message index, message), in time order
+        - next time is the time of the first message at or after the end of the window, or None if none
+        - error message is None if the file was read successfully
+    """
+    fileInd, filePath, logFilter, startTime, endTime = args
+    parser = LogLineParser()
+    resultList = []
+    try:
+        msgIter = parser.iterLogFile(filePath, startTime=startTime, endTime=endTime)
+        for msgInd, (msgTime, msg) in enumerate(msgIter):
+            if logFilter.matches(msg):
+                resultList.append((msgTime, fileInd, msgInd, msg))
+        nextTime = parser.findFirstTime(filePath, startTime=endTime)
+    except Exception as e:
+        return fileInd, [], None, strFromException(e)
+    return fileInd, resultList, nextTime, None
+
+def searchLogFiles(filePathList, logFilter, numProcesses=None, windowSec=600):
+    """!Search log files, returning matching messages from all files in time order
+
+    Files are searched one time window at a time: each window is searched in all files in parallel,
+    and the matches are merged and returned before the next window is searched.
+    Thus results start to appear quickly and memory use is bounded by the number of matches in one window.
+    Windows in which no file has any messages are skipped.
+
+    Files that cannot be read or are not log files are reported to stderr and skipped.
+
+    @param[in] filePathList  list of log file paths
+    @param[in] logFilter  message selection criteria (a LogFilter)
+    @param[in] numProcesses  number of processes to use; if None then use one per CPU;
+        files are searched in the calling process if numProcesses = 1 or there is only one file
+    @param[in] windowSec  duration of each time window (sec)
+    @return an iterator that yields (datetime (UTC), file path, message)
+
+    @throw RuntimeError if windowSec <= 0
+    """
+    if windowSec <= 0:
+        raise RuntimeError("windowSec=%r must be > 0" % (windowSec,))
+    windowDuration = datetime.timedelta(seconds=windowSec)
+    pool = None
+    if numProcesses != 1 and len(filePathList) > 1:
+        pool = multiprocessing.Pool(processes=numProcesses)
+    mapFunc = map if pool is None else lambda func, argList: pool.map(func, argList, chunksize=1)
+    try:
+        # dict of file index: time of the next message to search, for files that have more messages to search
+        nextTimeDict = dict()
+        argList = [(fileInd, filePath, logFilter.startTime) for fileInd, filePath in enumerate(filePathList)]
+        for fileInd, nextTime, errMsg in mapFunc(_findFirstTime, argList):
+            if errMsg is not None:
+                sys.stderr.write("Warning: skipping log file %s: %s\n" % (filePathList[fileInd], errMsg))
+            elif nextTime is not None:
+                nextTimeDict[fileInd] = nextTime
+
+        while nextTimeDict:
+            windowStart = min(nextTimeDict.itervalues())
+            if logFilter.endTime is not None and windowStart >= logFilter.endTime:
+                break
+            windowEnd = windowStart + windowDuration
+            if logFilter.endTime is not None:
+                windowEnd = min(windowEnd, logFilter.endTime)
+            argList = [(fileInd, filePathList[fileInd], logFilter, windowStart, windowEnd)
+                for fileInd, nextTime in sorted(nextTimeDict.iteritems()) if nextTime < windowEnd]
+            resultLists = []
+            for fileInd, resultList, nextTime, errMsg in mapFunc(_searchOneWindow, argList):
+                if errMsg is not None:
+                    sys.stderr.write("Warning: skipping the rest of log file %s: %s\n" %
+                        (filePathList[fileInd], errMsg))
+                if nextTime is None:
+                    del nextTimeDict[fileInd]
+                else:
+                    nextTimeDict[fileInd] = nextTime
+                resultLists.append(resultList)
+            for msgTime, fileInd, msgInd, msg in heapq.merge(*resultLists):
+                yield msgTime, filePathList[fileInd], msg
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+def _parseTime(timeStr):
+    """!Parse a time string in one of several ISO-like formats (UTC) for the command-line interface
+    """
+    timeStr = timeStr.strip().replace("T", " ")
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(timeStr, fmt)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError("cannot parse time %r; use YYYY-MM-DD[ HH:MM[:SS[.ffffff]]]" % (timeStr,))
+
+def main(argv=None):
+    """!Search actor log files from the command line
+
+    @param[in] argv  command-line arguments, excluding the program name; if None then use sys.argv[1:]
+    """
+    argParser = argparse.ArgumentParser(
+        description = "Search actor log files, printing matching messages from all files in time order",
+    )
+    argParser.add_argument("paths", nargs="+", help="log files and/or directories of log files")
+    argParser.add_argument("--pattern", default="*.log*", help="glob pattern for log files in directories")
+    argParser.add_argument("--start", type=_parseTime, help="start time (UTC), e.g. 2015-03-04T12:00")
+    argParser.add_argument("--end", type=_parseTime, help="end time (UTC, exclusive)")
+    argParser.add_argument("--cmdid", type=int, help="command ID")
+    argParser.add_argument("--userid", type=int, help="user ID")
+    argParser.add_argument("--device", help="device name")
+    argParser.add_argument("--regex", help="regular expression to search for in messages")
+    argParser.add_argument("--processes", type=int, help="number of processes (default: one per CPU)")
+    argParser.add_argument("--window", type=float, default=600,
+        help="duration of the time window searched at once (sec); longer uses more memory")
+    args = argParser.parse_args(argv)
+
+    filePathList = findLogFiles(args.paths, pattern=args.pattern)
+    if not filePathList:
+        sys.stderr.write("No log files found\n")
+        return 1
+    logFilter = LogFilter(
+        startTime = args.start,
+        endTime = args.end,
+        cmdID = args.cmdid,
+        userID = args.userid,
+        devName = args.device,
+        regex = args.regex,
+    )
+    showFileName = len(filePathList) > 1
+    for msgTime, filePath, msg in searchLogFiles(filePathList, logFilter,
+        numProcesses=args.processes, windowSec=args.window):
+        timeStr = "%s.%03d" % (msgTime.strftime("%Y-%m-%d %H:%M:%S"), msgTime.microsecond // 1000)
+        if showFileName:
+            print("%s %s: %s" % (timeStr, os.path.basename(filePath), msg))
+        else:
+            print("%s %s" % (timeStr, msg))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 from __future__ import division, absolute_import
 
+import re
 import sys
+import threading
 
 import collections
 
@@ -31,59 +33,176 @@ class CommandDefinitionError(Exception):
 class ParseError(Exception):
     pass
 
+class _NoFastParse(Exception):
+    """Raised by the fast parser for input it does not handle; the input is then parsed using pyparsing
+    """
+    pass
+
+# The fast parser (see Command.parse) handles common, unambiguous commands without pyparsing:
+# space-separated tokens, each a keyword=value list or a bare value list, with list items separated
+# by commas (no spaces), and values that are unquoted words or numbers or quoted strings
+# without backslashes or "=". The regular expressions below match exactly what the corresponding
+# pyparsing elements (see PyparseItems) match, for such input. Anything else, including all input
+# that pyparsing rejects, is parsed using pyparsing, so both parsers give the same results and errors.
+_QuotedPattern = r"'[^'\\\r\n=]*'" + "|" + r'"[^"\\\r\n=]*"'
+_ItemPattern = r"""(?:%s|[^\s,'"=()\[\]\\]+)""" % (_QuotedPattern,)
+_TokenRE = re.compile(r"(?:(?P<key>[A-Za-z0-9][A-Za-z0-9_:.]*)=)?(?P<items>%s(?:,%s)*)(?: +|$)" % \
+    (_ItemPattern, _ItemPattern))
+_ItemRE = re.compile(_ItemPattern)
+_QuotedRE = re.compile(r"(?:%s)$" % (_QuotedPattern,))
+_WordRE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_:.]*$") # PyparseItems._word
+_StringRE = re.compile(r"[-A-Za-z0-9/:.]+$") # the unquoted alternative of PyparseItems.string
+_FloatRE = re.compile(r"[-+0-9][0-9]*(?:\.[0-9]*)?(?:[eE][-+0-9][0-9]*)?$") # PyparseItems.float
+# a sign not followed by a digit; pyparsing may match this as a float that float() cannot convert
+_BadSignRE = re.compile(r"[-+](?![0-9])")
+# characters the fast parser does not handle: whitespace other than spaces (pyparsing expands tabs,
+# which changes the result of RestOfLineString and the positions of matches) and backslashes
+_BadCharRE = re.compile(r"[\t\r\n\x0b\x0c\\]")
+
+def _fastFloat(item):
+    """Return an item as a float, as parsed by PyparseItems.float; raise _NoFastParse if that is not possible
+    """
+    if _FloatRE.match(item):
+        try:
+            return float(item)
+        except ValueError:
+            pass
+    raise _NoFastParse()
+
+def _pruneString(argString, stringPosList):
+    """Return argString without the characters in the specified ranges, stripped of surrounding whitespace
+
+    @param[in] argString  string to prune
+    @param[in] stringPosList  collection of (begPos, endPos) ranges to remove; ranges may overlap
+    """
+    prunedList = []
+    prevEndPos = 0
+    for begPos, endPos in sorted(stringPosList):
+        if begPos > prevEndPos:
+            prunedList.append(argString[prevEndPos:begPos])
+        prevEndPos = max(prevEndPos, endPos)
+    prunedList.append(argString[prevEndPos:])
+    # ditch surrounding whitespace, even though innocous
+    return "".join(prunedList).strip()
+
+def _isFastDatum(item):
+    """Return True if the fast parser can tell that PyparseItems.extractKeys will parse an item
+    as one value, without error
+    """
+    if item[0] in "'\"" or _WordRE.match(item) or _StringRE.match(item):
+        return True
+    try:
+        _fastFloat(item)
+    except _NoFastParse:
+        return False
+    return True
+
+_NotUnique = object() # marks a trie node that more than one value passes through
+
+class TrieMatchList(MatchList):
+    """A MatchList that finds unique matches using a prefix trie
+
+    The trie is built when the list of values is set, so getUniqueMatch takes time proportional
+    to the length of the prefix (rather than the number of values) and does not modify this object;
+    thus one TrieMatchList may be shared by parsers running in different threads.
+    Results and error messages are the same as for RO.Alg.MatchList.
+    """
+    def setList(self, valueList):
+        """Set the list of values to match and build the trie.
+        Non-string-like items are silently ignored.
+        """
+        MatchList.setList(self, valueList)
+        # each node is a dict of character: child node, plus None: the unique value with this prefix
+        # (or _NotUnique if there is more than one)
+        self._trie = {}
+        for valItem in self.valueList:
+            node = self._trie
+            self._addValue(node, valItem[-1])
+            for char in valItem[0]:
+                node = node.setdefault(char, {})
+                self._addValue(node, valItem[-1])
+
+    @staticmethod
+    def _addValue(node, value):
+        node[None] = value if None not in node else _NotUnique
+
+    def getUniqueMatch(self, prefix):
+        """If there is a unique match, return it, else raise ValueError.
+        """
+        if self.abbrevOK:
+            node = self._trie
+            for char in prefix.lower() if self.ignoreCase else prefix:
+                node = node.get(char)
+                if node is None:
+                    break
+            else:
+                value = node.get(None, _NotUnique)
+                if value is not _NotUnique:
+                    return value
+        # no unique match (or abbreviations are not allowed); let MatchList handle it and report errors
+        return MatchList.getUniqueMatch(self, prefix)
+
 class PyparseItems(object):
+    """Pyparsing elements used to build argument grammars
 
-    @property
-    def _word(self):
-        return pp.Word(pp.alphas + pp.alphanums, pp.alphas + '_:.' + pp.alphanums)
+    Each element is built once, when this object is constructed, and shared by all grammars that use it.
+    Do not modify a shared element (e.g. by calling setParseAction or setResultsName);
+    call its copy method first.
+    """
+    def __init__(self):
+        self._word = pp.Word(pp.alphas + pp.alphanums, pp.alphas + '_:.' + pp.alphanums)
 
-    @property
-    def float(self):
         # set up a float, allow scientific notation
         point = pp.Literal( "." )
         e     = pp.CaselessLiteral( "E" )
-        ppFloat = pp.Combine( pp.Word( "+-"+pp.nums, pp.nums ) +
+        self._float = pp.Combine( pp.Word( "+-"+pp.nums, pp.nums ) +
             pp.Optional( point + pp.Optional( pp.Word( pp.nums ) ) ) +
             pp.Optional( e + pp.Word( "+-"+pp.nums, pp.nums ) ) )
-        def onParse(token):
-            return float(token[0])
-        ppFloat.setParseAction(onParse)
-        return ppFloat
+        self._float.setParseAction(lambda token: float(token[0]))
+
+        self._int = pp.Word(pp.nums).setParseAction(lambda token: int(token[0]))
+
+        # copy pyparsing's predefined elements, rather than adding parse actions to them
+        self._restOfLine = pp.restOfLine.copy().setParseAction(lambda token: str(token[0]))
+
+        self._quotedStr = pp.quotedString.copy().setParseAction(lambda token: unquoteStr(token[0]))
+
+        self._string = self._quotedStr ^ pp.Word(pp.alphanums + "/:.-").setParseAction(lambda token: str(token[0]))
+
+        self._wordStr = self._word.copy().setParseAction(lambda token: str(token[0]))
+
+        datum = self._int ^ self._wordStr ^ self._string ^ self._quotedStr ^ self._float
+        # only extract any keywords where keyword=valueList, ignore everything else
+        self._extractKeys = pp.ZeroOrMore( self._wordStr + pp.Suppress(pp.Literal("=")) + pp.Suppress(self.list(datum)) ^ pp.Suppress(self.list(datum)))
+
+    @property
+    def float(self):
+        return self._float
 
     @property
     def int(self):
-        def onParse(token):
-            return int(token[0])
-        return pp.Word(pp.nums).setParseAction(onParse)
+        return self._int
 
     @property
     def restOfLine(self):
-        def onParse(token):
-            return str(token[0])
-        return pp.restOfLine.setParseAction(onParse)
+        return self._restOfLine
 
     @property
     def string(self):
-        def onParse(token):
-            return str(token[0])
-        return self.quotedStr ^ pp.Word(pp.alphanums + "/:.-").setParseAction(onParse)
+        return self._string
 
     @property
     def quotedStr(self):
-        def onParse(token):
-            return unquoteStr(token[0])
-        return pp.quotedString.setParseAction(onParse)
+        return self._quotedStr
 
     @property
     def word(self):
-        def onParse(tolken):
-            return str(tolken[0])
-        return self._word.setParseAction(onParse)
+        return self._wordStr
 
     def uniqueMatch(self, matchList):
-        """matchList: A RO MatchList object
+        """matchList: a list of values to match
         """
-        matchList = MatchList(matchList)
+        matchList = TrieMatchList(matchList)
         def onParse(tolken):
             kw = str(tolken[0])
             # see if keyword is in list, else raise a parse error
@@ -92,7 +211,7 @@ class PyparseItems(object):
             except ValueError:
                 raise ParseError("%s not uniquely defined in %s"%(kw, str(matchList.valueList)))
             return fullKW
-        return self._word.setParseAction(onParse)
+        return self._word.copy().setParseAction(onParse)
 
     # def keyVal(self, keyword, ppVal):
     #     """ keyword: string
@@ -103,9 +222,7 @@ class PyparseItems(object):
 
     @property
     def extractKeys(self):
-        datum = self.int ^ self.word ^ self.string ^ self.quotedStr ^ self.float
-        # only extract any keywords where keyword=valueList, ignore everything else
-        return pp.ZeroOrMore( self.word + pp.Suppress(pp.Literal("=")) + pp.Suppress(self.list(datum)) ^ pp.Suppress(self.list(datum)))
+        return self._extractKeys
 
 
     def list(self, ppVal):
@@ -173,10 +290,18 @@ class ArgumentBase(object):
                 raise CommandDefinitionError("could not cast possibleInt = %s to integer"%(possibleInt))
         return possibleInt
 
-    def scanString(self, stringToSearch):
+    def scanString(self, stringToSearch, pyparseItem=None):
+        """Find this argument's values in a string
+
+        @param[in] stringToSearch  string to search
+        @param[in] pyparseItem  pyparsing element to search for; if None then use self.pyparseItem
+        @return values and (begPos, endPos) of the match
+        """
+        if pyparseItem is None:
+            pyparseItem = self.pyparseItem
         # scanString returns a generator, it should be of length 1, call next to get it.
         # returns a pyparsing ParseResult and beg/end positions of the match
-        scanGenerator = self.pyparseItem.scanString(stringToSearch)
+        scanGenerator = pyparseItem.scanString(stringToSearch)
         pyparseResultObj, begPos, endPos = scanGenerator.next()
         # verify that this was a unique match (shouldn't have found more than one)
         try:
@@ -236,18 +361,44 @@ class Float(ArgumentBase):
     def __init__(self, nElements=1, helpStr="", repString=None):
         ArgumentBase.__init__(self, pyparseItems.float, nElements, helpStr, repString=repString)
 
+    def _fastParseItem(self, item):
+        """Parse one value without pyparsing; raise _NoFastParse if that is not possible
+        """
+        return _fastFloat(item)
+
 class Int(ArgumentBase):
     def __init__(self, nElements=1, helpStr="", repString=None):
         ArgumentBase.__init__(self, pyparseItems.int, nElements, helpStr, repString=repString)
 
+    def _fastParseItem(self, item):
+        """Parse one value without pyparsing; raise _NoFastParse if that is not possible
+        """
+        if not item.isdigit():
+            raise _NoFastParse()
+        return int(item)
+
 class String(ArgumentBase):
     def __init__(self, nElements=1, helpStr="", repString=None):
         ArgumentBase.__init__(self, pyparseItems.string, nElements, helpStr, repString=repString)
 
+    def _fastParseItem(self, item):
+        """Parse one value without pyparsing; raise _NoFastParse if that is not possible
+        """
+        if _QuotedRE.match(item):
+            return unquoteStr(item)
+        if not _StringRE.match(item):
+            raise _NoFastParse()
+        return str(item)
+
 class RestOfLineString(ArgumentBase):
     def __init__(self, helpStr="", repString=None):
         ArgumentBase.__init__(self, pyparseItems.restOfLine, nElements=1, helpStr=helpStr, repString=repString)
 
+    def _fastParseItem(self, item):
+        """Parse the rest of the line without pyparsing
+        """
+        return str(item)
+
 class Keyword(ArgumentBase):
     def __init__(self, keyword, nElements=1, helpStr="", repString=None):
         self.keyword = keyword
@@ -262,6 +413,8 @@ class Keyword(ArgumentBase):
         return returnStr
 
 class KeywordValue(Keyword):
+    _MaxPyparseItems = 64 # maximum number of cached pyparsing elements; see getPyparseItem
+
     def __init__(self, keyword, value, isMandatory=True, helpStr="", repString=None):
         """keyword: string
         value: must be of type ArgumentBase
@@ -271,6 +424,7 @@ class KeywordValue(Keyword):
         self.lowerBound = value.lowerBound
         self.upperBound = value.upperBound
         self._parsedAbbreviation = None
+        self._pyparseItemDict = {} # dict of abbreviation: pyparsing element; see getPyparseItem
         self.repString = repString
         # keywords may either appear once or not at all
         if not isinstance(value, ArgumentBase):
@@ -299,19 +453,52 @@ class KeywordValue(Keyword):
         return self._parsedAbbreviation
 
     def setParseAbbreviation(self, abbreviation):
+        """Set the abbreviation used by pyparseItem
+
+        The parsers do not use this (they call getPyparseItem), so it is safe to parse while it is set.
+        """
         self._parsedAbbreviation = abbreviation
 
     @property
     def pyparseItem(self):
-        return pp.Suppress(pp.Literal(self.parsedAbbreviation)) + pp.Suppress(pp.Literal("=")) + self.value.pyparseItem
+        return self.getPyparseItem(self.parsedAbbreviation)
+
+    def getPyparseItem(self, abbreviation):
+        """Return a pyparsing element matching abbreviation=value
+
+        Elements are cached by abbreviation (the cache is cleared if it grows too large);
+        the same element may be returned to different callers, so do not modify it.
+
+        @param[in] abbreviation  the keyword, as abbreviated in the command being parsed
+        """
+        pyparseItem = self._pyparseItemDict.get(abbreviation)
+        if pyparseItem is None:
+            pyparseItem = pp.Suppress(pp.Literal(abbreviation)) + pp.Suppress(pp.Literal("=")) + self.value.pyparseItem
+            # streamline now (pyparsing otherwise does it on first use) so parsing does not modify the element
+            pyparseItem.streamline()
+            if len(self._pyparseItemDict) >= self._MaxPyparseItems:
+                self._pyparseItemDict.clear()
+            self._pyparseItemDict[abbreviation] = pyparseItem
+        return pyparseItem
 
 class UniqueMatch(ArgumentBase):
     def __init__(self, matchList, nElements=1, helpStr="", repString=None):
         if not isSequence(matchList):
             raise CommandDefinitionError("matchlist must be a sequence")
         self.matchList = matchList
+        self._matchList = TrieMatchList(matchList)
         ArgumentBase.__init__(self, pyparseItems.uniqueMatch(matchList), nElements, helpStr, repString)
 
+    def _fastParseItem(self, item):
+        """Parse one value without pyparsing; raise _NoFastParse if that is not possible
+        """
+        if _WordRE.match(item):
+            try:
+                return self._matchList.getUniqueMatch(item)
+            except ValueError:
+                pass
+        raise _NoFastParse()
+
     def __repr__(self):
         returnStr = " | ".join(self.matchList)
         # is it optional?
@@ -321,11 +508,18 @@ class UniqueMatch(ArgumentBase):
         #     returnStr += "(help%s)"%(self.helpStr,)
         return returnStr
 
+# argument types the fast parser can parse as positional arguments and as keyword values;
+# subclasses are excluded because they may change the grammar
+_FastPositionalTypes = frozenset((Float, Int, String, RestOfLineString, UniqueMatch))
+_FastValueTypes = frozenset((Float, Int, String, UniqueMatch))
+
 class CommandSet(object):
-    def __init__(self, commandList, actorName="ACTOR"):
+    def __init__(self, commandList, actorName="ACTOR", cacheSize=0):
         """! Generate a command set
         @param[in] commandList: a list of Command objects
         @param[in] actorName: string name of the actor
+        @param[in] cacheSize: maximum number of parsed commands to cache (see parse); 0 to disable the cache
+        @throw RuntimeError if cacheSize < 0
         """
         # turn list of commands into a dictionary
         self.commandDict = collections.OrderedDict()
@@ -333,8 +527,41 @@ class CommandSet(object):
         for command in commandList:
             self.commandDict[command.commandName] = command
         self.createHelpCmd()
-        self.commandMatchList = MatchList(valueList = self.commandDict.keys())
+        self.commandMatchList = TrieMatchList(valueList = self.commandDict.keys())
         # explicitly set the "help command"
+        self._parseCache = collections.OrderedDict() # dict of command string: ParsedCommand, least recently used first
+        self._parseCacheLock = threading.Lock()
+        self.numCacheHits = 0
+        self.numCacheMisses = 0
+        self.cacheSize = 0
+        self.setCacheSize(cacheSize)
+
+    def setCacheSize(self, cacheSize):
+        """! Set the maximum number of parsed commands to cache, discarding the least recently used as needed
+
+        @param[in] cacheSize: maximum number of parsed commands to cache; 0 to disable the cache
+        @throw RuntimeError if cacheSize < 0
+        """
+        if cacheSize < 0:
+            raise RuntimeError("cacheSize=%r must be >= 0" % (cacheSize,))
+        with self._parseCacheLock:
+            self.cacheSize = int(cacheSize)
+            while len(self._parseCache) > self.cacheSize:
+                self._parseCache.popitem(last=False)
+
+    def clearCache(self):
+        """! Discard all cached parsed commands and reset numCacheHits and numCacheMisses
+        """
+        with self._parseCacheLock:
+            self._parseCache.clear()
+            self.numCacheHits = 0
+            self.numCacheMisses = 0
+
+    @property
+    def numCached(self):
+        """! Number of parsed commands in the cache
+        """
+        return len(self._parseCache)
 
     def createHelpCmd(self):
         """Create a help command add it to the command dict.
@@ -352,11 +579,40 @@ class CommandSet(object):
         """
         return self.commandDict[self.commandMatchList.getUniqueMatch(cmdName)]
 
-    def parse(self, cmdStr):
+    def parse(self, cmdStr, useFastParse=True):
         """! Parse a command string.
 
         @param[in] cmdStr, the command string to be parsed
+        @param[in] useFastParse  if True, try the fast parser first (see Command.parse);
+            if False, only use pyparsing
         @return ParsedCommand object
+
+        If the cache is enabled (cacheSize > 0) then successfully parsed commands are cached,
+        keyed by the command string without trailing whitespace (which does not affect the result);
+        each call returns a new copy of the cached ParsedCommand, so callers may modify it.
+        Commands that fail to parse are not cached.
+        """
+        if self.cacheSize <= 0:
+            return self._parse(cmdStr, useFastParse=useFastParse)
+        cacheKey = cmdStr.rstrip()
+        with self._parseCacheLock:
+            parsedCommand = self._parseCache.pop(cacheKey, None)
+            if parsedCommand is not None:
+                # reinsert to mark as most recently used
+                self._parseCache[cacheKey] = parsedCommand
+                self.numCacheHits += 1
+                return parsedCommand.copy()
+            self.numCacheMisses += 1
+        parsedCommand = self._parse(cmdStr, useFastParse=useFastParse)
+        with self._parseCacheLock:
+            if self.cacheSize > 0:
+                self._parseCache[cacheKey] = parsedCommand.copy()
+                while len(self._parseCache) > self.cacheSize:
+                    self._parseCache.popitem(last=False)
+        return parsedCommand
+
+    def _parse(self, cmdStr, useFastParse=True):
+        """! Parse a command string without using the cache; see parse
         """
         # use pyparsing instead? any advantage?
         # determine which command we are parsing
@@ -370,7 +626,25 @@ class CommandSet(object):
         cmdName = cmdName.strip()
         cmdArgs = cmdArgs.strip()
         cmdObj = self.getCommand(cmdName) # cmdName abbreviations allowed!
-        return cmdObj.parse(cmdArgs)
+        return cmdObj.parse(cmdArgs, useFastParse=useFastParse)
+
+    def _fastParse(self, cmdStr):
+        """! Parse a command string without pyparsing
+
+        @param[in] cmdStr, the command string to be parsed
+        @return ParsedCommand object
+        @throw _NoFastParse if the command cannot be parsed this way, including if it is invalid
+        """
+        try:
+            cmdName, cmdArgs = cmdStr.split(" ", 1)
+        except ValueError:
+            cmdName = cmdStr
+            cmdArgs = ""
+        try:
+            cmdObj = self.getCommand(cmdName.strip())
+        except (KeyError, ValueError):
+            raise _NoFastParse()
+        return cmdObj._fastParse(cmdArgs.strip())
 
     def toHTML(self, isSubCmdSet=False):
         htmlStr = ""
@@ -403,7 +677,13 @@ class ArgumentSet(object):
             if not isinstance(arg, ArgumentBase):
                 raise CommandDefinitionError("argument %s must be of type ArgumentBase"%arg)
             self.pyparseItem += arg.pyparseItem
+        # streamline now (pyparsing otherwise does it on first use) so parsing does not modify the element
+        self.pyparseItem.streamline()
         self.argumentList = argumentList
+        # the argument the fast parser can parse, if any; it only parses sets of one argument
+        self._fastArg = None
+        if len(argumentList) == 1 and type(argumentList[0]) in _FastPositionalTypes:
+            self._fastArg = argumentList[0]
 
     def parse(self, argString):
         """@param[in] argString: a string containing arguments to be parsed
@@ -422,6 +702,21 @@ class ArgumentSet(object):
             raise ParseError("could not parse positional args: %s"%argString)
         return ppOut
 
+    def _fastParse(self, argString):
+        """Parse a string of positional arguments without pyparsing
+
+        @param[in] argString: a string containing arguments to be parsed, with no surrounding whitespace
+        @throw _NoFastParse if the string cannot be parsed this way, including if it is invalid
+        """
+        if not argString:
+            if True in [arg.lowerBound>0 for arg in self.argumentList]:
+                raise _NoFastParse()
+            return []
+        if self._fastArg is None:
+            raise _NoFastParse()
+        # parse the whole string as one value (pyparsing requires exactly one)
+        return [self._fastArg._fastParseItem(argString)]
+
     def __nonzero__(self):
         return bool(self.argumentList)
 
@@ -450,6 +745,10 @@ class FloatingArgumentSet(ArgumentSet):
                 raise CommandDefinitionError("argument %s must be of type Keyword"%arg)
         for arg in floatingArguments:
             self.floatingArgDict[arg.keyword] = arg
+        self._argMatchList = TrieMatchList(valueList = self.floatingArgDict.keys())
+        # the fast parser only handles keyword=value arguments whose values it can parse
+        self._fastOK = all(type(arg) is KeywordValue and type(arg.value) in _FastValueTypes
+            for arg in self.floatingArgDict.itervalues())
 
     @property
     def argumentList(self):
@@ -457,7 +756,7 @@ class FloatingArgumentSet(ArgumentSet):
 
     @property
     def argMatchList(self):
-        return MatchList(valueList = self.floatingArgDict.keys())
+        return self._argMatchList
 
     def parse(self, argString):
         """@param[in] argString: a string containing keyword-type arguments to be
@@ -466,7 +765,8 @@ class FloatingArgumentSet(ArgumentSet):
         @ return tuple of parsedArguments and a string containing uncomsumed/unparsed elements
         """
         # figure out which keywords we got, abbreviations allowed!
-        gotKeys = set()
+        # parse state is kept in local variables (not in the argument definitions), so parsing is reentrant
+        abbrevDict = {} # dict of keyword: abbreviation as it appears in argString
         # searchString returns ParseResult
         try:
             abbrevKWs = pyparseItems.extractKeys.searchString(argString)[0]
@@ -475,14 +775,13 @@ class FloatingArgumentSet(ArgumentSet):
             abbrevKWs = []
         for abbrevKW in abbrevKWs:
             try:
-                keyword = self.argMatchList.getUniqueMatch(abbrevKW)
-                gotKeys.add(keyword)
+                keyword = self._argMatchList.getUniqueMatch(abbrevKW)
                 # associate this (potentially) abbreviated keyword with this argument
-                self.floatingArgDict[keyword].setParseAbbreviation(abbrevKW)
+                abbrevDict[keyword] = abbrevKW
             except:
                 raise ParseError("Could not identify keyword %s, as one of %s"%(abbrevKW, self.floatingArgDict.keys()))
         # determine which keywords were not received
-        missingKeys = set(self.floatingArgDict.keys()) - gotKeys
+        missingKeys = set(self.floatingArgDict.keys()) - set(abbrevDict)
         # ensure that any missing keys were optional arguments
         # else raise a ParseError
         for key in missingKeys:
@@ -491,23 +790,78 @@ class FloatingArgumentSet(ArgumentSet):
         # next parse values associated with the present keys
         parsedDict = {}
         stringPosList = []
-        for key in gotKeys:
-            parsedDict[key], begEndPos = self.floatingArgDict[key].scanString(argString)
+        for key, abbrevKW in abbrevDict.iteritems():
+            arg = self.floatingArgDict[key]
+            parsedDict[key], begEndPos = arg.scanString(argString, arg.getPyparseItem(abbrevKW))
             stringPosList.append(begEndPos)
         # based on beginning/end match positions in argString, prune string
-        # such that it contains only pieces not yet parsed that is
-        # only string characters not in any of the ranges collected by
-        # stringPosList
-        prunedString = ""
-        # look for possible way to speed up
-        # eg numpy indexing
-        # or operator.itemgetter?
-        for ind, char in enumerate(argString):
-            if not True in [beg<=ind<end for beg,end in stringPosList]:
-                prunedString += char
-        # ditch surrounding whitespace, even though innocous
-        prunedString = prunedString.strip()
-        return parsedDict, prunedString
+        # such that it contains only pieces not yet parsed
+        return parsedDict, _pruneString(argString, stringPosList)
+
+    def _fastParse(self, argString):
+        """Parse keyword-type arguments without pyparsing
+
+        @param[in] argString: a string containing keyword-type arguments to be parsed
+        @return tuple of parsedArguments and a string containing uncomsumed/unparsed elements
+        @throw _NoFastParse if the string cannot be parsed this way, including if it is invalid
+        """
+        if not self._fastOK or not isinstance(argString, str) or _BadCharRE.search(argString):
+            raise _NoFastParse()
+        if "=" not in argString:
+            # no keywords; that is all we need to know, as long as pyparsing can scan the string without error
+            if _BadSignRE.search(argString):
+                raise _NoFastParse()
+            for arg in self.floatingArgDict.itervalues():
+                if arg.isMandatory:
+                    raise _NoFastParse()
+            return {}, argString.strip()
+
+        # split into tokens, in one pass; make sure pyparsing would see the same tokens
+        keyTokenList = [] # list of (abbreviated keyword, begPos, endPos, list of items)
+        pos = len(argString) - len(argString.lstrip())
+        while pos < len(argString):
+            match = _TokenRE.match(argString, pos)
+            if not match:
+                raise _NoFastParse()
+            itemList = _ItemRE.findall(match.group("items"))
+            for item in itemList:
+                if not _isFastDatum(item):
+                    raise _NoFastParse()
+            abbrevKW = match.group("key")
+            if abbrevKW is not None:
+                keyTokenList.append((abbrevKW, match.start(), match.end("items"), itemList))
+            pos = match.end()
+
+        # pyparsing finds each keyword's value by searching for "abbreviation=" anywhere in the string,
+        # so an abbreviation that ends another (or is repeated) would be found in the wrong place
+        suffixSet = set() # proper suffixes of all abbreviations, then the abbreviations seen so far
+        for abbrevKW, begPos, endPos, itemList in keyTokenList:
+            suffixSet.update(abbrevKW[i:] for i in range(1, len(abbrevKW)))
+        for abbrevKW, begPos, endPos, itemList in keyTokenList:
+            if abbrevKW in suffixSet:
+                raise _NoFastParse()
+            suffixSet.add(abbrevKW)
+
+        argMatchList = self._argMatchList
+        parsedDict = {}
+        stringPosList = []
+        for abbrevKW, begPos, endPos, itemList in keyTokenList:
+            try:
+                keyword = argMatchList.getUniqueMatch(abbrevKW)
+            except ValueError:
+                raise _NoFastParse()
+            if keyword in parsedDict:
+                raise _NoFastParse()
+            value = self.floatingArgDict[keyword].value
+            values = [value._fastParseItem(item) for item in itemList]
+            if not value.lowerBound <= len(values) <= value.upperBound:
+                raise _NoFastParse()
+            parsedDict[keyword] = values
+            stringPosList.append((begPos, endPos))
+        for keyword, arg in self.floatingArgDict.iteritems():
+            if arg.isMandatory and keyword not in parsedDict:
+                raise _NoFastParse()
+        return parsedDict, _pruneString(argString, stringPosList)
 
 
 class Command(object):
@@ -537,16 +891,24 @@ class Command(object):
         self.floatingArgumentSet = FloatingArgumentSet(floatingArguments or [])
         self.helpStr=helpStr
 
-    def parse(self, argString):
+    def parse(self, argString, useFastParse=True):
         """! parse a raw command string
         @param[in] argString, string to be parsed.
+        @param[in] useFastParse  if True, try the fast parser first (see _fastParse) and use pyparsing
+            only if the fast parser cannot handle argString; if False, only use pyparsing
         """
+        if useFastParse:
+            try:
+                return self._fastParse(argString)
+            except _NoFastParse:
+                pass
+
         # first, look for subcommands.
 
         parsedCommand = ParsedCommand(self.commandName)
         if self.subCommandSet:
             # parse the remaining argument string just like a full command
-            parsedCommand.setSubCommand(self.subCommandSet.parse(argString))
+            parsedCommand.setSubCommand(self.subCommandSet.parse(argString, useFastParse=False))
         else:
             # look for floating arguments of type keyword=value in order
             # overwrite argString (remove the key=values after they have been parsed)
@@ -557,6 +919,24 @@ class Command(object):
             parsedCommand.setParsedPositionalArgs(self.positionalArgumentSet.parse(argString))
         return parsedCommand
 
+    def _fastParse(self, argString):
+        """! parse a raw command string without pyparsing
+
+        This is much faster than pyparsing, and gives the same result, but only handles common,
+        unambiguous commands (see the comments above _TokenRE).
+
+        @param[in] argString, string to be parsed.
+        @throw _NoFastParse if the string cannot be parsed this way, including if it is invalid
+        """
+        parsedCommand = ParsedCommand(self.commandName)
+        if self.subCommandSet:
+            parsedCommand.setSubCommand(self.subCommandSet._fastParse(argString))
+        else:
+            parsedFloatingArgs, argString = self.floatingArgumentSet._fastParse(argString)
+            parsedCommand.setParsedFloatingArgs(parsedFloatingArgs)
+            parsedCommand.setParsedPositionalArgs(self.positionalArgumentSet._fastParse(argString))
+        return parsedCommand
+
     def toHTML(self, headerSize=3):
         htmlStr = ""
         if self.subCommandSet is None:
@@ -603,15 +983,31 @@ class ParsedCommand(object):
     def setParsedPositionalArgs(self, parsedPositionalArgs):
         self.parsedPositionalArgs = parsedPositionalArgs
 
+    def copy(self):
+        """Return a copy that shares no lists or dicts with this one (the parsed values themselves are immutable)
+        """
+        parsedCmd = ParsedCommand(self.cmdName)
+        if self.subCommand is not None:
+            parsedCmd.subCommand = self.subCommand.copy()
+        if self.parsedPositionalArgs is not None:
+            parsedCmd.parsedPositionalArgs = list(self.parsedPositionalArgs)
+        if self.parsedFloatingArgs is not None:
+            parsedCmd.parsedFloatingArgs = dict((key, list(values))
+                for key, values in self.parsedFloatingArgs.iteritems())
+        return parsedCmd
+
+    def __eq__(self, other):
+        if not isinstance(other, ParsedCommand):
+            return NotImplemented
+        return (self.cmdName, self.subCommand, self.parsedPositionalArgs, self.parsedFloatingArgs) == \
+            (other.cmdName, other.subCommand, other.parsedPositionalArgs, other.parsedFloatingArgs)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
 
-
-
-
-
-
-
-
-
-
-
-
+    def __repr__(self):
+        return "%s(cmdName=%r, subCommand=%r, parsedPositionalArgs=%r, parsedFloatingArgs=%r)" % \
+            (type(self).__name__, self.cmdName, self.subCommand, self.parsedPositionalArgs, self.parsedFloatingArgs)
@@ -0,0 +1,133 @@
+from __future__ import absolute_import, division, print_function
+"""!A hashed timer wheel: many one-shot timers driven by a single reactor timer
+"""
+import math
+
+import RO.AddCallback
+from RO.Comm.TwistedTimer import Timer
+from twisted.internet import reactor
+
+__all__ = ["TimerWheel"]
+
+class WheelTimer(object):
+    """!A one-shot timer in a TimerWheel; returned by TimerWheel.add
+    """
+    __slots__ = ("callFunc", "_deadlineTick", "_slot", "_wheel")
+
+    def __init__(self, wheel, deadlineTick, callFunc):
+        self.callFunc = callFunc
+        self._deadlineTick = deadlineTick
+        self._slot = None # the set in TimerWheel._slotList containing this timer, while active
+        self._wheel = wheel
+
+    @property
+    def isActive(self):
+        """!Return True if the timer has not yet fired or been cancelled
+        """
+        return self._slot is not None
+
+    def cancel(self):
+        """!Cancel the timer; a no-op if the timer is not active
+
+        @return True if the timer was active, False otherwise
+        """
+        if self._slot is None:
+            return False
+        self._slot.discard(self)
+        self._slot = None
+        self._wheel._numTimers -= 1
+        return True
+
+    def __repr__(self):
+        return "%s(callFunc=%s, isActive=%s)" % (type(self).__name__, self.callFunc, self.isActive)
+
+
+class TimerWheel(object):
+    """!A hashed timer wheel
+
+    Manages any number of one-shot timers using a single RO.Comm.TwistedTimer.Timer,
+    which only runs while at least one timer is active. Adding and cancelling a timer are O(1)
+    and do not touch the reactor, making this much cheaper than a Timer per object when there are
+    many timers that are usually cancelled before they fire (such as command time limits).
+
+    Time is divided into ticks of length resolution; each timer is placed in slot
+    (deadline tick % numSlots) and slots are examined as the wheel turns.
+    Timers fire no earlier than requested and no more than about one resolution late.
+    """
+    def __init__(self, resolution=0.1, numSlots=512):
+        """!Construct a TimerWheel
+
+        @param[in] resolution  length of one tick (sec)
+        @param[in] numSlots  number of slots in the wheel; timers more than resolution * numSlots seconds
+            in the future are supported, but are examined once per turn of the wheel
+
+        @throw RuntimeError if resolution <= 0 or numSlots < 1
+        """
+        if resolution <= 0:
+            raise RuntimeError("resolution=%r must be > 0" % (resolution,))
+        if numSlots < 1:
+            raise RuntimeError("numSlots=%r must be >= 1" % (numSlots,))
+        self.resolution = float(resolution)
+        self.numSlots = int(numSlots)
+        self._slotList = [set() for i in range(self.numSlots)]
+        self._numTimers = 0
+        self._startTime = reactor.seconds() # time of tick 0
+        self._tick = 0 # the most recent tick whose timers have been processed
+        self._tickTimer = Timer()
+
+    def __len__(self):
+        """!Return the number of active timers
+        """
+        return self._numTimers
+
+    def add(self, sec, callFunc):
+        """!Start a one-shot timer
+
+        @param[in] sec  interval (sec); negative values are treated as 0
+        @param[in] callFunc  function to call when the timer fires; called with no arguments
+        @return the timer (a WheelTimer), which may be cancelled by calling its cancel method
+        """
+        deadlineTick = int(math.ceil((reactor.seconds() + max(0.0, sec) - self._startTime) / self.resolution))
+        deadlineTick = max(deadlineTick, self._tick + 1)
+        wheelTimer = WheelTimer(self, deadlineTick, callFunc)
+        slot = self._slotList[deadlineTick % self.numSlots]
+        slot.add(wheelTimer)
+        wheelTimer._slot = slot
+        self._numTimers += 1
+        if not self._tickTimer.isActive:
+            self._startTickTimer(reactor.seconds())
+        return wheelTimer
+
+    def _startTickTimer(self, currTime):
+        """!Start the reactor timer for the next tick
+        """
+        self._tickTimer.start(self._startTime + (self._tick + 1) * self.resolution - currTime, self._doTick)
+
+    def _doTick(self):
+        """!Fire all timers whose deadline has passed, then restart the reactor timer if any timers remain
+        """
+        currTime = reactor.seconds()
+        newTick = int((currTime - self._startTime) / self.resolution)
+        if newTick - self._tick >= self.numSlots:
+            # the reactor fell far behind; examine every slot once
+            tickList = range(self.numSlots)
+        else:
+            tickList = range(self._tick + 1, newTick + 1)
+        self._tick = max(newTick, self._tick)
+        expiredList = []
+        for tick in tickList:
+            slot = self._slotList[tick % self.numSlots]
+            if not slot:
+                continue
+            for wheelTimer in [wt for wt in slot if wt._deadlineTick <= newTick]:
+                slot.remove(wheelTimer)
+                wheelTimer._slot = None
+                self._numTimers -= 1
+                expiredList.append(wheelTimer)
+        for wheelTimer in sorted(expiredList, key=lambda wt: wt._deadlineTick):
+            RO.AddCallback.safeCall2("%s timer callFunc" % (self,), wheelTimer.callFunc)
+        if self._numTimers > 0 and not self._tickTimer.isActive:
+            self._startTickTimer(reactor.seconds())
+
+    def __repr__(self):
+        return "%s(resolution=%s, numTimers=%s)" % (type(self).__name__, self.resolution, self._numTimers)
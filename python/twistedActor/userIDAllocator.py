@@ -0,0 +1,48 @@
+from __future__ import absolute_import, division, print_function
+"""!Allocate user IDs: the lowest ID not in use
+"""
+import heapq
+
+__all__ = ["UserIDAllocator"]
+
+class UserIDAllocator(object):
+    """!Allocate user IDs, always choosing the lowest ID (>= 1) that is not in use
+
+    Released IDs are kept in a min-heap, so allocating and releasing an ID are O(log n)
+    in the number of released IDs waiting to be reused, rather than O(n) in the number of users.
+    """
+    def __init__(self):
+        self._freeHeap = [] # released IDs less than _nextID, as a min-heap
+        self._freeSet = set() # the same IDs as in _freeHeap, to catch IDs released twice
+        self._nextID = 1 # IDs >= _nextID have never been allocated
+
+    def __len__(self):
+        """!Return the number of IDs in use
+        """
+        return self._nextID - 1 - len(self._freeHeap)
+
+    def allocate(self):
+        """!Allocate and return the lowest ID that is not in use
+        """
+        if self._freeHeap:
+            userID = heapq.heappop(self._freeHeap)
+            self._freeSet.remove(userID)
+            return userID
+        userID = self._nextID
+        self._nextID += 1
+        return userID
+
+    def release(self, userID):
+        """!Release an ID, so it may be allocated again
+
+        @param[in] userID  ID to release, as returned by allocate
+
+        @throw RuntimeError if userID is not in use
+        """
+        if not 1 <= userID < self._nextID or userID in self._freeSet:
+            raise RuntimeError("userID=%r is not in use" % (userID,))
+        heapq.heappush(self._freeHeap, userID)
+        self._freeSet.add(userID)
+
+    def __repr__(self):
+        return "%s(numInUse=%s)" % (type(self).__name__, len(self))
@@ -0,0 +1,286 @@
+from __future__ import absolute_import, division, print_function
+"""!Output buffering for the users of an actor
+"""
+from collections import OrderedDict
+import re
+
+from RO.Comm.TwistedTimer import Timer
+from twisted.internet.interfaces import IPushProducer
+from zope.interface import implementer
+
+__all__ = ["UserOutput", "KeywordCoalescer", "splitKeywords"]
+
+# one keyword=value entry of a message: any text up to a semicolon that is not inside a quoted string
+_KeywordRE = re.compile(r"""(?:[^;"']|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')+""")
+
+def splitKeywords(msgStr):
+    """!Split a message in keyword=value format into its keywords
+
+    @param[in] msgStr  message string, without a header, e.g. 'foo=1, 2; text="a; b"'
+    @return a list of (keyword name, keyword=value string), e.g. [("foo", "foo=1, 2"), ("text", 'text="a; b"')];
+        surrounding whitespace is stripped and empty entries are omitted
+    """
+    keyList = []
+    for keyValStr in _KeywordRE.findall(msgStr):
+        keyValStr = keyValStr.strip()
+        if keyValStr:
+            keyList.append((keyValStr.split("=", 1)[0].strip(), keyValStr))
+    return keyList
+
+def _splitLine(lineBuf):
+    """!Split a line of output into msgCode and msgStr (ignoring the cmdID and userID)
+    """
+    fieldList = lineBuf.rstrip("\r\n").split(" ", 3)
+    if len(fieldList) < 3:
+        return "", ""
+    return fieldList[2], fieldList[3] if len(fieldList) > 3 else ""
+
+
+@implementer(IPushProducer)
+class UserOutput(object):
+    """!Output buffer for one user socket
+
+    Lines are either written to the socket as soon as they arrive,
+    or (if batching is enabled) held until flush is called, at which point all pending lines
+    are written with a single socket write. Either way lines are written in the order received.
+
+    UserOutput is also a streaming producer (twisted.internet.interfaces.IPushProducer)
+    for the socket's transport: while the transport's own buffer is full, output is queued here instead,
+    and the queue is bounded by maxLines. Once that many lines are waiting, the overflow policy is applied:
+    - DropInfo: discard new informational ("i" and "d") lines
+    - Collapse: a new informational line replaces a waiting line with the same message code and keywords
+        (thus only the newest value is sent); informational lines that do not supersede anything are discarded
+    - Disconnect: close the socket (on the next iteration of the reactor, so the socket is not closed
+        while the actor is writing to its users); output for that user is discarded from then on
+    Other lines (warnings, failures and done messages) are never discarded.
+    """
+    DropInfo = "dropinfo"
+    Collapse = "collapse"
+    Disconnect = "disconnect"
+    _Policies = frozenset((DropInfo, Collapse, Disconnect))
+    _InfoCodes = frozenset(("i", "I", "d", "D"))
+
+    def __init__(self, sock, doBatch=False, maxLines=5000, policy=DropInfo):
+        """!Construct a UserOutput
+
+        @param[in] sock  user socket (an RO.Comm.TwistedSocket.TCPSocket or similar)
+        @param[in] doBatch  if True hold lines until flush is called, else write each line immediately
+        @param[in] maxLines  maximum number of lines to hold before applying the overflow policy
+        @param[in] policy  overflow policy: one of DropInfo, Collapse or Disconnect
+
+        @throw RuntimeError if maxLines < 1 or policy is not recognized
+        """
+        self.sock = sock
+        self.doBatch = bool(doBatch)
+        self.setQueueLimit(maxLines=maxLines, policy=policy)
+        self.isPaused = False # True while the transport's buffer is full
+        self.numDropped = 0 # number of lines discarded by the overflow policy
+        self.isClosing = False # True once the Disconnect policy has asked to close the socket
+        self._lineList = []
+        self._numBytes = 0
+        self._numDead = 0 # number of entries in _lineList superseded by newer lines (set to "")
+        self._keyIndexDict = None # dict of (msgCode, keyword names): index in _lineList; used by Collapse
+
+    @property
+    def numBytes(self):
+        """!Number of bytes waiting to be written
+        """
+        return self._numBytes
+
+    @property
+    def numLines(self):
+        """!Number of lines waiting to be written
+        """
+        return len(self._lineList) - self._numDead
+
+    def setBatch(self, doBatch):
+        """!Enable or disable batching; pending lines are written if batching is disabled
+        """
+        self.doBatch = bool(doBatch)
+        if not self.doBatch:
+            self.flush()
+
+    def setQueueLimit(self, maxLines, policy):
+        """!Set the maximum number of queued lines and the overflow policy
+
+        @param[in] maxLines  maximum number of lines to hold before applying the overflow policy
+        @param[in] policy  overflow policy: one of DropInfo, Collapse or Disconnect
+
+        @throw RuntimeError if maxLines < 1 or policy is not recognized
+        """
+        if maxLines < 1:
+            raise RuntimeError("maxLines=%r must be >= 1" % (maxLines,))
+        if policy not in self._Policies:
+            raise RuntimeError("policy=%r must be one of %s" % (policy, sorted(self._Policies)))
+        self.maxLines = int(maxLines)
+        self.policy = policy
+
+    def writeLine(self, lineBuf):
+        """!Write or queue one line of output
+
+        @param[in] lineBuf  line to write, including the line terminator;
+            the same buffer may be shared among many users, so it is never modified
+
+        @return the number of bytes waiting to be written
+        """
+        if self.isClosing:
+            self.numDropped += 1
+            return 0
+        if not (self.doBatch or self.isPaused):
+            self.sock.write(lineBuf)
+            return 0
+        if self.numLines >= self.maxLines and not self._handleOverflow(lineBuf):
+            return self._numBytes
+        self._lineList.append(lineBuf)
+        self._numBytes += len(lineBuf)
+        return self._numBytes
+
+    def flush(self):
+        """!Write all pending lines using a single socket write
+
+        A no-op while the transport is paused
+        """
+        if self.isPaused or not self._lineList:
+            return
+        data = "".join(self._lineList)
+        self.clear()
+        self.sock.write(data)
+
+    def clear(self):
+        """!Discard pending output, e.g. because the socket has closed
+        """
+        self._lineList = []
+        self._numBytes = 0
+        self._numDead = 0
+        self._keyIndexDict = None
+
+    def pauseProducing(self):
+        """!The transport's buffer is full; queue output until resumeProducing is called
+        """
+        self.isPaused = True
+
+    def resumeProducing(self):
+        """!The transport's buffer has drained; write queued output
+
+        Queued output is written even if batching is enabled, because a flush requested
+        while the transport was paused did nothing and may not be requested again.
+        """
+        self.isPaused = False
+        self.flush()
+
+    def stopProducing(self):
+        """!The connection is gone; discard queued output
+        """
+        self.clear()
+
+    def _handleOverflow(self, lineBuf):
+        """!Apply the overflow policy to a new line
+
+        @return True if lineBuf should be queued, False if it was discarded
+        """
+        if self.policy == self.Disconnect:
+            self.numDropped += self.numLines + 1
+            self.clear()
+            self.isClosing = True
+            # closing the socket calls the actor's state callback, which must not happen during writeToUsers
+            Timer(0, self.sock.close, isOK=False,
+                reason="output queue overflow: more than %s lines waiting" % (self.maxLines,))
+            return False
+
+        msgCode, msgStr = _splitLine(lineBuf)
+        if msgCode not in self._InfoCodes:
+            return True
+        if self.policy == self.Collapse:
+            return self._collapse(lineBuf, msgCode, msgStr)
+        self.numDropped += 1
+        return False
+
+    def _collapse(self, lineBuf, msgCode, msgStr):
+        """!Queue an informational line in place of a waiting line with the same keywords
+
+        @return True if lineBuf should be queued, False if it was discarded
+        """
+        if self._keyIndexDict is None:
+            # index the waiting informational lines
+            self._keyIndexDict = dict()
+            for ind, oldLineBuf in enumerate(self._lineList):
+                oldMsgCode, oldMsgStr = _splitLine(oldLineBuf)
+                if oldMsgCode in self._InfoCodes:
+                    self._keyIndexDict[self._getCollapseKey(oldMsgCode, oldMsgStr)] = ind
+        collapseKey = self._getCollapseKey(msgCode, msgStr)
+        oldInd = self._keyIndexDict.get(collapseKey)
+        self.numDropped += 1
+        if oldInd is None:
+            return False
+        self._numBytes -= len(self._lineList[oldInd])
+        self._lineList[oldInd] = ""
+        self._numDead += 1
+        self._keyIndexDict[collapseKey] = len(self._lineList)
+        return True
+
+    @staticmethod
+    def _getCollapseKey(msgCode, msgStr):
+        return (msgCode, tuple(name for name, keyValStr in splitKeywords(msgStr)))
+
+    def __repr__(self):
+        return "%s(sock=%s, doBatch=%s, numLines=%s)" % (type(self).__name__, self.sock, self.doBatch, self.numLines)
+
+
+class KeywordCoalescer(object):
+    """!Collect keyword=value output, retaining only the newest value of each keyword
+
+    Intended for status that is output more often than users need to see it:
+    add messages as they are generated and periodically output the result of pop.
+    """
+    def __init__(self, ignoreKeywords=("text", "UserInfo")):
+        """!Construct a KeywordCoalescer
+
+        @param[in] ignoreKeywords  names of keywords that must not be coalesced (case is ignored);
+            messages containing any of these keywords are rejected by add.
+            The defaults are keywords that are not status, or that are output once per item of a list.
+        """
+        self.ignoreKeywordSet = frozenset(name.lower() for name in ignoreKeywords)
+        self.numAdded = 0 # number of keywords added
+        self.numOutput = 0 # number of keywords returned by pop
+        self._keyDict = OrderedDict() # dict of lowercase keyword name: keyword=value string
+
+    def __len__(self):
+        """!Return the number of keywords waiting to be output
+        """
+        return len(self._keyDict)
+
+    def add(self, msgStr):
+        """!Add the keywords in a message, replacing older values of the same keywords
+
+        @param[in] msgStr  message in keyword=value format, without a header
+        @return True if the keywords were added, False if the message cannot be coalesced
+            (it contains no keywords or at least one keyword in ignoreKeywords)
+        """
+        keyList = splitKeywords(msgStr)
+        if not keyList:
+            return False
+        keyList = [(name.lower(), keyValStr) for name, keyValStr in keyList]
+        for lowName, keyValStr in keyList:
+            if lowName in self.ignoreKeywordSet:
+                return False
+        for lowName, keyValStr in keyList:
+            # delete first so the keyword moves to the end, preserving the order in which values were last set
+            self._keyDict.pop(lowName, None)
+            self._keyDict[lowName] = keyValStr
+        self.numAdded += len(keyList)
+        return True
+
+    def pop(self):
+        """!Return the newest value of each keyword as a single message and clear the collection
+
+        @return message in keyword=value format, or "" if there are no keywords
+        """
+        if not self._keyDict:
+            return ""
+        msgStr = "; ".join(self._keyDict.itervalues())
+        self.numOutput += len(self._keyDict)
+        self._keyDict = OrderedDict()
+        return msgStr
+
+    def __repr__(self):
+        return "%s(numKeywords=%s)" % (type(self).__name__, len(self))
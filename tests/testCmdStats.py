@@ -0,0 +1,100 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test command statistics
+"""
+import random
+import unittest
+
+from twistedActor import BaseCmd, CommandQueue, DevCmd, LatencyHistogram, UserCmd, startCmdStats, stopCmdStats
+
+class FakeDev(object):
+    name = "fakeDev"
+
+class LatencyHistogramTest(unittest.TestCase):
+    def testPercentiles(self):
+        hist = LatencyHistogram()
+        self.assertEqual(hist.getPercentile(50), 0)
+        random.seed(1)
+        durationList = [random.uniform(1e-5, 10) * 10**random.uniform(-3, 0) for i in range(20000)]
+        for duration in durationList:
+            hist.record(duration)
+        durationList.sort()
+        self.assertEqual(hist.count, len(durationList))
+        self.assertAlmostEqual(hist.mean, sum(durationList) / len(durationList))
+        self.assertEqual(hist.max, durationList[-1])
+        for percent in (1, 50, 95, 99, 99.9):
+            trueVal = durationList[int(len(durationList) * percent / 100.) - 1]
+            self.assertLessEqual(abs(hist.getPercentile(percent) - trueVal), trueVal / hist.NumSubBuckets)
+        self.assertEqual(hist.getPercentile(100), durationList[-1])
+        hist.reset()
+        self.assertEqual(hist.count, 0)
+
+    def testExtremes(self):
+        hist = LatencyHistogram()
+        for duration in (-1, 0, 1e-9, 1e9):
+            hist.record(duration)
+        self.assertEqual(hist.count, 4)
+        self.assertLess(hist.getPercentile(75), 2e-6) # durations below 1 microsecond share one bucket
+        self.assertEqual(hist.getPercentile(100), 1e9)
+
+
+class CmdStatsTest(unittest.TestCase):
+    def setUp(self):
+        stopCmdStats()
+        self.cmdStats = startCmdStats()
+
+    def tearDown(self):
+        stopCmdStats()
+
+    def testCounts(self):
+        self.assertIs(startCmdStats(), self.cmdStats)
+        for endState in (BaseCmd.Done, BaseCmd.Done, BaseCmd.Failed, BaseCmd.Cancelled):
+            cmd = UserCmd(cmdStr="1 move")
+            cmd.cmdVerb = "move"
+            cmd.setState(cmd.Running)
+            cmd.setState(endState)
+        cmd = UserCmd(cmdStr="2 move")
+        cmd.cmdVerb = "move"
+        cmd._timeout()
+        devCmd = DevCmd(cmdStr="go", dev=FakeDev())
+        devCmd.setState(devCmd.Done)
+        # commands with no verb or device are not counted
+        BaseCmd("sub").setState(BaseCmd.Done)
+
+        moveCounts = self.cmdStats.verbDict["move"]
+        self.assertEqual(
+            (moveCounts.numStarted, moveCounts.numDone, moveCounts.numFailed, moveCounts.numCancelled,
+                moveCounts.numTimedOut),
+            (5, 2, 2, 1, 1),
+        )
+        self.assertEqual(moveCounts.latency.count, 5)
+        devCounts = self.cmdStats.devDict["fakeDev"]
+        self.assertEqual((devCounts.numStarted, devCounts.numDone), (1, 1))
+        totals = self.cmdStats.getTotals()
+        self.assertEqual((totals.numStarted, totals.numTimedOut, totals.latency.count), (5, 1, 5))
+
+        self.cmdStats.reset()
+        self.assertEqual(self.cmdStats.verbDict, {})
+        self.assertEqual(self.cmdStats.getTotals().numStarted, 0)
+
+    def testQueueWait(self):
+        cmdQueue = CommandQueue(priorityDict={"move": 1})
+        cmdList = [UserCmd(cmdStr="%d move" % (ind,)) for ind in range(3)]
+        for cmd in cmdList:
+            cmd.cmdVerb = "move"
+            cmdQueue.addCmd(cmd, lambda cmd: None)
+        for cmd in cmdList:
+            cmdQueue.runQueue()
+            cmd.setState(cmd.Done)
+        self.assertEqual(self.cmdStats.queueWaitDict["move"].count, 3)
+
+    def testOff(self):
+        stopCmdStats()
+        cmd = UserCmd(cmdStr="1 move")
+        cmd.cmdVerb = "move"
+        cmd.setState(cmd.Done)
+        self.assertEqual(self.cmdStats.verbDict, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
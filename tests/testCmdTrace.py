@@ -0,0 +1,83 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test command tracing
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from twistedActor import BaseCmd, DevCmd, LinkCommands, UserCmd, startCmdTracing, stopCmdTracing
+
+class CmdTraceTest(unittest.TestCase):
+    def tearDown(self):
+        stopCmdTracing()
+
+    def testSpans(self):
+        tracer = startCmdTracing()
+        userCmd = UserCmd(userID=2, cmdStr="5 move")
+        subCmdList = [BaseCmd("sub%d" % (ind,)) for ind in range(2)]
+        userCmd.linkCommands(subCmdList)
+        devCmd = DevCmd(cmdStr="move", userCmd=subCmdList[0])
+        devCmd.setState(devCmd.Running)
+        devCmd.setState(devCmd.Done)
+        subCmdList[1].setState(BaseCmd.Failed, textMsg="broken")
+        self.assertTrue(userCmd.didFail)
+        self.assertEqual(tracer.numRecorded, 4)
+
+        spanDict = dict((span["name"], span) for span in tracer.getSpans())
+        userSpan = spanDict["5 move"]
+        devSpan = spanDict["move"]
+        self.assertEqual(userSpan["ph"], "X")
+        self.assertEqual(userSpan["cat"], "UserCmd")
+        self.assertEqual(userSpan["args"]["parentID"], None)
+        self.assertEqual([state for state, stateTime in userSpan["args"]["states"]], ["running", "failed"])
+        self.assertEqual([state for state, stateTime in devSpan["args"]["states"]], ["running", "done"])
+        self.assertEqual(spanDict["sub0"]["args"]["parentID"], userSpan["args"]["traceID"])
+        self.assertEqual(spanDict["sub0"]["args"]["relation"], "link")
+        self.assertEqual(devSpan["args"]["parentID"], spanDict["sub0"]["args"]["traceID"])
+        self.assertEqual(devSpan["args"]["relation"], "track")
+        self.assertEqual(spanDict["sub1"]["args"]["textMsg"], "broken")
+        # all spans share the eldest parent's trace ID as thread ID
+        for span in spanDict.itervalues():
+            self.assertEqual(span["tid"], userSpan["args"]["traceID"])
+            self.assertGreaterEqual(span["dur"], 0)
+        self.assertGreaterEqual(devSpan["ts"], userSpan["ts"])
+        self.assertLessEqual(devSpan["ts"] + devSpan["dur"], userSpan["ts"] + userSpan["dur"])
+
+    def testRingBuffer(self):
+        tracer = startCmdTracing(numSpans=5)
+        for ind in range(12):
+            BaseCmd("cmd%d" % (ind,)).setState(BaseCmd.Done)
+        self.assertEqual(tracer.numRecorded, 12)
+        self.assertEqual([span["name"] for span in tracer.getSpans()], ["cmd%d" % (ind,) for ind in range(7, 12)])
+
+    def testTraceFile(self):
+        fd, filePath = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            startCmdTracing(filePath=filePath)
+            mainCmd = BaseCmd("main")
+            subCmd = BaseCmd("sub")
+            LinkCommands(mainCmd, [subCmd])
+            subCmd.setState(BaseCmd.Done)
+            self.assertTrue(mainCmd.isDone)
+            tracer = stopCmdTracing()
+            self.assertIsNone(BaseCmd._Tracer)
+            with open(filePath, "r") as f:
+                eventList = json.load(f)
+            self.assertEqual(eventList, json.loads(json.dumps(tracer.getSpans())))
+            self.assertEqual(eventList[0]["args"]["relation"], "linkCommands")
+        finally:
+            os.remove(filePath)
+
+    def testOff(self):
+        self.assertIsNone(BaseCmd._Tracer)
+        cmd = BaseCmd("cmd")
+        cmd.setState(cmd.Done)
+        tracer = startCmdTracing()
+        self.assertEqual(tracer.getSpans(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test command state handling and callbacks
+"""
+import unittest
+
+from twistedActor import BaseCmd, CommandError, UserCmd
+
+class CommandStateTest(unittest.TestCase):
+    def testStateProperties(self):
+        for state in BaseCmd.AllStates:
+            cmd = UserCmd(cmdStr="1 foo")
+            cmd.setState(state)
+            self.assertEqual(cmd.state, state)
+            self.assertEqual(cmd.isActive, state in BaseCmd.ActiveStates)
+            self.assertEqual(cmd.isDone, state in BaseCmd.DoneStates)
+            self.assertEqual(cmd.didFail, state in BaseCmd.FailedStates)
+            self.assertEqual(cmd.isFailing, state in BaseCmd.FailingStates)
+            self.assertEqual(cmd.msgCode, BaseCmd._MsgCodeDict[state])
+
+    def testTransitions(self):
+        for oldState in BaseCmd.AllStates:
+            for newState in BaseCmd.AllStates:
+                cmd = UserCmd(cmdStr="1 foo")
+                cmd.setState(oldState)
+                if oldState in BaseCmd.DoneStates or (oldState in BaseCmd.ActiveStates and newState == BaseCmd.Ready):
+                    self.assertRaises(RuntimeError, cmd.setState, newState)
+                    self.assertEqual(cmd.state, oldState)
+                else:
+                    cmd.setState(newState)
+                    self.assertEqual(cmd.state, newState)
+        cmd = UserCmd(cmdStr="1 foo")
+        self.assertRaises(RuntimeError, cmd.setState, "bogus")
+        self.assertEqual(cmd.state, BaseCmd.Ready)
+
+
+class CommandCallbackTest(unittest.TestCase):
+    def testAddRemove(self):
+        calledList = []
+        funcList = [lambda cmd, i=i: calledList.append(i) for i in range(3)]
+        cmd = BaseCmd("foo")
+        self.assertFalse(cmd.removeCallback(funcList[0], doRaise=False))
+        self.assertRaises(ValueError, cmd.removeCallback, funcList[0])
+        for func in funcList + funcList:
+            cmd.addCallback(func)
+        cmd.setState(cmd.Running)
+        self.assertEqual(calledList, [0, 1, 2])
+        self.assertTrue(cmd.removeCallback(funcList[1]))
+        self.assertTrue(cmd.removeCallback(funcList[0]))
+        self.assertFalse(cmd.removeCallback(funcList[0], doRaise=False))
+        del calledList[:]
+        cmd.setState(cmd.Cancelling)
+        self.assertEqual(calledList, [2])
+        self.assertTrue(cmd.removeCallback(funcList[2]))
+        cmd.addCallback(funcList[1], callNow=True)
+        self.assertEqual(calledList, [2, 1])
+        cmd.setState(cmd.Cancelled)
+        self.assertEqual(calledList, [2, 1, 1])
+        # callbacks are removed when the command is done; new callbacks are called at once
+        self.assertFalse(cmd.removeCallback(funcList[1], doRaise=False))
+        cmd.addCallback(funcList[0])
+        self.assertEqual(calledList, [2, 1, 1, 0])
+
+    def testModifyDuringCallbacks(self):
+        calledList = []
+        cmd = BaseCmd("foo")
+        def removeSelf(cmd):
+            calledList.append("removeSelf")
+            cmd.removeCallback(removeSelf)
+            cmd.addCallback(other)
+        def other(cmd):
+            calledList.append("other")
+        cmd.addCallback(removeSelf)
+        cmd.setState(cmd.Running)
+        self.assertEqual(calledList, ["removeSelf"])
+        cmd.setState(cmd.Done)
+        self.assertEqual(calledList, ["removeSelf", "other"])
+
+    def testCallbackError(self):
+        calledList = []
+        def badFunc(cmd):
+            raise RuntimeError("test error; please ignore")
+        cmd = BaseCmd("foo")
+        cmd.addCallback(badFunc)
+        cmd.addCallback(lambda cmd: calledList.append(cmd.state))
+        cmd.setState(cmd.Done)
+        self.assertEqual(calledList, [cmd.Done])
+        self.assertTrue(cmd.callbacksEnabled())
+
+
+class UserCmdParseTest(unittest.TestCase):
+    """Test parsing of user command strings
+    """
+    def testMatchesRegEx(self):
+        """Check that UserCmd._splitHeader gives the same result as matching _HeaderBodyRE
+        """
+        cmdStrList = ["", "move", "_move", "Move 1 2", "5 move", "5 6 move", "5 6 7 move", "5", "5 ", "5 6 ",
+            " move", "5  move", "5\tmove", "5 \tmove  x", "5 6\t move", "5\n", "move\n", "move\nx", "5 move\n",
+            "1.5 move", "-5 move", "5 -move", "5move", "move 5 6", "5 6 7", "5 _x", "5 6 _x", "12 34 status  ",
+            "5 move\r", "\tmove", "5 6", "5 6x move"]
+        for cmdStr in cmdStrList:
+            cmdMatch = UserCmd._HeaderBodyRE.match(cmdStr)
+            if cmdMatch:
+                predResult = (cmdMatch.group("cmdID") or "", cmdMatch.group("cmdBody") or "")
+            else:
+                predResult = None
+            self.assertEqual(UserCmd._splitHeader(cmdStr), predResult, "cmdStr=%r" % (cmdStr,))
+
+    def testVerbArgs(self):
+        """Check cmdID, cmdBody, cmdVerb and cmdArgs
+        """
+        for cmdStr, cmdID, cmdBody, cmdVerb, cmdArgs in (
+            ("15 Move 1.5  2", 15, "Move 1.5  2", "move", "1.5  2"),
+            ("15 4 status", 15, "status", "status", ""),
+            ("status ", 0, "status ", "status", ""),
+            ("3 init\tx ", 3, "init\tx ", "init", "x "),
+        ):
+            cmd = UserCmd(userID=1, cmdStr=cmdStr)
+            self.assertEqual(cmd.cmdID, cmdID)
+            self.assertEqual(cmd.cmdBody, cmdBody)
+            # only commands read from users get a verb
+            self.assertFalse(hasattr(cmd, "cmdVerb"))
+            cmd.setVerbArgs()
+            self.assertEqual(cmd.cmdVerb, cmdVerb)
+            self.assertEqual(cmd.cmdArgs, cmdArgs)
+
+        for cmdStr in ("", "5 "):
+            cmd = UserCmd(userID=1, cmdStr=cmdStr)
+            self.assertEqual(cmd.cmdBody, "")
+            cmd.setVerbArgs()
+            self.assertEqual(cmd.cmdVerb, "")
+            self.assertEqual(cmd.cmdArgs, "")
+
+        for cmdStr in ("5", " move", "5 6 7 move"):
+            self.assertRaises(CommandError, UserCmd, userID=1, cmdStr=cmdStr)
+
+
+if __name__ == "__main__":
+    unittest.main()
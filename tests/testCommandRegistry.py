@@ -0,0 +1,109 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test CommandRegistry and the cached eldest parent command
+"""
+import unittest
+
+from twistedActor import BaseCmd, CommandRegistry, DevCmd, LinkCommands, UserCmd
+
+class CommandRegistryTest(unittest.TestCase):
+    def testLookup(self):
+        registry = CommandRegistry()
+        userCmd = UserCmd(userID=3, cmdStr="12 move")
+        devCmd = DevCmd(cmdStr="move", userCmd=userCmd)
+        registry.add(userCmd)
+        registry.add(devCmd)
+        self.assertEqual(len(registry), 2)
+        self.assertIs(registry.getUserCmd(3, 12), userCmd)
+        self.assertIs(registry.getDevCmd(devCmd.locCmdID), devCmd)
+        self.assertIsNone(registry.getUserCmd(3, 13))
+        self.assertIsNone(registry.getDevCmd(devCmd.locCmdID + 1))
+
+        # finishing the device command finishes the user command; both are removed
+        devCmd.setState(devCmd.Done)
+        self.assertTrue(userCmd.isDone)
+        self.assertEqual(len(registry), 0)
+        self.assertIsNone(registry.getUserCmd(3, 12))
+        self.assertIsNone(registry.getDevCmd(devCmd.locCmdID))
+
+        # done commands are not added
+        registry.add(userCmd)
+        self.assertEqual(len(registry), 0)
+
+    def testNoCallback(self):
+        """Registering a command adds no callback, so setState can use its no-callback fast path
+        """
+        registry = CommandRegistry()
+        cmd = UserCmd(userID=1, cmdStr="1 move")
+        registry.add(cmd)
+        self.assertIsNone(cmd._callbacks)
+        cmd.setState(cmd.Running)
+        self.assertIn(cmd, registry)
+        cmd.setState(cmd.Done)
+        self.assertNotIn(cmd, registry)
+
+    def testMoveRegistry(self):
+        registry1 = CommandRegistry()
+        registry2 = CommandRegistry()
+        cmd = UserCmd(userID=1, cmdStr="1 move")
+        registry1.add(cmd)
+        registry2.add(cmd)
+        self.assertEqual(len(registry1), 0)
+        self.assertIs(registry2.getUserCmd(1, 1), cmd)
+        cmd.setState(cmd.Failed, textMsg="test")
+        self.assertEqual(len(registry2), 0)
+
+    def testSharedKey(self):
+        registry = CommandRegistry()
+        cmd1 = UserCmd()
+        cmd2 = UserCmd()
+        registry.add(cmd1)
+        registry.add(cmd2)
+        self.assertIs(registry.getUserCmd(0, 0), cmd2)
+        cmd1.setState(cmd1.Done)
+        self.assertIs(registry.getUserCmd(0, 0), cmd2)
+        registry.remove(cmd2)
+        self.assertIsNone(registry.getUserCmd(0, 0))
+        self.assertEqual(list(registry), [])
+
+    def testCmdTree(self):
+        registry = CommandRegistry()
+        mainCmd = UserCmd(userID=1, cmdStr="1 init")
+        subCmdList = [BaseCmd("sub%d" % (ind,)) for ind in range(2)]
+        mainCmd.linkCommands(subCmdList)
+        devCmd = DevCmd(cmdStr="init", userCmd=subCmdList[1])
+        otherCmd = UserCmd(userID=1, cmdStr="2 status")
+        otherSubCmd = BaseCmd("otherSub")
+        LinkCommands(otherCmd, [otherSubCmd])
+        # root commands are listed in the order added; children may be added before their parents
+        for cmd in [devCmd, otherSubCmd, mainCmd, otherCmd] + subCmdList:
+            registry.add(cmd)
+        self.assertEqual(registry.getCmdTree(), [
+            (0, mainCmd),
+            (1, subCmdList[0]),
+            (1, subCmdList[1]),
+            (2, devCmd),
+            (0, otherCmd),
+            (1, otherSubCmd),
+        ])
+
+    def testEldestParentCmd(self):
+        rootCmd = BaseCmd("root")
+        midCmd = BaseCmd("mid")
+        leafCmdList = [BaseCmd("leaf%d" % (ind,)) for ind in range(3)]
+        # link the lower level first, so the cached value must be updated when the upper level is linked
+        midCmd.linkCommands(leafCmdList)
+        for cmd in leafCmdList:
+            self.assertIs(cmd.eldestParentCmd, midCmd)
+        rootCmd.linkCommands([midCmd])
+        self.assertIs(rootCmd.eldestParentCmd, rootCmd)
+        self.assertIs(midCmd.eldestParentCmd, rootCmd)
+        for cmd in leafCmdList:
+            self.assertIs(cmd.eldestParentCmd, rootCmd)
+        midCmd.setParentCmd(None)
+        for cmd in leafCmdList:
+            self.assertIs(cmd.eldestParentCmd, midCmd)
+
+
+if __name__ == "__main__":
+    unittest.main()
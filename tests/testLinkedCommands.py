@@ -37,7 +37,75 @@ class TestLinker(unittest.TestCase):
             else:
                 cmd.setState("done")
         self.assertTrue(self.mainCmd.state=="failed")   
-             
+
+    def testFailureSummary(self):
+        self.subCmdList[1].setState("failed", textMsg="broken")
+        self.subCmdList[3].setState("cancelled", textMsg="stopped")
+        self.assertTrue(self.mainCmd.isActive is False)
+        for cmd in self.subCmdList:
+            if not cmd.isDone:
+                cmd.setState("done")
+        self.assertEqual(self.mainCmd.state, "failed")
+        self.assertEqual(self.mainCmd.textMsg, "Sub-command(s) failed: subCmd1: broken; subCmd3: stopped")
+
+    def testFailFast(self):
+        subCmdList = [BaseCmd("sub%d" % (ind,)) for ind in range(5)]
+        mainCmd = BaseCmd("main")
+        LinkCommands(mainCmd, subCmdList, failFast=True)
+        subCmdList[0].setState("done")
+        subCmdList[1].setState("running")
+        subCmdList[2].setState("failed", textMsg="broken")
+        self.assertEqual(mainCmd.state, "failed")
+        self.assertEqual([cmd.state for cmd in subCmdList], ["done", "cancelled", "failed", "cancelled", "cancelled"])
+
+    def testAlreadyDone(self):
+        subCmdList = [BaseCmd("sub%d" % (ind,)) for ind in range(3)]
+        for cmd in subCmdList:
+            cmd.setState("done")
+        mainCmd = BaseCmd("main")
+        LinkCommands(mainCmd, subCmdList)
+        self.assertEqual(mainCmd.state, "done")
+
+    def testManySubCommands(self):
+        subCmdList = [BaseCmd("sub%d" % (ind,)) for ind in range(2000)]
+        mainCmd = BaseCmd("main")
+        LinkCommands(mainCmd, subCmdList)
+        for cmd in subCmdList[:-1]:
+            cmd.setState("done")
+        self.assertEqual(mainCmd.state, "ready")
+        subCmdList[-1].setState("done")
+        self.assertEqual(mainCmd.state, "done")
+
+
+class TestBaseCmdLinkCommands(unittest.TestCase):
+    def testLink(self):
+        subCmdList = [BaseCmd("sub%d" % (ind,)) for ind in range(5)]
+        mainCmd = BaseCmd("main")
+        mainCmd.linkCommands(subCmdList)
+        subCmdList[0].setState("running")
+        self.assertEqual(mainCmd.state, "running")
+        for cmd in subCmdList[0:4]:
+            cmd.setState("done")
+        self.assertEqual(mainCmd.state, "running")
+        subCmdList[4].setState("failed", textMsg="broken")
+        self.assertEqual(mainCmd.state, "failed")
+        self.assertEqual(mainCmd.textMsg, "sub4: broken")
+
+    def testFailFast(self):
+        subCmdList = [BaseCmd("sub%d" % (ind,)) for ind in range(4)]
+        mainCmd = BaseCmd("main")
+        mainCmd.linkCommands(subCmdList, failFast=True)
+        subCmdList[3].setState("done")
+        subCmdList[1].setState("failed", textMsg="broken")
+        self.assertEqual(mainCmd.state, "failed")
+        self.assertEqual([cmd.state for cmd in subCmdList], ["cancelled", "failed", "cancelled", "done"])
+        self.assertTrue(mainCmd.textMsg.startswith("sub0: Cancelled because sub1 failed; sub1: broken"))
+
+    def testEmpty(self):
+        mainCmd = BaseCmd("main")
+        mainCmd.linkCommands([])
+        self.assertEqual(mainCmd.state, "done")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test searching log files with twistedActor.logSearch
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from twistedActor import LogFilter, findLogFiles, searchLogFiles
+
+StartTime = datetime.datetime(2015, 3, 4, 12, 0, 0)
+
+class TestLogSearch(unittest.TestCase):
+    def setUp(self):
+        """Write three log files with interleaved times
+        """
+        self.logDir = tempfile.mkdtemp()
+        self.msgList = [] # list of (datetime, file path, message), in time order
+        msgTemplates = (
+            "UserCmd('%(cmdID)d move', state=running)",
+            "Actor(test).writeToUsers('%(cmdID)d %(userID)d : ')",
+            "DevCmd(TCPDevice(dev%(fileInd)d), 'foo', state=done)",
+        )
+        for fileInd in range(3):
+            filePath = os.path.join(self.logDir, "actor_%d.log" % (fileInd,))
+            with open(filePath, "w") as f:
+                for i in range(30):
+                    msgTime = StartTime + datetime.timedelta(seconds=3 * i + fileInd)
+                    msg = msgTemplates[i % 3] % dict(cmdID=i, userID=fileInd + 1, fileInd=fileInd)
+                    f.write("%s.000 INFO:  %s\n" % (msgTime.strftime("%Y-%m-%d %H:%M:%S"), msg))
+                    self.msgList.append((msgTime, filePath, msg))
+        self.msgList.sort()
+        # a file that is not a log file
+        open(os.path.join(self.logDir, "notes.txt"), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.logDir)
+
+    def search(self, numProcesses=2, windowSec=600, **kwargs):
+        filePathList = findLogFiles([self.logDir])
+        return list(searchLogFiles(filePathList, LogFilter(**kwargs), numProcesses=numProcesses,
+            windowSec=windowSec))
+
+    def testFindLogFiles(self):
+        self.assertEqual([os.path.basename(p) for p in findLogFiles([self.logDir])],
+            ["actor_0.log", "actor_1.log", "actor_2.log"])
+
+    def testMerge(self):
+        self.assertEqual(self.search(), self.msgList)
+        self.assertEqual(self.search(numProcesses=1), self.msgList)
+        # many small windows, including windows in which some files have no messages
+        self.assertEqual(self.search(windowSec=2), self.msgList)
+        self.assertEqual(self.search(windowSec=0.5, numProcesses=1), self.msgList)
+        self.assertRaises(RuntimeError, self.search, windowSec=0)
+
+    def testGap(self):
+        """Search files that cover separate time ranges, as rotated log files do
+        """
+        filePath = os.path.join(self.logDir, "actor_3.log")
+        msgTime = StartTime + datetime.timedelta(days=30)
+        with open(filePath, "w") as f:
+            f.write("%s.500 INFO:  much later\n" % (msgTime.strftime("%Y-%m-%d %H:%M:%S"),))
+        predList = self.msgList + [(msgTime.replace(microsecond=500000), filePath, "much later")]
+        self.assertEqual(self.search(windowSec=10), predList)
+
+    def testNotLogFile(self):
+        """A file that is not a log file is skipped, and the other files are still searched
+        """
+        with open(os.path.join(self.logDir, "notes.log"), "w") as f:
+            f.write("not a log line\n")
+        self.assertEqual(self.search(), self.msgList)
+        self.assertEqual(self.search(numProcesses=1), self.msgList)
+
+    def testFilters(self):
+        startTime = StartTime + datetime.timedelta(seconds=10)
+        endTime = StartTime + datetime.timedelta(seconds=50)
+        self.assertEqual(self.search(startTime=startTime, endTime=endTime),
+            [info for info in self.msgList if startTime <= info[0] < endTime])
+        self.assertEqual([info[2] for info in self.search(cmdID=4)],
+            ["Actor(test).writeToUsers('4 %d : ')" % (userID,) for userID in (1, 2, 3)])
+        self.assertEqual(len(self.search(cmdID=3)), 3) # UserCmd('3 move'...) in each file
+        self.assertEqual(len(self.search(userID=2)), 10)
+        self.assertEqual(len(self.search(devName="dev1")), 10)
+        self.assertEqual(len(self.search(devName="dev")), 0)
+        self.assertEqual(len(self.search(regex=r"move", userID=1)), 0)
+        self.assertEqual(len(self.search(regex=r"move")), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,12 @@
 #!/usr/bin/env python2
 from __future__ import division, absolute_import
 
+import datetime
 import os
 
 from twisted.trial.unittest import TestCase
-from twistedActor import log, stopLogging, startFileLogging, LogLineParser
+from twistedActor import log, stopLogging, startFileLogging, LogLineParser, LogWriterThread, \
+    startRingBufferLogging
 
 TestLogPath = os.path.join(os.path.abspath(os.path.dirname(__file__)), ".tests", "testLogging")
 if not os.path.exists(TestLogPath):
@@ -33,6 +35,151 @@ class LogTest(TestCase):
         self.assertEqual(len(loggedInfo), 1) # only one line in log
         self.assertEqual(loggedInfo[0][1], logMsg)
 
+    def testDeferredFormatting(self):
+        log.info("%s=%r", "foo", "bar")
+        log.debug("%d%%", 5)
+        loggedInfo = self.getLogInfo(self.logFilePath)
+        self.assertEqual([info[1] for info in loggedInfo], ["foo='bar'", "5%"])
+
+    def testDefaultLoggerIsEnabledFor(self):
+        stopLogging()
+        os.remove(self.logFilePath)
+        try:
+            self.assertFalse(log)
+            self.assertFalse(log.isEnabledFor(log.logger.INFO))
+            self.assertTrue(log.isEnabledFor(log.logger.WARNING))
+            # str of a discarded message's arguments is never computed
+            class NoStr(object):
+                def __str__(self):
+                    raise AssertionError("should not be formatted")
+            log.info("%s", NoStr())
+            log.debug("%s", NoStr())
+        finally:
+            self.logFilePath = startFileLogging("%s_%i_" % (TestLogPath, LogTest.logNum))
+            LogTest.logNum += 1
+
+class ThreadedLogTest(TestCase):
+    logNum = 0 # number the log files so each test has its own log file
+
+    def startLogging(self, **kwargs):
+        self.logFilePath = startFileLogging("%s_thread_%i_" % (TestLogPath, ThreadedLogTest.logNum),
+            useThread=True, **kwargs)
+        ThreadedLogTest.logNum += 1
+
+    def tearDown(self):
+        stopLogging()
+        os.remove(self.logFilePath)
+
+    def getLogMsgs(self):
+        return [info[1] for info in LogLineParser().parseLogFile(self.logFilePath)]
+
+    def testAllWritten(self):
+        self.startLogging()
+        msgList = ["message %d" % (i,) for i in range(1000)]
+        for msg in msgList:
+            log.info(msg)
+        # stopLogging must write all queued records
+        logger = log.logger
+        stopLogging()
+        self.assertEqual(logger.numDropped, 0)
+        self.assertEqual(self.getLogMsgs(), msgList)
+        os.remove(self.logFilePath)
+        self.startLogging() # for tearDown
+
+    def testOverflow(self):
+        for policy in (LogWriterThread.DropNewest, LogWriterThread.DropOldest):
+            self.startLogging(maxQueued=5, overflowPolicy=policy)
+            numMsgs = 2000
+            for i in range(numMsgs):
+                log.info("message %d", i)
+            logger = log.logger
+            stopLogging()
+            logMsgs = self.getLogMsgs()
+            self.assertEqual(len(logMsgs) + logger.numDropped, numMsgs)
+            # the records that were written are in order
+            self.assertEqual(logMsgs, sorted(logMsgs, key=lambda msg: int(msg.split()[1])))
+            os.remove(self.logFilePath)
+        self.startLogging() # for tearDown
+
+    def testBadArgs(self):
+        self.assertRaises(RuntimeError, LogWriterThread, log.logger, maxQueued=0)
+        self.assertRaises(RuntimeError, LogWriterThread, log.logger, overflowPolicy="bogus")
+        self.startLogging() # for tearDown
+class RingBufferLogTest(TestCase):
+    def setUp(self):
+        self.logger = startRingBufferLogging(numRecords=10)
+        self.dumpPath = os.path.join(TestLogPath, "ringBufferDump.log")
+
+    def tearDown(self):
+        stopLogging()
+        if os.path.exists(self.dumpPath):
+            os.remove(self.dumpPath)
+
+    def testWrap(self):
+        self.assertEqual(self.logger.getRecords(), [])
+        for i in range(5):
+            log.info("message %d", i)
+        self.assertEqual([rec[2] for rec in self.logger.getRecords()], ["message %d" % (i,) for i in range(5)])
+        for i in range(5, 25):
+            log.debug("message %d", i)
+        recList = self.logger.getRecords()
+        self.assertEqual(len(self.logger), 10)
+        self.assertEqual(self.logger.numLogged, 25)
+        self.assertEqual([rec[2] for rec in recList], ["message %d" % (i,) for i in range(15, 25)])
+        self.assertEqual(recList[-1][1], "DEBUG")
+        self.logger.clear()
+        self.assertEqual(self.logger.getRecords(), [])
+
+    def testDump(self):
+        msgList = ["message %d" % (i,) for i in range(3)]
+        for msg in msgList:
+            log.info(msg)
+        self.assertEqual(self.logger.dump(self.dumpPath), 3)
+        self.assertEqual([info[1] for info in LogLineParser().parseLogFile(self.dumpPath)], msgList)
+class LogLineParserTest(TestCase):
+    def setUp(self):
+        self.logPath = os.path.join(TestLogPath, "parserTest.log")
+        self.startTime = datetime.datetime(2015, 3, 4, 23, 59, 59, 0)
+        self.msgList = []
+        with open(self.logPath, "w") as f:
+            for i in range(500):
+                msgTime = self.startTime + datetime.timedelta(milliseconds=7 * i)
+                msg = "message %d" % (i,)
+                if i % 10 == 3:
+                    msg += "\ncontinuation of message %d" % (i,)
+                self.msgList.append((msgTime, msg))
+                timeStr = msgTime.strftime("%Y-%m-%d %H:%M:%S") + ".%03d" % (msgTime.microsecond // 1000,)
+                f.write("%s INFO:  %s\n" % (timeStr, msg))
+
+    def tearDown(self):
+        os.remove(self.logPath)
+
+    def testParseLine(self):
+        parser = LogLineParser()
+        self.assertEqual(
+            parser.parseLine("2015-03-04 12:13:14.056 WARNING:  a message "),
+            (datetime.datetime(2015, 3, 4, 12, 13, 14, 56000), "a message"),
+        )
+        self.assertRaises(RuntimeError, parser.parseLine, "not a log line")
+
+    def testParseLogFile(self):
+        parser = LogLineParser()
+        self.assertEqual(parser.parseLogFile(self.logPath), self.msgList)
+
+    def testTimeRange(self):
+        parser = LogLineParser()
+        for startInd, endInd in ((0, 500), (0, 1), (3, 4), (137, 385), (499, 500), (500, 500)):
+            startTime = self.startTime + datetime.timedelta(milliseconds=7 * startInd)
+            endTime = self.startTime + datetime.timedelta(milliseconds=7 * endInd)
+            self.assertEqual(list(parser.iterLogFile(self.logPath, startTime=startTime, endTime=endTime)),
+                self.msgList[startInd:endInd])
+        # start time between two messages
+        startTime = self.startTime + datetime.timedelta(milliseconds=7 * 200 - 3)
+        self.assertEqual(list(parser.iterLogFile(self.logPath, startTime=startTime)), self.msgList[200:])
+        # start time before the first message
+        startTime = self.startTime - datetime.timedelta(days=1)
+        self.assertEqual(list(parser.iterLogFile(self.logPath, startTime=startTime)), self.msgList)
+
 if __name__ == '__main__':
     from unittest import main
     main()
\ No newline at end of file
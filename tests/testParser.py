@@ -2,9 +2,15 @@
 from __future__ import division, absolute_import
 """Test parser.  Use arctics command set, copied directly below
 """
+import random
+import threading
 import unittest
 
-from twistedActor.parse import Command, CommandSet, KeywordValue, Float, String, Int, UniqueMatch, RestOfLineString
+import pyparsing as pp
+
+import RO.Alg.MatchList as MatchList
+
+from twistedActor.parse import _NoFastParse, _pruneString, pyparseItems, TrieMatchList, Command, CommandSet, KeywordValue, Float, String, Int, UniqueMatch, RestOfLineString
 
 optionalExposeArgs = [
     KeywordValue(
@@ -225,10 +231,212 @@ class TestParser(unittest.TestCase):
             print "cmdStr: ", cmdStr
             parsedCommand = arcticCommandSet.parse(cmdStr)
 
+    def testSharedGrammars(self):
+        """The basic grammars are built once, and pyparsing's predefined elements are not modified
+        """
+        for name in ("float", "int", "restOfLine", "string", "quotedStr", "word", "extractKeys"):
+            self.assertIs(getattr(pyparseItems, name), getattr(pyparseItems, name))
+        self.assertEqual(pp.quotedString.parseAction, [])
+        self.assertEqual(pp.restOfLine.parseAction, [])
+        self.assertEqual(pyparseItems.extractKeys.searchString("foo=1 bar=(2,3) baz")[0].asList(), ["foo", "bar"])
+
+    def testPruneString(self):
+        """_pruneString gives the same result as removing characters one at a time
+        """
+        argString = " abc def=1,2 ghi jkl=3 mno "
+        for stringPosList in ([], [(5, 12)], [(5, 12), (17, 22)], [(17, 22), (5, 12)], [(5, 12), (8, 18)],
+            [(0, 3), (3, 5)], [(4, 4)], [(20, 40)], [(0, len(argString))]):
+            predString = "".join(char for ind, char in enumerate(argString)
+                if not True in [beg<=ind<end for beg,end in stringPosList]).strip()
+            self.assertEqual(_pruneString(argString, stringPosList), predString)
+
+    def testTrieMatchList(self):
+        """TrieMatchList gives the same results and errors as MatchList
+        """
+        def getOutcome(matchList, prefix):
+            try:
+                return matchList.getUniqueMatch(prefix)
+            except ValueError as e:
+                return str(e)
+        valueList = ["time", "temp", "Tempo", "basename", "bin", "b", "window", "Window2", 5]
+        prefixList = ["", "t", "ti", "TIME", "timex", "te", "temp", "tempo", "b", "bi", "bin", "bas", "w",
+            "window", "WINDOW2", "x", "5"]
+        for valList in ([], ["only"], ["a", "A"], valueList):
+            for abbrevOK in (True, False):
+                for ignoreCase in (True, False):
+                    matchList = MatchList(valList, abbrevOK=abbrevOK, ignoreCase=ignoreCase)
+                    trieMatchList = TrieMatchList(valList, abbrevOK=abbrevOK, ignoreCase=ignoreCase)
+                    for prefix in prefixList:
+                        self.assertEqual(getOutcome(trieMatchList, prefix), getOutcome(matchList, prefix),
+                            "valList=%r, abbrevOK=%r, ignoreCase=%r, prefix=%r" % (valList, abbrevOK, ignoreCase, prefix))
+
+    def testThreadedParse(self):
+        """Parsing is reentrant: threads parsing with different keyword abbreviations get the same results
+        as parsing in one thread
+        """
+        cmdStrList = [
+            "expose object time=1 basename=a",
+            "exp object TI=2 bas=b com='x y'",
+            "expose obj t=3 c=c base='a b'",
+            "set bin=2 tem=100 f=u",
+            "set b=1,2 temp=5 filter=2 window=full",
+        ]
+        predList = [arcticCommandSet.parse(cmdStr, useFastParse=False) for cmdStr in cmdStrList]
+        errList = []
+        def parseMany(seed):
+            rand = random.Random(seed)
+            for i in range(100):
+                ind = rand.randrange(len(cmdStrList))
+                try:
+                    parsedCmd = arcticCommandSet.parse(cmdStrList[ind], useFastParse=False)
+                except Exception as e:
+                    errList.append((cmdStrList[ind], e))
+                    continue
+                if parsedCmd != predList[ind]:
+                    errList.append((cmdStrList[ind], parsedCmd))
+        threadList = [threading.Thread(target=parseMany, args=(seed,)) for seed in range(4)]
+        for thread in threadList:
+            thread.start()
+        for thread in threadList:
+            thread.join()
+        self.assertEqual(errList, [])
+
+    def testParseCache(self):
+        """The parse cache returns copies of the parsed commands, counts hits and misses and is bounded
+        """
+        cmdSet = CommandSet(commandList=arcticCommandSet.commandDict.values(), cacheSize=3)
+        for cmdStr in commandList:
+            self.assertEqual(cmdSet.parse(cmdStr), arcticCommandSet.parse(cmdStr))
+        self.assertEqual((cmdSet.numCacheHits, cmdSet.numCacheMisses, cmdSet.numCached), (0, len(commandList), 3))
+
+        cmdStr = "expose object time=1 basename=a"
+        parsedCmd = cmdSet.parse(cmdStr)
+        # modifying a returned command must not affect the cached command
+        parsedCmd.subCommand.parsedFloatingArgs["time"].append(5)
+        for cmdStr2 in (cmdStr, cmdStr + "  "):
+            self.assertEqual(cmdSet.parse(cmdStr2), arcticCommandSet.parse(cmdStr))
+        self.assertEqual(cmdSet.numCacheHits, 2)
+
+        # invalid commands are not cached
+        for i in range(2):
+            self.assertRaises(Exception, cmdSet.parse, "expose object")
+        self.assertEqual((cmdSet.numCacheHits, cmdSet.numCacheMisses), (2, len(commandList) + 3))
+
+        # least recently used commands are discarded first
+        cmdSet.setCacheSize(1)
+        self.assertEqual(cmdSet.numCached, 1)
+        cmdSet.parse(cmdStr)
+        self.assertEqual(cmdSet.numCacheHits, 3)
+
+        cmdSet.clearCache()
+        self.assertEqual((cmdSet.numCacheHits, cmdSet.numCacheMisses, cmdSet.numCached), (0, 0, 0))
+        cmdSet.setCacheSize(0)
+        cmdSet.parse(cmdStr)
+        self.assertEqual((cmdSet.numCacheHits, cmdSet.numCacheMisses, cmdSet.numCached), (0, 0, 0))
+        self.assertRaises(RuntimeError, cmdSet.setCacheSize, -1)
+
     def testHTML(self):
         print(arcticCommandSet.toHTML())
 
 
+class TestFastParser(unittest.TestCase):
+    """Compare the fast parser to pyparsing
+    """
+    # pieces from which to build random commands: names, keywords, values and troublemakers
+    Fragments = ["set", "expose", "exp", "object", "obj", "Flat", "bias", "camera", "filter", "talk", "status",
+        "help", "bin", "bi", "window", "amps", "readoutRate", "read", "temp", "time", "tim", "basename", "comment",
+        "full", "auto", "quad", "ll", "fast", "100", "2", "-5", "+3", "1.5", "1e10", "1E-3", "-.5", "5.", "+", "-",
+        "e", "a_b", "x/y", "a:b", "test-path", "'a b'", '"c, d"', "'it''s'", '"a=b"', "'\\x'",
+        "(", ")", "[", "]", ",", "=", "_", "@", "cabin", "atemp"]
+    Separators = [" ", " ", " ", "", "=", ",", "  ", "\t", ", "]
+    # dict of command prefix: list of keywords for that command
+    CmdKeywordDict = {
+        "set ": ["bin", "window", "amps", "readoutRate", "filter", "temp"],
+        "expose object ": ["time", "basename", "comment"],
+        "exp flat ": ["time", "basename", "comment"],
+        "expose bias ": ["basename", "comment"],
+        "camera ": [],
+        "filter talk ": [],
+    }
+    CmdPrefixes = sorted(CmdKeywordDict)
+    # dict of keyword: list of values (mostly valid)
+    KeywordValuesDict = {
+        "bin": ["2", "1,2", "0", "1.5"],
+        "window": ["full", "2,2,400,800", "1", "a,b,c,d,e"],
+        "amps": ["auto", "quad", "LL", "u"],
+        "readoutRate": ["fast", "med", "s"],
+        "filter": ["2", "u", "'x y'"],
+        "temp": ["100", "1e10", "-.5", "5."],
+        "time": ["100", "1.5", "2e-3", "x"],
+        "basename": ["test", "x/y", "'a b'", "a_b", "test-path"],
+        "comment": ["'a comment'", '"c, d"', "atest", "'it''s'"],
+    }
+    PositionalValues = ["status", "init", "st", "talk to camera text", "'x'", "1", ""]
+
+    def getOutcome(self, cmdStr, useFastParse):
+        try:
+            return arcticCommandSet.parse(cmdStr, useFastParse=useFastParse)
+        except Exception as e:
+            return (type(e).__name__, str(e))
+
+    def makeCmdStr(self, rand):
+        """Make a random command string
+        """
+        randVal = rand.random()
+        if randVal < 0.4:
+            # keyword=value lists, mostly valid
+            cmdPrefix = rand.choice(self.CmdPrefixes)
+            keywordList = self.CmdKeywordDict[cmdPrefix]
+            # positional arguments are only valid for commands without keywords
+            tokenList = [rand.choice(self.PositionalValues)] if not keywordList or rand.random() < 0.1 else []
+            for i in range(rand.randint(0, 4)):
+                if not keywordList and rand.random() < 0.8:
+                    continue
+                keyword = rand.choice(keywordList or self.KeywordValuesDict.keys())
+                if i == 0 and "time" in keywordList and rand.random() < 0.8:
+                    # time is mandatory
+                    keyword = "time"
+                # abbreviate the keyword and change its case
+                abbrevKW = keyword[0:rand.randint(1, len(keyword))]
+                if rand.random() < 0.2:
+                    abbrevKW = abbrevKW.upper()
+                if rand.random() < 0.8:
+                    valStr = rand.choice(self.KeywordValuesDict[keyword])
+                else:
+                    valStr = rand.choice(self.Fragments)
+                tokenList.append(abbrevKW + "=" + valStr)
+            rand.shuffle(tokenList)
+            return cmdPrefix + rand.choice((" ", "  ")).join(tokenList)
+        elif randVal < 0.6:
+            return rand.choice(commandList) + rand.choice(self.Separators) + rand.choice(self.Fragments)
+        cmdStr = "".join(rand.choice(self.Fragments) + rand.choice(self.Separators) for i in range(rand.randint(1, 8)))
+        if randVal < 0.8:
+            cmdStr = rand.choice(self.CmdPrefixes) + cmdStr
+        return cmdStr
+
+    def testCommandList(self):
+        """The fast parser handles all commands in commandList and gives the same result as pyparsing
+        """
+        for cmdStr in commandList:
+            self.assertEqual(arcticCommandSet._fastParse(cmdStr), arcticCommandSet.parse(cmdStr, useFastParse=False))
+
+    def testFuzz(self):
+        """Parse random command strings, valid and invalid; the results or errors must match pyparsing's
+        """
+        rand = random.Random(12)
+        numFast = 0
+        for i in range(1000):
+            cmdStr = self.makeCmdStr(rand)
+            self.assertEqual(self.getOutcome(cmdStr, True), self.getOutcome(cmdStr, False), "cmdStr=%r" % (cmdStr,))
+            try:
+                arcticCommandSet._fastParse(cmdStr)
+                numFast += 1
+            except _NoFastParse:
+                pass
+        # make sure the fast parser was tried on a reasonable number of commands
+        self.assertGreater(numFast, 100)
+
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,180 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test per-user keyword subscriptions: BaseActor.subscribeUser etc. and the Actor subscribe commands
+"""
+import unittest
+
+from twistedActor import Actor, BaseActor
+
+class FakeSocket(object):
+    """A minimal user socket that records the lines written to it
+    """
+    host = "localhost"
+    isReady = True
+    state = "Connected"
+
+    def __init__(self):
+        self.lineList = []
+        self.cmdStr = ""
+
+    def write(self, data):
+        self.lineList += data.splitlines()
+
+    def writeLine(self, data):
+        self.lineList.append(data)
+
+    def readLine(self):
+        return self.cmdStr
+
+    def close(self):
+        self.isReady = False
+
+    def setReadCallback(self, func):
+        pass
+
+    def addStateCallback(self, func):
+        pass
+
+    def removeStateCallback(self, func, doRaise=True):
+        pass
+
+class QuietActor(BaseActor):
+    """A BaseActor that does not report user information, so only test output reaches the users
+    """
+    def showNewUserInfo(self, fakeCmd):
+        pass
+
+    def showUserList(self, cmd=None):
+        pass
+
+class QuietCmdActor(Actor):
+    """An Actor that does not report user information, so only test output reaches the users
+    """
+    def showNewUserInfo(self, fakeCmd):
+        pass
+
+    def showUserList(self, cmd=None):
+        pass
+
+class TestSubscribeUser(unittest.TestCase):
+    def setUp(self):
+        self.actor = QuietActor(userPort=0)
+        self.sockList = [self.connect() for i in range(3)]
+
+    def tearDown(self):
+        self.actor.close()
+
+    def connect(self):
+        sock = FakeSocket()
+        self.actor.newUser(sock)
+        return sock
+
+    def getLines(self):
+        """Return a list of the lines written to each user, and clear the lines
+        """
+        retList = [sock.lineList for sock in self.sockList]
+        for sock in self.sockList:
+            sock.lineList = []
+        return retList
+
+    def testNoSubscriptions(self):
+        self.actor.writeToUsers("i", "foo=1")
+        self.assertEqual(self.getLines(), [["0 0 i foo=1"]] * 3)
+
+    def testSubscribe(self):
+        self.actor.subscribeUser(1, ["Foo", "bar"])
+        self.assertEqual(self.actor.getUserSubscriptions(1), ["bar", "foo"])
+        self.assertEqual(self.actor.getUserSubscriptions(2), [])
+
+        self.actor.writeToUsers("i", "FOO=1")
+        self.assertEqual(self.getLines(), [["0 0 i FOO=1"]] * 3)
+        self.actor.writeToUsers("i", "baz=2")
+        self.assertEqual(self.getLines(), [[], ["0 0 i baz=2"], ["0 0 i baz=2"]])
+        self.actor.writeToUsers("i", "baz=2; bar=3")
+        self.assertEqual(self.getLines(), [["0 0 i baz=2; bar=3"]] * 3)
+
+    def testOwnCommandsDelivered(self):
+        """A subscribed user receives all output for its own commands
+        """
+        self.actor.subscribeUser(1, ["foo"])
+        self.actor.writeToUsers("i", "baz=2", userID=1, cmdID=5)
+        self.actor.writeToUsers(":", "", userID=1, cmdID=5)
+        self.actor.writeToUsers(":", "", userID=2, cmdID=6)
+        self.assertEqual(self.getLines(), [
+            ["5 1 i baz=2", "5 1 : "],
+            ["5 1 i baz=2", "5 1 : ", "6 2 : "],
+            ["5 1 i baz=2", "5 1 : ", "6 2 : "],
+        ])
+
+    def testUnsubscribe(self):
+        self.actor.subscribeUser(1, ["foo", "bar"])
+        self.actor.unsubscribeUser(1, ["FOO"])
+        self.assertEqual(self.actor.getUserSubscriptions(1), ["bar"])
+        self.actor.writeToUsers("i", "foo=1")
+        self.assertEqual(self.getLines(), [[], ["0 0 i foo=1"], ["0 0 i foo=1"]])
+
+        # removing the last subscription restores all output
+        self.actor.unsubscribeUser(1, ["bar"])
+        self.assertEqual(self.actor.getUserSubscriptions(1), [])
+        self.actor.writeToUsers("i", "foo=1")
+        self.assertEqual(self.getLines(), [["0 0 i foo=1"]] * 3)
+
+        self.actor.subscribeUser(1, ["foo", "bar"])
+        self.actor.unsubscribeUser(1)
+        self.assertEqual(self.actor.getUserSubscriptions(1), [])
+        self.actor.writeToUsers("i", "baz=1")
+        self.assertEqual(self.getLines(), [["0 0 i baz=1"]] * 3)
+
+    def testDisconnect(self):
+        """A disconnected user's subscriptions are removed, and a new user with the same ID receives all output
+        """
+        self.actor.subscribeUser(2, ["foo"])
+        self.actor.subscribeUser(3, ["bar"])
+        sock = self.sockList[1]
+        sock.close()
+        self.actor.userSocketClosing(sock)
+        self.assertEqual(self.actor.getUserSubscriptions(2), [])
+        self.actor.writeToUsers("i", "foo=1")
+        self.assertEqual(self.getLines(), [["0 0 i foo=1"], [], []])
+
+        self.sockList[1] = self.connect()
+        self.actor.writeToUsers("i", "foo=1")
+        self.assertEqual(self.getLines(), [["0 0 i foo=1"], ["0 0 i foo=1"], []])
+
+class TestSubscribeCmd(unittest.TestCase):
+    def setUp(self):
+        self.actor = QuietCmdActor(userPort=0)
+        self.sock = FakeSocket()
+        self.actor.newUser(self.sock)
+        self.otherSock = FakeSocket()
+        self.actor.newUser(self.otherSock)
+
+    def tearDown(self):
+        self.actor.close()
+
+    def runCmd(self, cmdStr):
+        """Run a command as user 1 and return the lines written to that user
+        """
+        self.sock.lineList = []
+        self.sock.cmdStr = cmdStr
+        self.actor.newCmd(self.sock)
+        return self.sock.lineList
+
+    def testSubscribeCmd(self):
+        self.assertEqual(self.runCmd("3 subscribe foo, Bar"), ['3 1 i Subscriptions="bar", "foo"', "3 1 : "])
+        self.assertEqual(self.actor.getUserSubscriptions(1), ["bar", "foo"])
+        self.assertEqual(self.runCmd("4 subscribe"), ['4 1 i Subscriptions="bar", "foo"', "4 1 : "])
+
+        self.sock.lineList = []
+        self.otherSock.lineList = []
+        self.actor.writeToUsers("i", "baz=1")
+        self.assertEqual(self.sock.lineList, [])
+        self.assertEqual(self.otherSock.lineList, ["0 0 i baz=1"])
+
+        self.assertEqual(self.runCmd("5 unsubscribe foo"), ['5 1 i Subscriptions="bar"', "5 1 : "])
+        self.assertEqual(self.runCmd("6 unsubscribe"), ["6 1 i Subscriptions=", "6 1 : "])
+        self.assertEqual(self.actor.getUserSubscriptions(1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
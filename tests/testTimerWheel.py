@@ -0,0 +1,77 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test TimerWheel and its use for command time limits
+"""
+from twisted.trial import unittest
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred
+
+from RO.Comm.TwistedTimer import Timer
+
+from twistedActor import TimerWheel, UserCmd, BaseCmd
+
+class TimerWheelTest(unittest.TestCase):
+    def setUp(self):
+        self.wheel = TimerWheel(resolution=0.01, numSlots=8)
+        self.fireList = [] # list of (name, time fired - time started)
+        self.startTime = reactor.seconds()
+
+    def makeCallFunc(self, name):
+        def callFunc():
+            self.fireList.append((name, reactor.seconds() - self.startTime))
+        return callFunc
+
+    def checkAfter(self, sec, checkFunc):
+        """Return a Deferred that calls checkFunc after sec seconds
+        """
+        d = Deferred()
+        Timer(sec, d.callback, None)
+        d.addCallback(lambda dumArg: checkFunc())
+        return d
+
+    def testFireAndCancel(self):
+        # delays include times beyond one turn of the wheel (0.08 sec)
+        delayDict = dict(a=0.03, b=0.0, c=0.25, d=0.05, e=0.12)
+        timerDict = dict((name, self.wheel.add(delay, self.makeCallFunc(name)))
+            for name, delay in delayDict.iteritems())
+        self.assertEqual(len(self.wheel), 5)
+        self.assertTrue(timerDict["d"].cancel())
+        self.assertFalse(timerDict["d"].cancel())
+        self.assertEqual(len(self.wheel), 4)
+
+        def checkResults():
+            self.assertEqual([name for name, fireTime in self.fireList], ["b", "a", "e", "c"])
+            for name, fireTime in self.fireList:
+                # never early; not very late (allowing for a busy test machine)
+                self.assertGreaterEqual(fireTime, delayDict[name] - 0.001)
+                self.assertLess(fireTime, delayDict[name] + 0.1)
+            self.assertEqual(len(self.wheel), 0)
+            self.assertFalse(any(timer.isActive for timer in timerDict.itervalues()))
+            self.assertFalse(self.wheel._tickTimer.isActive)
+        return self.checkAfter(0.4, checkResults)
+
+    def testBadArgs(self):
+        self.assertRaises(RuntimeError, TimerWheel, resolution=0)
+        self.assertRaises(RuntimeError, TimerWheel, numSlots=0)
+
+    def testCmdTimeLimit(self):
+        BaseCmd.setTimeLimitResolution(0.01)
+        timedOutCmd = UserCmd(cmdStr="1 foo", timeLim=0.05)
+        timedOutCmd.setState(timedOutCmd.Running)
+        doneCmd = UserCmd(cmdStr="2 foo", timeLim=0.05)
+        doneCmd.setState(doneCmd.Running)
+        doneCmd.setState(doneCmd.Done)
+        notStartedCmd = UserCmd(cmdStr="3 foo", timeLim=0.05)
+
+        def checkResults():
+            self.assertEqual(timedOutCmd.state, timedOutCmd.Failed)
+            self.assertEqual(timedOutCmd.textMsg, "Timed out")
+            self.assertEqual(doneCmd.state, doneCmd.Done)
+            self.assertEqual(notStartedCmd.state, notStartedCmd.Ready)
+            BaseCmd.setTimeLimitResolution(0.1)
+        return self.checkAfter(0.2, checkResults)
+
+
+if __name__ == '__main__':
+    from unittest import main
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test UserIDAllocator and user ID assignment by BaseActor
+"""
+import random
+import unittest
+
+from twistedActor import BaseActor, UserIDAllocator
+from twistedActor.baseActor import getSocketUserID
+
+class FakeSocket(object):
+    """A minimal user socket, as seen by BaseActor.newUser and BaseActor.userSocketClosing
+    """
+    host = "localhost"
+    isReady = True
+    state = "Connected"
+
+    def write(self, data):
+        pass
+
+    def writeLine(self, data):
+        pass
+
+    def close(self):
+        self.isReady = False
+
+    def setReadCallback(self, func):
+        pass
+
+    def addStateCallback(self, func):
+        pass
+
+    def removeStateCallback(self, func, doRaise=True):
+        pass
+
+class QuietActor(BaseActor):
+    """A BaseActor that does not report user information, so only the users under test are written to
+    """
+    def showNewUserInfo(self, fakeCmd):
+        pass
+
+    def showUserList(self, cmd=None):
+        pass
+
+class TestUserIDAllocator(unittest.TestCase):
+    def testLowestFree(self):
+        """Allocate and release IDs in random order; each allocated ID must be the lowest ID not in use
+        """
+        rand = random.Random(5)
+        allocator = UserIDAllocator()
+        inUseSet = set()
+        for i in range(20000):
+            if inUseSet and rand.random() < 0.45:
+                userID = rand.choice(list(inUseSet)) if len(inUseSet) < 100 else inUseSet.pop()
+                inUseSet.discard(userID)
+                allocator.release(userID)
+            else:
+                predID = 1
+                while predID in inUseSet:
+                    predID += 1
+                userID = allocator.allocate()
+                self.assertEqual(userID, predID)
+                inUseSet.add(userID)
+            self.assertEqual(len(allocator), len(inUseSet))
+
+    def testReleaseErrors(self):
+        allocator = UserIDAllocator()
+        self.assertRaises(RuntimeError, allocator.release, 1)
+        self.assertEqual(allocator.allocate(), 1)
+        self.assertEqual(allocator.allocate(), 2)
+        allocator.release(1)
+        self.assertRaises(RuntimeError, allocator.release, 1)
+        self.assertRaises(RuntimeError, allocator.release, 0)
+        self.assertRaises(RuntimeError, allocator.release, 3)
+        self.assertEqual(allocator.allocate(), 1)
+        self.assertEqual(allocator.allocate(), 3)
+
+
+class TestNewUser(unittest.TestCase):
+    def setUp(self):
+        self.actor = QuietActor(userPort=0)
+
+    def tearDown(self):
+        self.actor.close()
+
+    def connect(self):
+        sock = FakeSocket()
+        self.actor.newUser(sock)
+        return sock
+
+    def disconnect(self, sock):
+        sock.close()
+        self.actor.userSocketClosing(sock)
+
+    def testReconnectStorm(self):
+        """Connect and disconnect thousands of users; IDs are reused lowest first
+
+        See benchmarks/benchUserAccept.py for the time to accept a user
+        """
+        numUsers = 5000
+        sockList = [self.connect() for i in range(numUsers)]
+        self.assertEqual(sorted(self.actor.userDict), range(1, numUsers + 1))
+
+        # disconnect a random half of the users, then reconnect them
+        rand = random.Random(1)
+        rand.shuffle(sockList)
+        closedIDs = set()
+        for sock in sockList[0:numUsers // 2]:
+            closedIDs.add(getSocketUserID(sock))
+            self.disconnect(sock)
+        self.assertEqual(len(self.actor.userDict), numUsers - len(closedIDs))
+        for userID in sorted(closedIDs):
+            sock = self.connect()
+            self.assertEqual(getSocketUserID(sock), userID)
+        self.assertEqual(sorted(self.actor.userDict), range(1, numUsers + 1))
+
+        # with all IDs in use, the next user gets the next higher ID
+        sock = self.connect()
+        self.assertEqual(getSocketUserID(sock), numUsers + 1)
+        self.disconnect(sock)
+        self.assertEqual(sorted(self.actor.userDict), range(1, numUsers + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
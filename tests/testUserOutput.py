@@ -0,0 +1,249 @@
+#!/usr/bin/env python2
+from __future__ import division, absolute_import
+"""Test UserOutput, the per-user output buffer used by BaseActor
+"""
+from twisted.trial import unittest
+from twisted.internet.defer import Deferred
+
+from RO.Comm.TwistedTimer import Timer
+
+from twistedActor import BaseActor, KeywordCoalescer, UserOutput, splitKeywords
+
+class FakeSocket(object):
+    """Record data written, as a list of write calls
+    """
+    def __init__(self):
+        self.writeList = []
+        self.closeReason = None
+
+    def write(self, data):
+        self.writeList.append(data)
+
+    def close(self, isOK=True, reason=None):
+        self.closeReason = reason
+
+    @property
+    def data(self):
+        return "".join(self.writeList)
+
+class FakeUserSocket(FakeSocket):
+    """A user socket, as seen by BaseActor, that closes the way RO's sockets do:
+    the actor's state callback is called synchronously by close
+    """
+    host = "localhost"
+    isReady = True
+    state = "Connected"
+
+    def __init__(self, actor):
+        FakeSocket.__init__(self)
+        self.actor = actor
+
+    def writeLine(self, data):
+        self.write(data + "\r\n")
+
+    def close(self, isOK=True, reason=None):
+        FakeSocket.close(self, isOK=isOK, reason=reason)
+        self.isReady = False
+        self.actor.userSocketClosing(self)
+
+    def setReadCallback(self, func):
+        pass
+
+    def addStateCallback(self, func):
+        pass
+
+    def removeStateCallback(self, func, doRaise=True):
+        pass
+
+def checkAfter(sec, checkFunc):
+    """Return a Deferred that calls checkFunc after sec seconds
+    """
+    d = Deferred()
+    Timer(sec, d.callback, None)
+    d.addCallback(lambda dumArg: checkFunc())
+    return d
+
+class TestUserOutput(unittest.TestCase):
+    def setUp(self):
+        self.sock = FakeSocket()
+        self.lineList = ["0 0 i line%d=%d\r\n" % (i, i) for i in range(10)]
+
+    def testNoBatch(self):
+        userOutput = UserOutput(self.sock)
+        for line in self.lineList:
+            self.assertEqual(userOutput.writeLine(line), 0)
+        self.assertEqual(self.sock.writeList, self.lineList)
+        self.assertEqual(userOutput.numLines, 0)
+
+    def testBatch(self):
+        userOutput = UserOutput(self.sock, doBatch=True)
+        numBytes = 0
+        for line in self.lineList:
+            numBytes += len(line)
+            self.assertEqual(userOutput.writeLine(line), numBytes)
+        self.assertEqual(self.sock.writeList, [])
+        self.assertEqual(userOutput.numLines, len(self.lineList))
+        userOutput.flush()
+        # one write, in order
+        self.assertEqual(self.sock.writeList, ["".join(self.lineList)])
+        self.assertEqual(userOutput.numLines, 0)
+        self.assertEqual(userOutput.numBytes, 0)
+        # flushing with nothing pending writes nothing
+        userOutput.flush()
+        self.assertEqual(len(self.sock.writeList), 1)
+
+    def testSetBatch(self):
+        userOutput = UserOutput(self.sock, doBatch=True)
+        userOutput.writeLine(self.lineList[0])
+        userOutput.setBatch(False)
+        self.assertEqual(self.sock.data, self.lineList[0])
+        userOutput.writeLine(self.lineList[1])
+        self.assertEqual(self.sock.data, "".join(self.lineList[0:2]))
+
+    def testClear(self):
+        userOutput = UserOutput(self.sock, doBatch=True)
+        userOutput.writeLine(self.lineList[0])
+        userOutput.clear()
+        userOutput.flush()
+        self.assertEqual(self.sock.writeList, [])
+
+    def testPause(self):
+        userOutput = UserOutput(self.sock)
+        userOutput.pauseProducing()
+        for line in self.lineList:
+            userOutput.writeLine(line)
+        userOutput.flush()
+        self.assertEqual(self.sock.writeList, [])
+        userOutput.resumeProducing()
+        self.assertEqual(self.sock.writeList, ["".join(self.lineList)])
+
+    def testPauseBatch(self):
+        userOutput = UserOutput(self.sock, doBatch=True)
+        userOutput.pauseProducing()
+        for line in self.lineList:
+            userOutput.writeLine(line)
+        # the actor's flush timer fires while the transport is paused
+        userOutput.flush()
+        self.assertEqual(self.sock.writeList, [])
+        # resuming writes the queued output without waiting for another flush
+        userOutput.resumeProducing()
+        self.assertEqual(self.sock.writeList, ["".join(self.lineList)])
+        self.assertEqual(userOutput.numLines, 0)
+
+    def testDropInfo(self):
+        userOutput = UserOutput(self.sock, maxLines=3, policy=UserOutput.DropInfo)
+        userOutput.pauseProducing()
+        for line in self.lineList:
+            userOutput.writeLine(line)
+        userOutput.writeLine("5 1 : \r\n")
+        self.assertEqual(userOutput.numLines, 4)
+        self.assertEqual(userOutput.numDropped, len(self.lineList) - 3)
+        userOutput.resumeProducing()
+        self.assertEqual(self.sock.data, "".join(self.lineList[0:3]) + "5 1 : \r\n")
+
+    def testCollapse(self):
+        userOutput = UserOutput(self.sock, maxLines=2, policy=UserOutput.Collapse)
+        userOutput.pauseProducing()
+        lineList = [
+            "0 0 i pos=1; vel=0\r\n",
+            "0 0 i text=\"a; b\"\r\n",
+            "0 0 i pos=2; vel=0\r\n",
+            "0 0 i pos=3; vel=1\r\n",
+            "0 0 i other=1\r\n",
+        ]
+        for line in lineList:
+            userOutput.writeLine(line)
+        self.assertEqual(userOutput.numLines, 2)
+        self.assertEqual(userOutput.numDropped, 3)
+        userOutput.resumeProducing()
+        self.assertEqual(self.sock.data, lineList[1] + lineList[3])
+
+    def testDisconnect(self):
+        userOutput = UserOutput(self.sock, maxLines=3, policy=UserOutput.Disconnect)
+        userOutput.pauseProducing()
+        for line in self.lineList[0:3]:
+            userOutput.writeLine(line)
+        self.assertEqual(self.sock.closeReason, None)
+        userOutput.writeLine(self.lineList[3])
+        self.assertEqual(userOutput.numLines, 0)
+        self.assertEqual(userOutput.numDropped, 4)
+        # the socket is closed later; meanwhile output is discarded
+        self.assertEqual(self.sock.closeReason, None)
+        userOutput.resumeProducing()
+        userOutput.writeLine(self.lineList[4])
+        self.assertEqual(userOutput.numDropped, 5)
+
+        def checkResults():
+            self.assertNotEqual(self.sock.closeReason, None)
+            self.assertEqual(self.sock.writeList, [])
+        return checkAfter(0.01, checkResults)
+
+    def testSplitKeywords(self):
+        self.assertEqual(splitKeywords(""), [])
+        self.assertEqual(
+            splitKeywords("foo=1, 2; text=\"a; b\";bar; baz = 'x;y' "),
+            [("foo", "foo=1, 2"), ("text", "text=\"a; b\""), ("bar", "bar"), ("baz", "baz = 'x;y'")],
+        )
+
+    def testKeywordCoalescer(self):
+        coalescer = KeywordCoalescer()
+        self.assertEqual(coalescer.pop(), "")
+        self.assertTrue(coalescer.add("pos=1; vel=0"))
+        self.assertTrue(coalescer.add("Pos=2"))
+        self.assertTrue(coalescer.add("state=Moving"))
+        self.assertFalse(coalescer.add("pos=3; text=\"not status\""))
+        self.assertFalse(coalescer.add(""))
+        self.assertEqual(len(coalescer), 3)
+        # newest value of each keyword, in the order values were last set
+        self.assertEqual(coalescer.pop(), "vel=0; Pos=2; state=Moving")
+        self.assertEqual(coalescer.numAdded, 4)
+        self.assertEqual(coalescer.numOutput, 3)
+        self.assertEqual(len(coalescer), 0)
+        self.assertEqual(coalescer.pop(), "")
+
+
+class TestActorDisconnect(unittest.TestCase):
+    """Test the Disconnect overflow policy while an actor writes to several users
+    """
+    def setUp(self):
+        self.actor = BaseActor(userPort=0)
+        self.sockList = []
+        for i in range(3):
+            sock = FakeUserSocket(self.actor)
+            self.actor.newUser(sock)
+            self.sockList.append(sock)
+
+    def tearDown(self):
+        self.actor.close()
+        # give the server socket time to close
+        return checkAfter(0.01, lambda: None)
+
+    def testOverflow(self):
+        self.actor.setUserQueueLimit(maxLines=3, policy=UserOutput.Disconnect)
+        slowSock = self.sockList[1]
+        self.actor.userOutputDict[2].pauseProducing()
+        for sock in self.sockList:
+            sock.writeList = []
+        lineList = ["0 0 i line=%d" % (i,) for i in range(5)]
+        for line in lineList:
+            msgCode, msgStr = line.split(" ", 3)[2:]
+            self.actor.writeToUsers(msgCode, msgStr)
+        # the other users receive every line, even though user 2 overflowed partway through
+        for sock in (self.sockList[0], self.sockList[2]):
+            self.assertEqual(sock.data, "".join(line + "\r\n" for line in lineList))
+        self.assertEqual(slowSock.data, "")
+        self.assertEqual(slowSock.closeReason, None)
+
+        def checkResults():
+            self.assertNotEqual(slowSock.closeReason, None)
+            self.assertEqual(sorted(self.actor.userOutputDict), [1, 3])
+            self.assertEqual(sorted(self.actor.userDict), [1, 3])
+            self.actor.writeToUsers("i", "after=1")
+            for sock in (self.sockList[0], self.sockList[2]):
+                self.assertTrue(sock.data.endswith("0 0 i after=1\r\n"))
+        return checkAfter(0.01, checkResults)
+
+
+if __name__ == "__main__":
+    from unittest import main
+    main()